@@ -3,6 +3,7 @@
 from .delete import deleteVFInfo
 from .design_axes import getAxisValue
 from .export import exportVariableFont
+from .job import Cancelled, ExportJob
 from .language import languageCodeIterator, languageCodeLookup, languageCodeReverseLookup, getLanguageList
 from .load import openVariableFont
 from .utils import (
@@ -15,6 +16,7 @@ from .utils import (
     deleteVFValue,
     setOrDeleteVFValue,
     checkExtensionTtfOrWoff2,
+    checkExtension,
 )
 
 
@@ -28,6 +30,10 @@ __all__ = [
     # export
     "exportVariableFont",
 
+    # job
+    "Cancelled",
+    "ExportJob",
+
     # language
     'languageCodeIterator',
     'languageCodeLookup',
@@ -47,4 +53,5 @@ __all__ = [
     "deleteVFValue",
     "setOrDeleteVFValue",
     "checkExtensionTtfOrWoff2",
+    "checkExtension",
 ]
@@ -0,0 +1,122 @@
+from subprocess import CompletedProcess
+
+
+backends = ('subprocess', 'inprocess', 'daemon')
+
+
+def checkBackend(backend: str) -> str:
+    """Checks the name of a backend
+
+    :raises ``ValueError``: unknown backend, or ``'daemon'`` on a \
+    platform without Unix sockets or ``fork``
+    """
+    if backend not in backends:
+        raise ValueError("unknown backend '" + str(backend) + "'")
+    if backend == 'daemon':
+        from .daemon import isAvailable
+        if not isAvailable():
+            raise ValueError("'daemon' backend is not available on this platform")
+    return backend
+
+
+def _entryPoint(cmd: list[str]):
+    """Returns ``main()`` of the tool and the arguments to it"""
+    import importlib
+
+    if cmd[0] == 'fonttools':  # fontTools.__main__ reads sys.argv
+        return importlib.import_module('fontTools.' + cmd[1]).main, cmd[2:]
+    elif cmd[0] == 'fontmake':
+        return importlib.import_module('fontmake.__main__').main, cmd[1:]
+    else:
+        raise ValueError("'" + cmd[0] + "' cannot run in process")
+
+
+def _exitCode(e: SystemExit, log) -> int:
+    if e.code is None:
+        return 0
+    elif isinstance(e.code, int):
+        return e.code
+    else:  # sys.exit("message")
+        log.write(str(e.code) + '\n')
+        return 1
+
+
+def _runInProcess(cmd: list[str], capture: bool) -> CompletedProcess:
+    import contextlib
+    import io
+    import logging
+    import traceback
+    from subprocess import CalledProcessError
+
+    main, args = _entryPoint(cmd)
+    log = io.StringIO()
+    handler = logging.StreamHandler(log)
+    handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+    root = logging.getLogger()
+    if capture:
+        # Also keeps the tools from installing their own handler to stderr
+        root.addHandler(handler)
+    try:
+        with contextlib.redirect_stderr(log) if capture else contextlib.nullcontext():
+            returncode = main(args) or 0
+    except SystemExit as e:
+        returncode = _exitCode(e, log)
+    except Exception:
+        log.write(traceback.format_exc())
+        returncode = 1
+    finally:
+        root.removeHandler(handler)
+    if not capture:
+        import sys
+        sys.stderr.write(log.getvalue())
+    if returncode != 0:
+        raise CalledProcessError(returncode, cmd, '', log.getvalue() if capture else None)
+    return CompletedProcess(cmd, 0, '', log.getvalue() if capture else None)
+
+
+def _runSubprocess(cmd: list[str], capture: bool) -> CompletedProcess:
+    from subprocess import PIPE, Popen, CalledProcessError
+    from .job import watch
+
+    with Popen(cmd, text=True, stdout=PIPE if capture else None, stderr=PIPE if capture else None) as process:
+        with watch(process):  # killed if the export is cancelled
+            stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return CompletedProcess(cmd, 0, stdout, stderr)
+
+
+def run(cmd: list[str], backend: str = 'subprocess', capture: bool = False) -> CompletedProcess:
+    """Runs a Python command line tool
+
+    With ``'subprocess'`` backend the tool is launched as a separate
+    process, which isolates crashes. With ``'inprocess'`` backend its
+    ``main()`` is called in this process, which saves the startup and
+    import costs. With ``'daemon'`` backend it is sent to a long-lived
+    worker which keeps the libraries imported, which does both; if the
+    worker cannot be reached or started (``ConnectionError``), a warning
+    is logged and the tool is launched as with ``'subprocess'`` backend.
+    Either way the result looks like that of ``subprocess.run``. If the
+    export job is cancelled, the subprocess (or the job in the worker)
+    is killed; a tool in process runs to its end.
+
+    :param cmd: Command line, ``cmd[0]`` being 'fontmake' or 'fonttools'
+    :param backend: ``'subprocess'``, ``'inprocess'`` or ``'daemon'``
+    :param capture: Captures the output
+    :raises ``CalledProcessError``: the tool ended abnormally
+    """
+    from . import timing
+
+    checkBackend(backend)
+    name = ' '.join(str(c) for c in cmd[:2]) if cmd[0] == 'fonttools' else str(cmd[0])
+    with timing.span(name, backend=backend):
+        if backend == 'inprocess':
+            return _runInProcess(cmd, capture)
+        elif backend == 'daemon':
+            from . import daemon
+            try:
+                return daemon.run(cmd, capture)
+            except ConnectionError as e:
+                import fontforge
+                fontforge.logWarning('Build worker is unavailable (' + str(e) + '); running ' + name + ' as a subprocess')
+        return _runSubprocess(cmd, capture)
@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from os import PathLike
+import os
+import shutil
+import time
+import uuid
+
+
+def _entrySize(path: str) -> int:
+    if os.path.isdir(path):
+        total = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            for f in filenames:
+                total += os.path.getsize(os.path.join(dirpath, f))
+        return total
+    else:
+        return os.path.getsize(path)
+
+
+def _copy(src: str, dest: str):
+    if os.path.isdir(src):
+        shutil.copytree(src, dest)
+    else:
+        shutil.copyfile(src, dest)
+
+
+def _remove(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+class DirectoryCache:
+    """Content-addressed cache of files or directories
+
+    Each entry is stored in ``root`` under its key (a content hash)
+    followed by a suffix. Entries are evicted in least recently used
+    order when the total size exceeds ``maxSize`` bytes.
+
+    Several processes may share one directory: storing, fetching and
+    eviction hold a lock on ``root/.lock`` (where ``fcntl`` is
+    unavailable, e.g. on Windows, no lock is taken).
+    """
+
+    def __init__(self, root: str | PathLike, maxSize: int):
+        self.root = os.path.expanduser(str(root))
+        self.maxSize = maxSize
+        os.makedirs(self.root, exist_ok=True)
+
+    @contextmanager
+    def locked(self):
+        """Holds the lock of the cache directory (not reentrant)"""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        with open(os.path.join(self.root, '.lock'), 'a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+    def path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key + suffix)
+
+    def lookup(self, key: str, suffix: str) -> str | None:
+        """Returns the path of the entry, or ``None`` if not cached
+
+        Another process may evict the entry as soon as this returns; use
+        ``read()`` or ``fetch()`` to use the content.
+        """
+        path = self.path(key, suffix)
+        with self.locked():
+            if os.path.exists(path + '.size'):
+                os.utime(path + '.size')  # mark as recently used
+                return path
+        return None
+
+    def read(self, key: str, suffix: str) -> bytes | None:
+        """Returns the content of a file entry, or ``None`` if not cached"""
+        path = self.path(key, suffix)
+        with self.locked():
+            if not os.path.exists(path + '.size'):
+                return None
+            os.utime(path + '.size')
+            with open(path, 'rb') as f:
+                return f.read()
+
+    def fetch(self, key: str, suffix: str, dest: str | PathLike) -> bool:
+        """Copies an entry to ``dest`` if cached
+
+        The entry cannot be evicted by another process while copied. A
+        file at ``dest`` is replaced only when completely copied, and a
+        directory at ``dest`` is removed first.
+        """
+        from .utils import _atomicOutput
+
+        path = self.path(key, suffix)
+        with self.locked():
+            if not os.path.exists(path + '.size'):
+                return False
+            os.utime(path + '.size')
+            if os.path.isdir(path):
+                _remove(str(dest))
+                shutil.copytree(path, dest)
+            else:
+                with _atomicOutput(dest) as tmpFile:
+                    shutil.copyfile(path, tmpFile)
+        return True
+
+    def store(self, key: str, suffix: str, src: str | PathLike) -> str:
+        """Copies a file or directory into the cache"""
+        scratchPath = self.scratchPath(key, suffix)
+        _copy(str(src), scratchPath)
+        return self.commit(key, suffix, scratchPath)
+
+    def scratchPath(self, key: str, suffix: str) -> str:
+        """Returns a unique path to write an entry before ``commit()``"""
+        return os.path.join(self.root, key + '.' + uuid.uuid4().hex + '.tmp' + suffix)
+
+    def commit(self, key: str, suffix: str, scratchPath: str, replace: bool = False) -> str:
+        """Moves an entry written at ``scratchPath`` into the cache
+
+        :param replace: Optional. Replaces the entry if already cached, \
+        for an entry whose key does not address its content
+        """
+        path = self.path(key, suffix)
+        size = _entrySize(scratchPath)
+        with self.locked():
+            if os.path.exists(path + '.size') and not replace:  # concurrently stored
+                _remove(scratchPath)
+            else:
+                _remove(path)  # incomplete entry left behind
+                os.replace(scratchPath, path)
+                with open(path + '.size', 'w') as f:
+                    f.write(str(size))
+        return path
+
+    def evict(self, keep: set[str] = set()):
+        """Removes least recently used entries exceeding the size cap
+
+        Entries whose keys are in ``keep`` are never removed.
+        """
+        with self.locked():
+            self._evict(keep)
+
+    def _evict(self, keep: set[str]):
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            if '.tmp' in name:  # left behind by an aborted export
+                scratchPath = os.path.join(self.root, name)
+                if os.path.getmtime(scratchPath) < time.time() - 86400:
+                    _remove(scratchPath)
+                continue
+            if not name.endswith('.size'):
+                continue
+            sizeFile = os.path.join(self.root, name)
+            try:
+                with open(sizeFile) as f:
+                    size = int(f.read())
+                mtime = os.path.getmtime(sizeFile)
+            except (OSError, ValueError):
+                continue
+            total += size
+            entries.append((mtime, name[:-5], size))
+        for mtime, entry, size in sorted(entries):
+            if total <= self.maxSize:
+                break
+            if entry.split('.')[0] in keep:
+                continue
+            os.remove(os.path.join(self.root, entry + '.size'))
+            _remove(os.path.join(self.root, entry))
+            total -= size
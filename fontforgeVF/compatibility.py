@@ -0,0 +1,100 @@
+import fontforge
+
+
+_checks = (
+    ('contours', 'number of contours'),
+    ('points', 'number of points'),
+    ('pointTypes', 'point types'),
+    ('components', 'components'),
+    ('anchors', 'anchors'),
+)
+
+
+def _glyphSignature(glyph: fontforge.glyph) -> dict[str, int]:
+    """Hashes of what must match among masters for a glyph to interpolate"""
+    layer = glyph.foreground
+    pointTypes = []
+    for contour in layer:
+        pointTypes.append((contour.is_quadratic, contour.closed, bytes(p.on_curve for p in contour)))
+    return {
+        'contours': len(layer),
+        'points': sum(len(contour) for contour in layer),
+        'pointTypes': hash(tuple(pointTypes)),
+        'components': hash(tuple(ref[0] for ref in glyph.references)),
+        'anchors': hash(frozenset((a[0], a[1]) for a in glyph.anchorPoints)),
+    }
+
+
+def _values(font: fontforge.font, glyph: str, check: str):
+    g = font[glyph]
+    if check == 'contours':
+        return len(g.foreground)
+    elif check == 'points':
+        return [len(contour) for contour in g.foreground]
+    elif check == 'pointTypes':
+        # 'o' for on-curve and '.' for off-curve points; 'q' for quadratic
+        return [
+            ('q' if contour.is_quadratic else '') + ''.join('o' if p.on_curve else '.' for p in contour)
+            for contour in g.foreground
+        ]
+    elif check == 'components':
+        return [ref[0] for ref in g.references]
+    else:
+        return sorted(a[0] for a in g.anchorPoints)
+
+
+def _isEmpty(glyph: fontforge.glyph) -> bool:
+    return len(glyph.foreground) == 0 and not glyph.references
+
+
+def _onlyInOthers(defaultFont: fontforge.font, masters: list[fontforge.font], glyphNames: set[str] | None) -> list[str]:
+    warnings = []
+    for f in masters:
+        for glyph in f.glyphs():
+            if glyph.glyphname not in defaultFont and (glyphNames is None or glyph.glyphname in glyphNames):
+                warnings.append("'" + glyph.glyphname + "': only in '" + f.fontname + "', not in the default master")
+    return warnings
+
+
+def _glyphErrors(name: str, defaultFont: fontforge.font, masters: list[fontforge.font]) -> list[str]:
+    # As in fontTools.varLib, an empty glyph in a non-default master is
+    # a sparse master unless the glyph is empty in the default master too
+    sparse = not _isEmpty(defaultFont[name])
+    others = [f for f in masters if name in f and not (sparse and _isEmpty(f[name]))]
+    if not others:
+        return []
+    expected = _glyphSignature(defaultFont[name])
+    signatures = [_glyphSignature(f[name]) for f in others]
+    errors = []
+    for check, description in _checks:
+        if any(s[check] != expected[check] for s in signatures):
+            values = ', '.join("'" + f.fontname + "': " + str(_values(f, name, check)) for f in [defaultFont] + others)
+            errors.append("'" + name + "': " + description + ' differ (' + values + ')')
+    return errors
+
+
+def checkCompatibility(
+    defaultFont: fontforge.font,
+    fonts: list[fontforge.font],
+    glyphNames: set[str] | None = None
+) -> tuple[list[str], list[str]]:
+    """Checks if masters are compatible for interpolation
+
+    Glyphs of the default master are compared with the same glyphs in
+    the other masters: numbers of contours and points, on-curve and
+    off-curve points, curve types, referenced glyphs, and anchors. A
+    glyph missing in a non-default master, or empty there but not in
+    the default master, is a sparse master and not checked.
+
+    :param defaultFont: Default master
+    :param fonts: All masters including ``defaultFont``
+    :param glyphNames: Optional. Checks only these glyphs
+    :return: Errors, and warnings (glyphs only in non-default masters), \
+    one line per glyph
+    """
+    masters = [f for f in fonts if f is not defaultFont]
+    errors = []
+    for glyph in defaultFont.glyphs():
+        if glyphNames is None or glyph.glyphname in glyphNames:
+            errors += _glyphErrors(glyph.glyphname, defaultFont, masters)
+    return errors, _onlyInOthers(defaultFont, masters, glyphNames)
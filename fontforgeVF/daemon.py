@@ -0,0 +1,263 @@
+"""Long-lived build worker which keeps fontmake and fontTools imported
+
+The worker listens on a Unix socket and runs one job at a time; jobs
+sent meanwhile wait in the listen queue. Each job runs in a child forked
+from the worker, so the imported libraries are warm and a crash in a
+tool does not take the worker down. A client sends a job as a line of
+JSON and keeps the connection open until the reply; if it hangs up
+first (e.g. the export is cancelled), the job is killed.
+
+This file is also run as a script to start the worker, so it must not
+import anything from the package at the top level.
+"""
+
+from subprocess import CompletedProcess
+import json
+import os
+import socket
+import sys
+import tempfile
+
+_preloadModules = (
+    'fontTools.ttLib',
+    'fontTools.varLib',
+    'fontTools.varLib.instancer',
+    'ufo2ft',
+    'fontmake.__main__',
+    'cffsubr',
+    'pathops',
+)
+
+_idleTimeout = 30 * 60  # seconds
+_startTimeout = 30  # seconds
+_protocol = 2  # in the socket name, so that an older worker is not used
+
+
+def _privateDir(path: str) -> str:
+    """``path`` made if missing; ``ConnectionError`` unless only this user can use it"""
+    import stat
+
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise ConnectionError("'" + path + "' is not a private directory of this user")
+    return path
+
+
+def socketPath() -> str:
+    """Path of the socket the worker listens on
+
+    It is in ``$XDG_RUNTIME_DIR``, or else in a directory of this user
+    (mode 0700) in the temporary directory, so that other users cannot
+    listen on it in place of the worker.
+    """
+    if runtimeDir := os.environ.get('XDG_RUNTIME_DIR'):
+        directory = _privateDir(os.path.join(runtimeDir, 'fontforgeVF'))
+    else:
+        directory = _privateDir(os.path.join(tempfile.gettempdir(), 'fontforgeVF-' + str(os.getuid())))
+    return os.path.join(directory, 'worker-v' + str(_protocol) + '.sock')
+
+
+def isAvailable() -> bool:
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'fork') and hasattr(os, 'getuid')
+
+
+def _peerUid(conn: socket.socket, path: str) -> int:
+    """User of the process at the other end of ``conn``"""
+    import struct
+
+    if hasattr(socket, 'SO_PEERCRED'):  # Linux
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', creds)[1]
+    return os.stat(path).st_uid  # the socket is made by the worker
+
+
+def _pythonExecutable() -> str:
+    # Inside FontForge, sys.executable may be FontForge itself
+    import shutil
+
+    if exe := os.environ.get('FONTFORGEVF_PYTHON'):
+        return exe
+    if sys.executable and os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+    return shutil.which('python3') or 'python3'
+
+
+def _recvAll(conn: socket.socket) -> bytes:
+    chunks = []
+    while chunk := conn.recv(65536):
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def _recvLine(conn: socket.socket) -> bytes:
+    chunks = []
+    while chunk := conn.recv(65536):
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks)
+
+
+def _runJob(conn: socket.socket, job: dict):
+    import traceback
+    from subprocess import CalledProcessError
+
+    try:
+        from backend import _runInProcess  # sys.path[0] is this directory
+
+        os.chdir(job['cwd'])
+        result = _runInProcess(job['cmd'], True)
+        reply = {'returncode': 0, 'stderr': result.stderr}
+    except CalledProcessError as e:
+        reply = {'returncode': e.returncode, 'stderr': e.stderr}
+    except BaseException:  # not to exit without a reply
+        reply = {'returncode': 1, 'stderr': traceback.format_exc()}
+    conn.sendall(json.dumps(reply).encode('utf-8'))
+
+
+def _waitJob(conn: socket.socket, pid: int) -> int | None:
+    """Exit status of the job, or ``None`` if the client hung up first"""
+    import select
+    import signal
+
+    while True:
+        readable, _, _ = select.select([conn], [], [], 0.2)
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return status
+        if readable and not conn.recv(1, socket.MSG_PEEK):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+
+
+def _serveJob(conn: socket.socket):
+    job = json.loads(_recvLine(conn).decode('utf-8'))
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _runJob(conn, job)
+        finally:
+            os._exit(0)
+    status = _waitJob(conn, pid)
+    if status is not None and status != 0:  # died before replying
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status) or 1
+        reply = {'returncode': returncode, 'stderr': 'worker exited abnormally (' + str(returncode) + ')\n'}
+        conn.sendall(json.dumps(reply).encode('utf-8'))
+
+
+def _preload():
+    import importlib
+
+    for module in _preloadModules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+def _serveJobs(server: socket.socket, path: str):
+    server.settimeout(_idleTimeout)
+    while True:
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            break
+        with conn:
+            conn.settimeout(None)
+            try:
+                if _peerUid(conn, path) == os.getuid():
+                    _serveJob(conn)
+            except (OSError, ValueError):  # client gone or broken request
+                pass
+
+
+def serve(path: str):
+    """Runs the worker until it is idle for ``_idleTimeout`` seconds"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+    except OSError:  # another worker has just started
+        return
+    try:
+        os.chmod(path, 0o600)
+        # Bound before importing, so clients can queue jobs meanwhile
+        server.listen(64)
+        _preload()
+        _serveJobs(server, path)
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _start(path: str):
+    import subprocess
+
+    if os.path.exists(path):  # left by a worker which crashed
+        os.remove(path)
+    subprocess.Popen(
+        [_pythonExecutable(), os.path.abspath(__file__), path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+
+
+def _connect(path: str) -> socket.socket:
+    import time
+
+    for attempt in range(2):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            conn.close()
+            if attempt:
+                break
+            _start(path)
+            deadline = time.monotonic() + _startTimeout
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+        else:
+            if _peerUid(conn, path) != os.getuid():
+                conn.close()
+                raise ConnectionError("build worker at '" + path + "' is run by another user")
+            return conn
+    raise ConnectionError('cannot start the build worker')
+
+
+def run(cmd: list[str], capture: bool = False) -> CompletedProcess:
+    """Runs a Python command line tool in the worker
+
+    The worker is started if it is not running (e.g. on the first call,
+    after it crashed, or after it exited being idle).
+
+    :param cmd: Command line, ``cmd[0]`` being 'fontmake' or 'fonttools'
+    :param capture: Captures the output
+    :raises ``CalledProcessError``: the tool ended abnormally
+    """
+    from subprocess import CalledProcessError
+    from .job import watch
+
+    cmd = [str(c) for c in cmd]
+    with _connect(socketPath()) as conn, watch(conn):
+        conn.sendall(json.dumps({'cmd': cmd, 'cwd': os.getcwd()}).encode('utf-8') + b'\n')
+        data = _recvAll(conn)
+    if not data:  # the worker itself died
+        raise CalledProcessError(1, cmd, '', 'build worker exited without reply\n')
+    reply = json.loads(data.decode('utf-8'))
+    if not capture:
+        sys.stderr.write(reply['stderr'] or '')
+    if reply['returncode'] != 0:
+        raise CalledProcessError(reply['returncode'], cmd, '', reply['stderr'] if capture else None)
+    return CompletedProcess(cmd, 0, '', reply['stderr'] if capture else None)
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
@@ -0,0 +1,152 @@
+import hashlib
+
+import fontforge
+
+
+def _stable(obj):
+    """Converts ``obj`` into a form whose ``repr()`` does not depend on
+    the order of insertion into ``dict``s or ``set``s"""
+    if isinstance(obj, dict):
+        return sorted((repr(k), _stable(v)) for k, v in obj.items())
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(repr(_stable(v)) for v in obj)
+    elif isinstance(obj, (list, tuple)):
+        return [_stable(v) for v in obj]
+    else:
+        return repr(obj)
+
+
+def _update(h, *objs):
+    for obj in objs:
+        h.update(repr(_stable(obj)).encode('utf-8'))
+        h.update(b'\0')
+
+
+def _glyphOutline(glyph: fontforge.glyph) -> list:
+    return [
+        (contour.is_quadratic, contour.closed, [(p.x, p.y, p.on_curve) for p in contour])
+        for contour in glyph.foreground
+    ]
+
+
+def glyphDigest(glyph: fontforge.glyph) -> str:
+    """Hash of what a glyph contributes to the exported font
+
+    Covers the outline in the foreground layer, references, anchors,
+    metrics, encoding, and lookups which this glyph is involved in.
+    """
+    h = hashlib.sha256()
+    _update(
+        h,
+        glyph.glyphname,
+        glyph.unicode,
+        glyph.altuni,
+        glyph.width,
+        glyph.vwidth,
+        glyph.glyphclass,
+        _glyphOutline(glyph),
+        glyph.references,
+        glyph.anchorPoints,
+        glyph.getPosSub('*'),
+    )
+    return h.hexdigest()
+
+
+def _lookupData(font: fontforge.font) -> list:
+    data = []
+    for lookup in tuple(font.gsub_lookups) + tuple(font.gpos_lookups):
+        subtables = []
+        for subtable in font.getLookupSubtables(lookup):
+            if font.isKerningClass(subtable):
+                subtables.append((subtable, font.getKerningClass(subtable)))
+            else:
+                subtables.append((subtable, None))
+        data.append((lookup, font.getLookupInfo(lookup), subtables))
+    return data
+
+
+def _privateDict(font: fontforge.font) -> list | None:
+    if (private := getattr(font, 'private', None)) is None:
+        return None
+    return [(key, private[key]) for key in private.keys()]
+
+
+def _guidelines(font: fontforge.font) -> list | None:
+    if (guide := getattr(font, 'guide', None)) is None:
+        return None
+    return [(contour.closed, [(p.x, p.y) for p in contour]) for contour in guide]
+
+
+def _fontInfo(font: fontforge.font) -> list:
+    """Font-wide information which either UFO writer puts in fontinfo.plist"""
+    names = (
+        'fontname', 'familyname', 'fullname', 'weight', 'copyright', 'version',
+        'sfntRevision', 'em', 'ascent', 'descent', 'capHeight', 'xHeight', 'italicangle',
+        'upos', 'uwidth', 'design_size', 'sfnt_names', 'markClasses', 'encoding',
+        'hasvmetrics', 'creationtime', 'macstyle', 'head_optimized_for_cleartype',
+        'gasp', 'gasp_version', 'uniqueid', 'comment', 'fontlog',
+        'woffMajor', 'woffMinor', 'woffMetadata',
+    )
+    info = [(name, getattr(font, name, None)) for name in names]
+    info += [
+        (name, getattr(font, name)) for name in dir(font)
+        if name.startswith(('os2_', 'hhea_', 'vhea_'))
+    ]
+    info += [('private', _privateDict(font)), ('guide', _guidelines(font))]
+    return info
+
+
+def fontDigests(font: fontforge.font, *options, glyphNames: set[str] | None = None) -> tuple[str, str]:
+    """``fontDigest`` of a master, and its hash without the VF metadata
+
+    The latter leaves out ``font.persistent['VF']``, which only names,
+    'STAT' and instances depend on besides the designspace. Glyphs are
+    hashed once for both. With ``glyphNames`` (a proof build, which has
+    no OpenType layout), only these glyphs are hashed, and lookups are
+    not.
+    """
+    from .utils import vfInfoExists
+
+    vfData = font.persistent['VF'] if vfInfoExists(font) else None  # type: ignore
+    h = hashlib.sha256()
+    _update(h, fontforge.version(), options, _fontInfo(font), _lookupData(font) if glyphNames is None else None)
+    for glyph in font.glyphs():
+        if glyphNames is None or glyph.glyphname in glyphNames:
+            h.update(glyphDigest(glyph).encode('ascii'))
+    structure = h.hexdigest()
+    _update(h, vfData)
+    return h.hexdigest(), structure
+
+
+def fontDigest(font: fontforge.font, *options, glyphNames: set[str] | None = None) -> str:
+    """Hash of a master as it is converted into UFO
+
+    Covers every glyph in glyph order (or those in ``glyphNames``),
+    font-wide information and lookups, ``font.persistent['VF']``, and
+    ``options`` which affect the conversion.
+    """
+    return fontDigests(font, *options, glyphNames=glyphNames)[0]
+
+
+def _toolVersions() -> list:
+    from importlib.metadata import version, PackageNotFoundError
+
+    versions = []
+    for package in ('fonttools', 'fontmake', 'ufo2ft', 'ufoLib2', 'brotli'):
+        try:
+            versions.append((package, version(package)))
+        except PackageNotFoundError:
+            versions.append((package, None))
+    return versions
+
+
+def buildDigest(masterDigests: list[str], designSpace: str, *options) -> str:
+    """Hash of everything a variable font is built from
+
+    Covers the digests of the masters (see ``fontDigest``), the
+    designspace document, the versions of the build tools, and
+    ``options`` which affect the output.
+    """
+    h = hashlib.sha256()
+    _update(h, _toolVersions(), masterDigests, designSpace, options)
+    return h.hexdigest()
@@ -1,5 +1,7 @@
+from collections.abc import Iterable
 from os import PathLike
-import tempfile
+import os
+import time
 
 import fontforge
 from fontTools import ttLib
@@ -10,13 +12,23 @@ from fontTools.designspaceLib import (
     DiscreteAxisDescriptor,
     AxisLabelDescriptor,
     InstanceDescriptor,
+    VariableFontDescriptor,
+    RangeAxisSubsetDescriptor,
+    ValueAxisSubsetDescriptor,
 )
 
-from . import utils, language
+from . import compatibility, digest, features, memory, timing, utils, language
+from .backend import checkBackend, run as runTool
+from .cache import DirectoryCache
+from .job import Cancelled, ExportJob, watch
+from .workspace import Workspace
 from .design_axes import designAxes, getAxisValue
 from .translation import tr
 
 
+profiles = ('release', 'dev')
+
+
 def _getSourceFonts(defaultFont: fontforge.font, filterItalicRoman: bool | None = None) -> list[fontforge.font]:
     tmpIter = (font for font in fontforge.fonts() if font.familyname == defaultFont.familyname)
     if filterItalicRoman is None:
@@ -110,40 +122,61 @@ class _ufoInfo:
             raise AttributeError("attribute '{0}' not found".format(name))
 
 
-def _aaltExists(font: fontforge.font) -> bool:
-    tags = []
-    for i in font.gsub_lookups:
-        for j in font.getLookupInfo(i)[2]:
-            tags.append(j[0])
-    return 'aalt' in tags
+def _setUfoPath(font: fontforge.font, ufoPath: str):
+    if not isinstance(font.temporary, dict):
+        font.temporary = dict()
+    font.temporary['ufo'] = ufoPath
 
 
-def _allGSUBTags(font: fontforge.font) -> set[str]:
-    tags = []
-    for i in font.gsub_lookups:
-        for j in font.getLookupInfo(i)[2]:
-            tags.append(j[0])
-    return set(tags) - set(['aalt'])  # do not include 'aalt' itself
+def _ufoFeatures(font: fontforge.font, aalt: bool, glyphNames: set[str] | None = None) -> str:
+    from . import ufo_writer
+
+    if glyphNames is not None:
+        return ''  # lookups would refer to glyphs left out
+    if tags := features.gsubFeatureTags(font):
+        return ufo_writer._readFeatures(
+            font, lambda source, dest: features.fixAalt(source, dest, tags if aalt else ()))
+    return ufo_writer._readFeatures(font)
+
 
+def _fixFeatureFile(feaPath: str, tags: set[str], aalt: bool):
+    with utils._atomicOutput(feaPath) as tmpFile:
+        with open(feaPath, encoding='utf-8', newline='') as source, \
+                open(tmpFile, 'w', encoding='utf-8', newline='') as dest:
+            features.fixAalt(source, dest, tags if aalt else ())
 
-def _outputUfo(font: fontforge.font, outputDir: str | PathLike, outputFile: str | PathLike, aalt: bool):
+
+def _outputUfo(
+    font: fontforge.font,
+    outputDir: str | PathLike,
+    outputFile: str | PathLike,
+    aalt: bool,
+    writer: str = 'fontforge',
+    glyphNames: set[str] | None = None,
+    threads: int | None = None
+):
     from fontTools.ufoLib import UFOReaderWriter
-    import re
-    # import shutil  # for debug
+    from . import ufo_writer, workspace
 
     assert str(outputFile).endswith('.ufo')
     ufoPath = str(outputDir) + '/' + str(outputFile)
     changed = font.changed
-    unlinkRmOvrlpSave = {}
-    for glyph in font.glyphs():
-        unlinkRmOvrlpSave[glyph.glyphname] = glyph.unlinkRmOvrlpSave
+    if writer == 'native':
+        feat = _ufoFeatures(font, aalt, glyphNames)
+        ufo_writer.writeUfo(font, ufoPath, feat, workers=threads, glyphNames=glyphNames)
+        _setUfoPath(font, ufoPath)
+        font.changed = changed
+        return
+
+    if os.path.exists(ufoPath):  # left by a previous export
+        workspace.remove(ufoPath)
+    unlinkRmOvrlpSave = [glyph for glyph in font.glyphs() if glyph.unlinkRmOvrlpSave]
+    for glyph in unlinkRmOvrlpSave:
         glyph.unlinkRmOvrlpSave = False
     font.generate(ufoPath)
-    for glyph in font.glyphs():
-        glyph.unlinkRmOvrlpSave = unlinkRmOvrlpSave[glyph.glyphname]
-    if not isinstance(font.temporary, dict):
-        font.temporary = dict()
-    font.temporary['ufo'] = ufoPath
+    for glyph in unlinkRmOvrlpSave:
+        glyph.unlinkRmOvrlpSave = True
+    _setUfoPath(font, ufoPath)
 
     with UFOReaderWriter(ufoPath) as ufo:
         info = _ufoInfo()
@@ -154,23 +187,9 @@ def _outputUfo(font: fontforge.font, outputDir: str | PathLike, outputFile: str
         ufo.styleMapStyleName = _getFontSubFamilyName(font)  # type: ignore
         ufo.writeInfo(info)  # type: ignore
 
-        if _aaltExists(font) or _allGSUBTags(font):
-            feat = ufo.readFeatures()
-            existingAalt = ''
-            aaltPattern = r'(?s)\bfeature\s+aalt\s*\{\n?(.*)\}\s*aalt\*;\s*'
-            featPosPattern = r'(?=feature\s+\w{1,4}\s*\{)'
-            removeFromAaltPattern = r'(?m)^\s*(script|language)\s+.*?;\s*'
-            if result := re.search(aaltPattern, feat):
-                existingAalt = re.sub(removeFromAaltPattern, "", result[1])
-                feat = re.sub(aaltPattern, "", feat)
-            aaltInclude = ''
-            if aalt:
-                aaltInclude = "".join(['  feature ' + x + ';\n' for x in list(_allGSUBTags(font))])
-            newAalt = ''
-            if aaltInclude or existingAalt:
-                newAalt = "feature aalt {\n" + aaltInclude + existingAalt + "} aalt;\n\n"
-            feat = re.sub(featPosPattern, newAalt, feat, count=1)
-            ufo.writeFeatures(feat)  # type: ignore
+    feaPath = os.path.join(ufoPath, 'features.fea')
+    if os.path.exists(feaPath) and (tags := features.gsubFeatureTags(font)):
+        _fixFeatureFile(feaPath, tags, aalt)
 
     font.changed = changed
 
@@ -179,19 +198,118 @@ def _outputUfo(font: fontforge.font, outputDir: str | PathLike, outputFile: str
     # shutil.copyfile(ufoPath + "/features.fea", "./features.fea")
 
 
-def _designSpaceSources(font: fontforge.font, doc: DesignSpaceDocument, filterItalicRoman: bool | None = None):
+_poolSourceFonts: list[fontforge.font] = []  # set in each forked worker by _initUfoPool
+
+
+def _initUfoPool(fonts: list[fontforge.font]):
+    global _poolSourceFonts
+
+    _poolSourceFonts = fonts
+
+
+def _outputUfoInPool(
+    index: int,
+    outputDir: str | PathLike,
+    outputFile: str,
+    aalt: bool,
+    writer: str,
+    glyphNames: set[str] | None,
+    threads: int | None
+):
+    # Runs in a forked child, which sees the fonts of the parent
+    font = _poolSourceFonts[index]
+    with timing.span('outputUfo', master=font.fontname):
+        _outputUfo(font, outputDir, outputFile, aalt, writer, glyphNames, threads)
+
+
+def _runUfoJobs(
+    fonts: list[fontforge.font],
+    jobs: list[tuple[int, str, str]],
+    aalt: bool,
+    workers: int | None,
+    writer: str,
+    glyphNames: set[str] | None = None,
+    threads: int | None = None
+):
+    executor = None
+    if (workers is None or workers > 1) and len(jobs) > 1:
+        executor = utils._forkExecutor(min(workers or len(jobs), len(jobs)), _initUfoPool, (fonts,))
+    if executor is None:
+        for i, outputDir, outputFile in jobs:
+            with timing.span('outputUfo', master=fonts[i].fontname):
+                _outputUfo(fonts[i], outputDir, outputFile, aalt, writer, glyphNames, threads)
+        return
+
+    with executor, watch(executor):
+        futures = [
+            executor.submit(
+                timing.inWorker, timing.parentId(),
+                _outputUfoInPool, i, outputDir, outputFile, aalt, writer, glyphNames, threads)
+            for i, outputDir, outputFile in jobs
+        ]
+        for future in futures:
+            timing.workerResult(future)
+
+
+def _outputUfos(
+    fonts: list[fontforge.font],
+    outputDir: str | PathLike,
+    aalt: bool,
+    workers: int | None = 1,
+    ufoCache: DirectoryCache | None = None,
+    writer: str = 'fontforge',
+    ufoDir: str | PathLike | None = None,
+    digests: list[str] | None = None,
+    glyphNames: set[str] | None = None,
+    threads: int | None = None
+):
+    jobs = []
+    keys = {}
+    for i, f in enumerate(fonts):
+        if ufoDir is not None:
+            jobs.append((i, str(ufoDir), f.fontname + '.ufo'))
+        elif ufoCache is None:
+            jobs.append((i, str(outputDir), 'source' + str(i + 1) + '.ufo'))
+        else:
+            keys[i] = digests[i] if digests else digest.fontDigest(f, aalt, writer, glyphNames=glyphNames)
+            # A copy, as another process may evict the entry while it is built from
+            ufoFile = 'source' + str(i + 1) + '.ufo'
+            if ufoCache.fetch(keys[i], '.ufo', os.path.join(str(outputDir), ufoFile)):
+                _setUfoPath(f, str(outputDir) + '/' + ufoFile)
+            else:
+                jobs.append((i, str(outputDir), ufoFile))
+
+    _runUfoJobs(fonts, jobs, aalt, workers, writer, glyphNames, threads)
+
+    # Forked children cannot update the fonts of this process
+    for i, jobDir, jobFile in jobs:
+        ufoPath = jobDir + '/' + jobFile
+        if ufoCache is not None:
+            ufoCache.store(keys[i], '.ufo', ufoPath)
+        _setUfoPath(fonts[i], ufoPath)
+    if ufoCache is not None:
+        ufoCache.evict(set(keys.values()))
+
+
+def _designSpaceSources(
+    font: fontforge.font,
+    doc: DesignSpaceDocument,
+    filterItalicRoman: bool | None = None,
+    ufos: list | None = None
+):
     # print(_getSourceFonts(font))
-    for f in _getSourceFonts(font, filterItalicRoman):
+    for i, f in enumerate(_getSourceFonts(font, filterItalicRoman)):
         s = SourceDescriptor()
-        assert isinstance(f.temporary, dict)
-        s.path = f.temporary['ufo']
+        if ufos is None:
+            assert isinstance(f.temporary, dict)
+            s.path = f.temporary['ufo']
         if f is font:
             s.copyLib = True
             s.copyInfo = True
             s.copyGroups = True
             s.copyFeatures = True
         s.name = f.fullname
-        s.font = f
+        s.font = f if ufos is None else ufos[i]
         s.location = {}
         for k, v in designAxes.items():
             active = 'axes.' + k + '.active'
@@ -212,8 +330,12 @@ def _designSpaceSources(font: fontforge.font, doc: DesignSpaceDocument, filterIt
 
 def _designSpaceAxes_labels(labels, a: AxisDescriptor | DiscreteAxisDescriptor):
     L = []
+    if isinstance(a, DiscreteAxisDescriptor):
+        minimum, maximum = min(a.values), max(a.values)
+    else:
+        minimum, maximum = a.minimum, a.maximum
     for u, d in labels.items():
-        if not (a.minimum <= u <= a.maximum):  # type: ignore
+        if not (minimum <= u <= maximum):
             fontforge.logWarning('Ignored label {0} = {1} because out of range'.format(
                 a.name, str(u)))
         elif 'name' not in d:
@@ -240,12 +362,19 @@ def _designSpaceAxes(font: fontforge.font, doc: DesignSpaceDocument, filterItali
                 if k.startswith('custom') else k
             )
             if k == 'ital' and filterItalicRoman is not None:
-                a.minimum = 1 if filterItalicRoman else _axisMinValue(font, a.tag)  # type: ignore
-                a.maximum = 0 if not filterItalicRoman else _axisMaxValue(font, a.tag)  # type: ignore
+                minimum = 1 if filterItalicRoman else _axisMinValue(font, a.tag)
+                maximum = 0 if not filterItalicRoman else _axisMaxValue(font, a.tag)
             else:
-                a.minimum = _axisMinValue(font, a.tag)  # type: ignore
-                a.maximum = _axisMaxValue(font, a.tag)  # type: ignore
+                minimum = _axisMinValue(font, a.tag)
+                maximum = _axisMaxValue(font, a.tag)
             a.default = getAxisValue(font, a.tag)  # type: ignore
+            if isinstance(a, DiscreteAxisDescriptor):
+                # Written as values only; the writer takes an axis with a minimum as continuous
+                a.values = list(range(int(minimum), int(maximum) + 1))  # type: ignore
+                a.default = int(a.default)  # type: ignore
+            else:
+                a.minimum = minimum
+                a.maximum = maximum
             a.name = utils.getVFValue(font, 'axes.' + k + '.name', v['name'])
             if val := utils.getVFValue(font, 'axes.' + k + '.map'):
                 a.map = val
@@ -280,18 +409,42 @@ def _designSpaceInstances(font: fontforge.font, doc: DesignSpaceDocument, filter
         doc.addInstance(i)
 
 
+def _designSpaceVariableFonts(doc: DesignSpaceDocument, variableFonts: dict[str, int | None]):
+    # Value of None takes the default of the discrete (italic) axis
+    for name, italic in variableFonts.items():
+        subsets = []
+        for a in doc.axes:
+            if isinstance(a, DiscreteAxisDescriptor):
+                subsets.append(ValueAxisSubsetDescriptor(
+                    name=a.name, userValue=a.default if italic is None else italic
+                ))
+            else:
+                subsets.append(RangeAxisSubsetDescriptor(name=a.name))
+        doc.addVariableFont(VariableFontDescriptor(name=name, filename=name + '.ttf', axisSubsets=subsets))
+
+
+def _designSpaceDocument(
+    font: fontforge.font,
+    variableFonts: dict[str, int | None] = {'vf': None},
+    ufos: list | None = None
+) -> DesignSpaceDocument:
+    doc = DesignSpaceDocument()
+    _designSpaceSources(font, doc, ufos=ufos)
+    _designSpaceAxes(font, doc)
+    _designSpaceInstances(font, doc)
+    _designSpaceVariableFonts(doc, variableFonts)
+    return doc
+
+
 def _makeDesignSpace(
     font: fontforge.font,
     outputDir: str | PathLike,
     outputFile: str | PathLike,
-    filterItalicRoman: bool | None = None
+    variableFonts: dict[str, int | None] = {'vf': None}
 ):
     # import shutil  # for debug
 
-    doc = DesignSpaceDocument()
-    _designSpaceSources(font, doc, filterItalicRoman)
-    _designSpaceAxes(font, doc, filterItalicRoman)
-    _designSpaceInstances(font, doc, filterItalicRoman)
+    doc = _designSpaceDocument(font, variableFonts)
     doc.write(str(outputDir) + '/' + str(outputFile))
 
     # For debug
@@ -339,6 +492,8 @@ def _fixTtf_axes(font: fontforge.font, ttf: ttLib.TTFont):
 
 
 def _fixTtf_labels(font: fontforge.font, ttf: ttLib.TTFont):
+    if ttf['STAT'].table.AxisValueArray is None:  # no labels
+        return
     for axisLabel in ttf['STAT'].table.AxisValueArray.AxisValue:
         axisIndex = axisLabel.AxisIndex
         tag = ttf['STAT'].table.DesignAxisRecord.Axis[axisIndex].AxisTag
@@ -364,96 +519,854 @@ def _fixTtf_instances(font: fontforge.font, ttf: ttLib.TTFont):
             ttf['name'].setName(name, subfamilyNameID, 3, 1, lang)
 
 
-def _fixTtf(font: fontforge.font, filename: str | PathLike):
-    with ttLib.TTFont(str(filename)) as ttf:
-        for i in font.sfnt_names:
-            if i[0] != 'English (US)':
-                if isinstance(i[0], str):  # likely
-                    langCode = language.languageCodeReverseLookup(i[0])
-                else:  # unlikely
-                    langCode = i[0]
-                if i[1] in _fields:
-                    ttf['name'].setName(i[2], _fields[i[1]], 3, 1, langCode)
-        _fixTtf_axes(font, ttf)
-        _fixTtf_labels(font, ttf)
-        _fixTtf_instances(font, ttf)
-        ttf.save(filename)
+def _markDevBuild(ttf: ttLib.TTFont):
+    # Version string (ID 5) tells a development build from a release
+    for n in [n for n in ttf['name'].names if n.nameID == 5]:
+        ttf['name'].setName(str(n) + ' (development build)', 5, n.platformID, n.platEncID, n.langID)
+
+
+def _fixTtfVariationNames(font: fontforge.font, ttf: ttLib.TTFont):
+    # Localized names of what 'fvar' and 'STAT' refer to
+    _fixTtf_axes(font, ttf)
+    _fixTtf_labels(font, ttf)
+    _fixTtf_instances(font, ttf)
+
+
+def _fixTtfNames(font: fontforge.font, ttf: ttLib.TTFont, profile: str = 'release'):
+    for i in font.sfnt_names:
+        if i[0] != 'English (US)':
+            if isinstance(i[0], str):  # likely
+                langCode = language.languageCodeReverseLookup(i[0])
+            else:  # unlikely
+                langCode = i[0]
+            if i[1] in _fields:
+                ttf['name'].setName(i[2], _fields[i[1]], 3, 1, langCode)
+    _fixTtfVariationNames(font, ttf)
+    if profile == 'dev':
+        _markDevBuild(ttf)
+
+
+def _fixTtf(font: fontforge.font, filename: str | PathLike, profile: str = 'release'):
+    # Only 'name' is recompiled; other tables are copied byte-for-byte
+    # from the file fontmake wrote, without decompiling glyphs or variations
+    filename = str(filename)
+    with utils._atomicOutput(filename) as tmpFile:
+        with ttLib.TTFont(filename, lazy=True) as ttf, \
+                ttLib.TTFont(filename, lazy=True, recalcBBoxes=False, recalcTimestamp=False) as fixedTtf:
+            _fixTtfNames(font, ttf, profile)
+            fixedTtf['name'] = ttf['name']
+            fixedTtf.save(tmpFile, reorderTables=False)
+
+
+def _writeTargets(source: str | bytes, targets: list[str | PathLike]) -> list[tuple]:
+    """Writes TTF and WOFF targets from a TTF (path or data)
+
+    Each target is replaced only when it is completely written. WOFF2
+    targets are returned as jobs for ``woff2.compressAll`` so that all
+    of them are compressed together.
+    """
+    import io
+    import shutil
+
+    def openSource():
+        return io.BytesIO(source) if isinstance(source, bytes) else source
+
+    woff2Jobs = []
+    for target in targets:
+        fileType = utils.checkExtension(target)
+        if fileType == 'woff2':
+            woff2Jobs.append((openSource(), str(target)))
+        elif fileType == 'woff':
+            with ttLib.TTFont(openSource(), recalcBBoxes=False, recalcTimestamp=False) as ttf, \
+                    utils._atomicOutput(target) as tmpFile:
+                ttf.flavor = 'woff'
+                ttf.save(tmpFile)
+        elif isinstance(source, bytes):
+            with utils._atomicOutput(target) as tmpFile, open(tmpFile, 'wb') as f:
+                f.write(source)
+        else:
+            with utils._atomicOutput(target) as tmpFile:
+                shutil.copyfile(source, tmpFile)
+    return woff2Jobs
 
 
 def _doExportVF(
     font: fontforge.font,
     tmpdir,
-    filename: str | PathLike,
+    outputs: dict[str, list[str | PathLike]],
     designSpacePath: str | PathLike,
-    options: list = []
+    options: list = [],
+    backend: str = 'subprocess',
+    woff2Options: dict = {},
+    profile: str = 'release',
+    workers: int | None = 1,
+    glyphCache: DirectoryCache | None = None,
+    featureCache: DirectoryCache | None = None
 ):
-    from subprocess import run
+    from contextlib import nullcontext
     from sys import stderr
     from pathlib import Path
-    from shutil import move
-
-    ttFile = str(Path(tmpdir, Path(filename).stem)) + '.ttf'
-    result = run(['fontmake'] + options + [
-        '-m', designSpacePath,
-        '-o', 'variable', '--output-path', ttFile],
-        check=True, text=True, capture_output=fontforge.hasUserInterface())
+    from . import variations, woff2
+
+    # All variable fonts in the designspace are built at once
+    vfDir = str(Path(tmpdir, 'vf'))
+    # Glyph variations and features can be sharded and cached only if fontTools runs in this process
+    inProcess = backend == 'inprocess'
+    with variations.compiling(workers, glyphCache) if inProcess else nullcontext(), \
+            features.compiling(featureCache) if inProcess else nullcontext():
+        result = runTool(['fontmake'] + options + [
+            '-m', str(designSpacePath),
+            '-o', 'variable', '--output-dir', vfDir],
+            backend, capture=fontforge.hasUserInterface())
     if fontforge.hasUserInterface():
         stderr.write(result.stderr)
-    _fixTtf(font, ttFile)
-    if utils.checkExtensionTtfOrWoff2(filename) == 'woff2':
-        result = run(
-            ['woff2_compress', ttFile],
-            check=True, text=True, capture_output=fontforge.hasUserInterface())
-        if fontforge.hasUserInterface():
-            stderr.write(result.stderr)
-        move(ttFile[:-4] + '.woff2', filename)
-    else:
-        move(ttFile, filename)
+    woff2Jobs = []
+    for vfName, targets in outputs.items():
+        ttFile = str(Path(vfDir, vfName)) + '.ttf'
+        with timing.span('fixTtf', vf=vfName):
+            _fixTtf(font, ttFile, profile)
+        with timing.span('writeTargets', vf=vfName):
+            woff2Jobs += _writeTargets(ttFile, targets)
+    woff2.compressAll(woff2Jobs, **woff2Options)
+
+
+def _ufo2ftOptions(options: list) -> dict:
+    """Translates fontmake options into keyword arguments of ufo2ft"""
+    from ufo2ft.filters import loadFilterFromString
+
+    kwargs = {}
+    filters = []
+    args = iter(options)
+    for opt in args:
+        if opt == '-f':
+            kwargs['flattenComponents'] = True
+        elif opt == '--filter':
+            filters.append(loadFilterFromString(next(args)))
+        elif opt == '--no-production-names':
+            kwargs['useProductionNames'] = False
+        elif opt == '--no-optimize-gvar':
+            kwargs['optimizeGvar'] = False
+        else:
+            raise ValueError("option '" + str(opt) + "' is not supported in memory")
+    if filters:
+        kwargs['filters'] = filters
+    return kwargs
 
 
-def _exportVF(
+def _inMemoryDesignSpace(
     font: fontforge.font,
-    tmpdir,
-    filename: str | PathLike,
-    italicFilename: str | PathLike | None = None,
+    variableFonts: dict[str, int | None],
+    aalt: bool = False,
+    glyphNames: set[str] | None = None
+) -> DesignSpaceDocument:
+    """Designspace document with in-memory UFOs of the masters"""
+    from . import ufo_writer
+
+    ufos = []
+    for f in _getSourceFonts(font):
+        changed = f.changed
+        with timing.span('ufoFont', master=f.fontname):
+            ufos.append(ufo_writer.ufoFont(f, _ufoFeatures(f, aalt, glyphNames), glyphNames))
+        f.changed = changed
+    return _designSpaceDocument(font, variableFonts, ufos)
+
+
+def _doExportVFInMemory(
+    font: fontforge.font,
+    outputs: dict[str, list[str | PathLike]],
+    doc: DesignSpaceDocument,
     options: list = [],
-    need2files: bool = False
+    woff2Options: dict = {},
+    profile: str = 'release',
+    workers: int | None = 1,
+    glyphCache: DirectoryCache | None = None,
+    featureCache: DirectoryCache | None = None
 ):
-    from subprocess import CalledProcessError
+    import io
+    import ufo2ft
+    from . import variations, woff2
+
+    with timing.span('compileVariableTTFs'), variations.compiling(workers, glyphCache), \
+            features.compiling(featureCache):
+        vfs = ufo2ft.compileVariableTTFs(doc, **_ufo2ftOptions(options))
+    for source in doc.sources:
+        source.font = None  # releases the UFOs of the masters for the later stages
+    woff2Jobs = []
+    for vfName, targets in outputs.items():
+        ttf = vfs[vfName]
+        with timing.span('fixTtf', vf=vfName):
+            _fixTtfNames(font, ttf, profile)
+            data = io.BytesIO()
+            ttf.save(data)  # compiled once for all targets
+        with timing.span('writeTargets', vf=vfName):
+            woff2Jobs += _writeTargets(data.getvalue(), targets)
+    woff2.compressAll(woff2Jobs, **woff2Options)
+
+
+def _structureKey(doc: DesignSpaceDocument, structureDigests: list[str], *options) -> str:
+    """Hash of what a variable font is built from, except the VF metadata
+
+    ``doc`` is the designspace document with ``structureDigests`` (see
+    ``digest.fontDigests``) standing in for the masters. Only the parts
+    of it which glyphs and variations depend on are hashed: axis ranges
+    and maps, locations of the masters and subsets of the variable
+    fonts, but not the names, labels and ordering of axes nor instances.
+    Builds with the same key differ only in 'name', 'fvar' and 'STAT'.
+    """
+    tags = {a.name: a.tag for a in doc.axes}
+    axes = [
+        (a.tag, getattr(a, 'minimum', None), a.default, getattr(a, 'maximum', None), a.map,
+         getattr(a, 'values', None), a.hidden)
+        for a in doc.axes
+    ]
+    sources = [(s.font, {tags.get(k, k): v for k, v in s.location.items()}) for s in doc.sources]
+    variableFonts = [
+        (vf.name, [(tags.get(s.name, s.name), getattr(s, 'userValue', None)) for s in vf.axisSubsets])
+        for vf in doc.getVariableFonts()
+    ]
+    return digest.buildDigest(structureDigests, repr((axes, sources, variableFonts)), *options)
+
 
+def _fileStamp(path: str | PathLike) -> tuple[int, int] | None:
     try:
-        _doExportVF(font, tmpdir, filename, tmpdir + '/vf.designspace', options)
-        if need2files and italicFilename:
-            _doExportVF(font, tmpdir, italicFilename, tmpdir + '/vf2.designspace', options)
-    except CalledProcessError as e:
-        if fontforge.hasUserInterface():
-            cmd = e.cmd
-            if isinstance(cmd, str):
-                cmd = e.cmd.split(' ')
-            fontforge.logWarning(e.stderr)
-            fontforge.postError(
-                tr.get("Failed to export"),
-                tr.get("'{0}' failed with return code {1}").format(cmd[0], e.returncode)
-            )
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _recordBuild(font: fontforge.font, structureKey: str, outputs: dict[str, list[str | PathLike]]):
+    """Remembers the written variable fonts for ``_previousBinaries``"""
+    if not isinstance(font.temporary, dict):
+        font.temporary = dict()
+    font.temporary['VF.lastBuild'] = (structureKey, {
+        vfName: [(str(target), _fileStamp(target)) for target in targets]
+        for vfName, targets in outputs.items()
+    })
+
+
+def _previousBinaries(
+    font: fontforge.font,
+    structureKey: str,
+    outputs: dict[str, list[str | PathLike]]
+) -> dict[str, str] | None:
+    """Variable fonts written by the last build of this session with the \
+    same structure key, if none of them has been modified since"""
+    last = font.temporary.get('VF.lastBuild') if isinstance(font.temporary, dict) else None
+    if last is None or last[0] != structureKey:
+        return None
+    binaries = {}
+    for vfName in outputs:
+        paths = [path for path, stamp in last[1].get(vfName, []) if stamp is not None and _fileStamp(path) == stamp]
+        if not paths:
+            return None
+        # TTF is the fastest to read
+        binaries[vfName] = next((p for p in paths if utils.checkExtension(p) == 'ttf'), paths[0])
+    return binaries
+
+
+def _rebuildVariationTables(ttf: ttLib.TTFont, doc: DesignSpaceDocument, vfName: str) -> bool:
+    """Builds 'fvar' and 'STAT' of a variable font again from ``doc``
+
+    Tables and names are made as ``varLib.build_many`` does, and names
+    used only by the old tables are removed. This takes functions which
+    are private to ``varLib``; returns ``False`` if they are missing or
+    have changed in the installed fontTools, and the variable font must
+    then be built from the masters.
+    """
+    from fontTools.designspaceLib.split import splitInterpolable, splitVariableFonts
+    from fontTools.varLib.stat import buildVFStatTable
+
+    vfDoc = next(
+        subDoc for _location, interpolable in splitInterpolable(doc)
+        for name, subDoc in splitVariableFonts(interpolable) if name == vfName
+    )
+    for tag in ('fvar', 'STAT'):
+        if tag in ttf:
+            del ttf[tag]
+    ttf['name'].removeUnusedNames(ttf)
+    try:
+        from fontTools.varLib import _add_fvar, _add_stat, load_designspace
+        ds = load_designspace(vfDoc)
+        _add_fvar(ttf, ds.axes, ds.instances)
+        _add_stat(ttf)
+    except (ImportError, TypeError, AttributeError):
+        return False
+    if doc.formatTuple >= (5, 0) and (
+        any(a.axisLabels or a.axisOrdering is not None for a in doc.axes) or doc.locationLabels
+    ):
+        buildVFStatTable(ttf, doc, vfName)
+    return True
+
+
+def _rebuildMetadata(
+    font: fontforge.font,
+    doc: DesignSpaceDocument,
+    outputs: dict[str, list[str | PathLike]],
+    binaries: dict[str, str],
+    woff2Options: dict = {}
+) -> bool:
+    """Writes the previous variable fonts with 'name', 'fvar' and 'STAT' \
+    built again for the current VF metadata
+
+    Returns ``False``, having written nothing, if the installed fontTools
+    cannot rebuild the tables (see ``_rebuildVariationTables``).
+    """
+    import io
+    from . import woff2
+
+    rebuilt = {}
+    for vfName in outputs:
+        with open(binaries[vfName], 'rb') as f:
+            source = f.read()  # a target may be the source
+        # As in _fixTtf, other tables are copied byte-for-byte
+        with ttLib.TTFont(io.BytesIO(source), lazy=True) as ttf, \
+                ttLib.TTFont(io.BytesIO(source), lazy=True, recalcBBoxes=False, recalcTimestamp=False) as fixedTtf:
+            if not _rebuildVariationTables(ttf, doc, vfName):
+                return False
+            _fixTtfVariationNames(font, ttf)
+            for tag in ('name', 'fvar', 'STAT'):
+                fixedTtf[tag] = ttf[tag]
+            fixedTtf.flavor = None
+            data = io.BytesIO()
+            fixedTtf.save(data, reorderTables=False)
+        rebuilt[vfName] = data.getvalue()
+    woff2Jobs = []
+    for vfName, targets in outputs.items():
+        with timing.span('writeTargets', vf=vfName):
+            woff2Jobs += _writeTargets(rebuilt[vfName], targets)
+    woff2.compressAll(woff2Jobs, **woff2Options)
+    return True
+
+
+def _binaryKeys(
+    font: fontforge.font,
+    variableFonts: dict[str, int | None],
+    outputs: dict[str, list[str | PathLike]],
+    masterDigests: list[str],
+    *options
+) -> dict[tuple[str, str], str]:
+    """Cache keys of outputs by variable font name and file type"""
+    # Digests of the masters stand in for their UFOs
+    doc = _designSpaceDocument(font, variableFonts, masterDigests)
+    designSpace = doc.tostring()
+    keys = {}
+    for vfName, targets in outputs.items():
+        for fileType in {utils.checkExtension(target) for target in targets}:
+            keys[(vfName, fileType)] = digest.buildDigest(
+                masterDigests, designSpace, vfName, fileType, *options)
+    return keys
+
+
+def _fetchBinaries(
+    cache: DirectoryCache,
+    keys: dict[tuple[str, str], str],
+    outputs: dict[str, list[str | PathLike]]
+) -> bool:
+    for vfName, targets in outputs.items():
+        for target in targets:
+            fileType = utils.checkExtension(target)
+            if not cache.fetch(keys[(vfName, fileType)], '.' + fileType, target):
+                return False
+    return True
+
+
+def _storeBinaries(
+    cache: DirectoryCache,
+    keys: dict[tuple[str, str], str],
+    outputs: dict[str, list[str | PathLike]]
+):
+    for vfName, targets in outputs.items():
+        for target in targets:
+            fileType = utils.checkExtension(target)
+            cache.store(keys[(vfName, fileType)], '.' + fileType, target)
+    cache.evict(set(keys.values()))
+
+
+class _FontSnapshot:
+    """Metadata of a font to build names with off the UI thread"""
+
+    def __init__(self, font: fontforge.font):
+        import copy
+
+        self.fontname = font.fontname
+        self.familyname = font.familyname
+        self.sfnt_names = tuple(font.sfnt_names)
+        self.persistent = copy.deepcopy(font.persistent)
+
+
+def _exportFailed(e: BaseException, anyError: bool = False) -> bool:
+    """Shows an error of the build in the UI; ``False`` if not shown
+
+    'fontmake' failing is shown, and so is any other exception if
+    ``anyError`` (e.g. from 'ufo2ft' in memory).
+    """
+    import traceback
+    from subprocess import CalledProcessError
+
+    if not fontforge.hasUserInterface() or isinstance(e, Cancelled):
+        return False
+    if isinstance(e, CalledProcessError):
+        cmd = e.cmd
+        if isinstance(cmd, str):
+            cmd = e.cmd.split(' ')
+        fontforge.logWarning(e.stderr)
+        fontforge.postError(
+            tr.get("Failed to export"),
+            tr.get("'{0}' failed with return code {1}").format(cmd[0], e.returncode)
+        )
+        return True
+    elif anyError and isinstance(e, Exception):
+        fontforge.logWarning(''.join(traceback.format_exception(e)))
+        fontforge.postError(tr.get("Failed to export"), str(e))
+        return True
+    return False
+
+
+def _exportFinished():
+    if fontforge.hasUserInterface():
+        fontforge.postNotice(
+            tr.get("Finished"),
+            tr.get("Finished to output variable fonts"),
+        )
+
+
+def _staticInstance(vfPath: str, index: int, outputDir: str) -> str:
+    from fontTools.varLib import instancer
+    from .load import _loadInstanceNames
+
+    with ttLib.TTFont(vfPath) as varfont:
+        instance = varfont['fvar'].instances[index]
+        partial = instancer.instantiateVariableFont(varfont, instance.coordinates, static=True)
+        _loadInstanceNames(varfont, partial, instance.postscriptNameID, instance.subfamilyNameID)
+        if instance.postscriptNameID != 0xFFFF:
+            stem = str(partial['name'].getDebugName(6))
         else:
-            raise
+            stem = str(partial['name'].getDebugName(4)).replace(' ', '-')
+        path = os.path.join(outputDir, stem + '.ttf')
+        with utils._atomicOutput(path) as tmpFile:
+            partial.save(tmpFile)
+    return path
+
+
+def _staticInstanceTimed(vfPath: str, index: int, outputDir: str) -> str:
+    with timing.span('staticInstance', vf=os.path.basename(vfPath), index=index):
+        return _staticInstance(vfPath, index, outputDir)
+
+
+def _makeStaticInstances(
+    outputs: dict[str, list[str | PathLike]],
+    outputDir: str | PathLike,
+    workers: int | None = 1
+) -> list[str]:
+    """Makes static TTFs of all named instances of written variable fonts"""
+    os.makedirs(outputDir, exist_ok=True)
+    jobs = []
+    for vfName, targets in outputs.items():
+        if not targets:  # not written
+            continue
+        # fontTools reads WOFF and WOFF2 as well, but TTF is faster to load
+        source = str(next((t for t in targets if utils.checkExtension(t) == 'ttf'), targets[0]))
+        with ttLib.TTFont(source, lazy=True) as ttf:
+            count = len(ttf['fvar'].instances) if 'fvar' in ttf else 0
+        jobs += [(source, i, str(outputDir)) for i in range(count)]
+
+    executor = None
+    if (workers is None or workers > 1) and len(jobs) > 1:
+        executor = utils._forkExecutor(min(workers or len(jobs), len(jobs)))
+    if executor is None:
+        return [_staticInstanceTimed(*job) for job in jobs]
+    with executor, watch(executor):
+        futures = [executor.submit(timing.inWorker, timing.parentId(), _staticInstanceTimed, *job) for job in jobs]
+        return [timing.workerResult(future) for future in futures]
+
+
+def _matchingGlyphs(fonts: list[fontforge.font], subset: Iterable[str | int]) -> set[str]:
+    wanted = set()
+    codepoints = set()
+    for item in subset:
+        if isinstance(item, int):
+            codepoints.add(item)
+        else:
+            wanted.add(str(item))
+    return {
+        glyph.glyphname for f in fonts for glyph in f.glyphs()
+        if glyph.glyphname in wanted or glyph.unicode in codepoints or
+        any(alt[0] in codepoints for alt in glyph.altuni or ())
+    }
+
+
+def _glyphSubset(fonts: list[fontforge.font], subset: Iterable[str | int]) -> set[str]:
+    """Names of glyphs in ``subset`` and glyphs referenced by them"""
+    names = _matchingGlyphs(fonts, subset)
+    if not names:
+        raise ValueError('no glyph matches the subset')
+    names.add('.notdef')
+    queue = list(names)
+    while queue:
+        name = queue.pop()
+        for f in fonts:
+            if name not in f:
+                continue
+            for ref in f[name].references:
+                if ref[0] not in names:
+                    names.add(ref[0])
+                    queue.append(ref[0])
+    return names
+
+
+def _defaultMaster(font: fontforge.font, masters: list[fontforge.font]) -> fontforge.font:
+    """Master at the default location of ``font`` except for 'ital'"""
+    tags = []
+    for k in designAxes:
+        if utils.getVFValue(font, 'axes.' + k + '.active', False):
+            tag = str(utils.getVFValue(font, 'axes.' + k + '.tag', '????')) if k.startswith('custom') else k
+            if tag != 'ital':
+                tags.append(tag)
+    for f in masters:
+        if all(getAxisValue(f, tag) == getAxisValue(font, tag) for tag in tags):
+            return f
+    return masters[0]
+
+
+def _checkCompatibility(font: fontforge.font, glyphNames: set[str] | None = None) -> bool:
+    """Checks masters (or ``glyphNames`` in them) before building; ``False`` if the error is shown"""
+    if _hasBothRomanAndItalic(font):
+        groups = [_getSourceFonts(font, False), _getSourceFonts(font, True)]
     else:
-        if fontforge.hasUserInterface():
-            fontforge.postNotice(
-                tr.get("Finished"),
-                tr.get("Finished to output variable fonts"),
-            )
+        groups = [_getSourceFonts(font)]
+    errors = []
+    for masters in groups:
+        if masters:
+            default = _defaultMaster(font, masters)
+            with timing.span('checkCompatibility', default=default.fontname):
+                groupErrors, warnings = compatibility.checkCompatibility(default, masters, glyphNames)
+            errors += groupErrors
+            for warning in warnings:
+                fontforge.logWarning(warning)
+    if not errors:
+        return True
+    if fontforge.hasUserInterface():
+        fontforge.logWarning('\n'.join(errors))
+        fontforge.postError(
+            tr.get("Failed to export"),
+            tr.get("Masters are not compatible. See the warnings for details.")
+        )
+        return False
+    raise ValueError('masters are not compatible:\n' + '\n'.join(errors))
+
+
+def _recordBuildTime(font: fontforge.font, profile: str, elapsed: float) -> tuple[float, float | None]:
+    """Keeps the time of a build in ``font.temporary``
+
+    Returns it with the time a development build saved against the last
+    release build of the font, ``None`` for a release build or without
+    one. Both are also kept as ``'VF.lastBuildTime'`` and
+    ``'VF.lastBuildSaving'``, and logged at info level.
+    """
+    import logging
+
+    if not isinstance(font.temporary, dict):
+        font.temporary = dict()
+    saved = None
+    if profile == 'release':
+        font.temporary['VF.releaseBuildTime'] = elapsed
+    elif (releaseTime := font.temporary.get('VF.releaseBuildTime')) is not None:
+        saved = releaseTime - elapsed
+    font.temporary['VF.lastBuildTime'] = elapsed
+    font.temporary['VF.lastBuildSaving'] = saved
+    log = logging.getLogger(__name__)
+    if saved is not None:
+        log.info('Development build took %.1fs, saving %.1fs against the last release build (%.1fs)',
+                 elapsed, saved, releaseTime)
+    elif profile != 'release':
+        log.info('Development build took %.1fs (no release build to compare with)', elapsed)
+    return elapsed, saved
+
+
+def _workspaceName(font: fontforge.font) -> str:
+    import re
+
+    return re.sub(r'[^0-9A-Za-z._-]', '_', str(font.familyname))
+
+
+def _targets(filename) -> list[str | PathLike]:
+    if filename is None:
+        return []
+    targets = list(filename) if isinstance(filename, (list, tuple)) else [filename]
+    if not targets:
+        raise ValueError('empty list of output files')
+    for target in targets:
+        utils.checkExtension(target)
+    return targets
+
+
+def _checkExportOptions(
+    ufoWriter: str,
+    backend: str,
+    ufoCache: str | PathLike | None,
+    ufoDir: str | PathLike | None,
+    profile: str,
+    memoryBudget: int | None
+):
+    if ufoWriter not in ('fontforge', 'native'):
+        raise ValueError("unknown UFO writer '" + str(ufoWriter) + "'")
+    checkBackend(backend)
+    if ufoCache is not None and ufoDir is not None:
+        raise ValueError("'ufoCache' and 'ufoDir' cannot be used together")
+    if profile not in profiles:
+        raise ValueError("unknown profile '" + str(profile) + "'")
+    if memoryBudget is not None and not memory.isAvailable():
+        raise ValueError("'memoryBudget' is not available on this platform")
+
+
+def _woff2Options(quality: int | None, transformGlyf: bool, profile: str) -> dict:
+    if quality is None:
+        quality = 11 if profile == 'release' else 4
+    if not 0 <= quality <= 11:
+        raise ValueError('Brotli quality must be between 0 and 11')
+    return {'quality': quality, 'transformGlyf': transformGlyf}
+
+
+def _exportOutputs(
+    font: fontforge.font,
+    filename: str | PathLike | list[str | PathLike],
+    italicFilename: str | PathLike | list[str | PathLike] | None
+) -> tuple[dict[str, int | None], dict[str, list[str | PathLike]]]:
+    """Returns the variable fonts to build with their ``ital`` values, and their files"""
+    targets = _targets(filename)
+    if not _hasBothRomanAndItalic(font):
+        return {'vf': None}, {'vf': targets}
+    # Roman and italic share one designspace and one build
+    variableFonts: dict[str, int | None] = {'roman': 0}
+    outputs = {'roman': targets}
+    if italicTargets := _targets(italicFilename):
+        variableFonts['italic'] = 1
+        outputs['italic'] = italicTargets
+    return variableFonts, outputs
+
+
+def _fontmakeOptions(decomposeNestedRefs: bool, decomposeTransformedRefs: bool, profile: str) -> list[str]:
+    options = []
+    if decomposeNestedRefs:
+        options.append('-f')
+    if decomposeTransformedRefs:
+        options.append('--filter')
+        options.append('DecomposeTransformedComponentsFilter')
+    if profile == 'dev':
+        options += ['--no-production-names', '--no-optimize-gvar']
+    return options
+
+
+def _directoryCache(path: str | PathLike | None, maxSize: int) -> DirectoryCache | None:
+    return DirectoryCache(path, maxSize) if path is not None else None
+
+
+class _Export:
+    """Settings of one call of ``exportVariableFont`` and its stages
+
+    Stages are tried in order: binaries from ``binaryCache``, rebuilding
+    only metadata of the last build, and a full build from the masters.
+    """
+
+    def __init__(self, font: fontforge.font, startTime: float, **settings):
+        self.font = font
+        self.startTime = startTime
+        self.variableFonts, self.outputs = _exportOutputs(
+            font, settings['filename'], settings['italicFilename'])
+        self.options = _fontmakeOptions(
+            settings['decomposeNestedRefs'], settings['decomposeTransformedRefs'], settings['profile'])
+        self.woff2Options = _woff2Options(
+            settings['woff2Quality'], settings['woff2TransformGlyf'], settings['profile'])
+        self.addAalt = settings['addAalt']
+        self.workers = settings['workers']
+        self.ufoCache = _directoryCache(settings['ufoCache'], settings['ufoCacheSize'])
+        self.ufoWriter = settings['ufoWriter']
+        self.ufoDir = settings['ufoDir']
+        self.backend = settings['backend']
+        self.inMemory = settings['inMemory']
+        self.binCache = _directoryCache(settings['binaryCache'], settings['binaryCacheSize'])
+        self.gvarCache = _directoryCache(settings['glyphCache'], settings['glyphCacheSize'])
+        self.feaCache = _directoryCache(settings['featureCache'], settings['featureCacheSize'])
+        self.staticInstances = settings['staticInstances']
+        self.profile = settings['profile']
+        self.checkCompatibility = settings['checkCompatibility']
+        self.workspace = settings['workspace']
+        self.metadataFastPath = settings['metadataFastPath']
+        self.memoryBudget = settings['memoryBudget']
+        self.perWorker = 0
+        if self.memoryBudget is not None:
+            # A worker is taken to use as much as a master does in this process
+            self.perWorker = memory.usage() // max(1, len(_getSourceFonts(font)))
+        self.glyphNames = None
+        if settings['glyphSubset'] is not None:
+            self.glyphNames = _glyphSubset(_getSourceFonts(font), settings['glyphSubset'])
+            self.ufoWriter = 'native'  # font.generate cannot leave glyphs out
+        self.masterDigests: list[str] | None = None
+        self.binKeys: dict | None = None
+        self.structureDoc: DesignSpaceDocument | None = None
+        self.structureKey: str | None = None
+        self.previous = None
+        self.inBackground = False
+
+    def boundedWorkers(self) -> int | None:
+        """``workers``, lowered to fit in what is left of ``memoryBudget``"""
+        if self.memoryBudget is None:
+            return self.workers
+        return memory.boundedWorkers(self.workers, self.memoryBudget, self.perWorker)
+
+    def run(self, job: ExportJob, trace: timing.Trace, traceFile: str | PathLike | None):
+        if self.fetch():
+            self.recordBuild()
+            _exportFinished()
+            self.makeStaticInstances()
+        elif self.previous is not None and self.rebuildMetadata():
+            self.recordBuild()
+            self.finish()
+            _exportFinished()
+        elif not self.checkCompatibility or _checkCompatibility(self.font, self.glyphNames):
+            self.buildFromMasters(job, trace, traceFile)
+
+    def rebuildMetadata(self) -> bool:
+        """Rebuilds the metadata of the last build; ``False`` if it must be built from the masters"""
+        # Runs here even for a background job, as it takes no longer than fetching
+        with timing.span('rebuildMetadata'):
+            return _rebuildMetadata(self.font, self.structureDoc, self.outputs, self.previous, self.woff2Options)
+
+    def fetch(self) -> bool:
+        """Digests the masters; ``True`` if all binaries were fetched from the cache
+
+        Also finds binaries of the last build to rebuild only metadata of.
+        """
+        if self.binCache is None and not self.metadataFastPath:
+            return False
+        with timing.span('digests'):
+            digests = [
+                digest.fontDigests(f, self.addAalt, self.ufoWriter, glyphNames=self.glyphNames)
+                for f in _getSourceFonts(self.font)
+            ]
+            self.masterDigests = [full for full, structure in digests]
+        if self.metadataFastPath:
+            structureDigests = [structure for full, structure in digests]
+            self.structureDoc = _designSpaceDocument(self.font, self.variableFonts, structureDigests)
+            self.structureKey = _structureKey(
+                self.structureDoc, structureDigests, self.options, self.inMemory, self.profile)
+            self.previous = _previousBinaries(self.font, self.structureKey, self.outputs)
+        if self.binCache is None:
+            return False
+        with timing.span('binaryCache.fetch'):
+            self.binKeys = _binaryKeys(
+                self.font, self.variableFonts, self.outputs, self.masterDigests,
+                self.options, self.inMemory, self.woff2Options, self.profile)
+            return _fetchBinaries(self.binCache, self.binKeys, self.outputs)
+
+    def buildFromMasters(self, job: ExportJob, trace: timing.Trace, traceFile: str | PathLike | None):
+        tmp = None if self.inMemory else Workspace(self.workspace, 'export-' + _workspaceName(self.font))
+        tmpdir = tmp.name if tmp is not None else None
+        try:
+            doc = self.writeSources(tmpdir)
+            if job.background:
+                self.inBackground = True
+                _startBuild(
+                    job, trace, self.build, self.font, tmp, doc, self.profile, self.startTime, traceFile,
+                    self.outputs, self.structureKey)
+            else:
+                self.buildNow(job, tmpdir, doc)
+        finally:
+            if tmp is not None and not self.inBackground:
+                tmp.cleanup()
+
+    def writeSources(self, tmpdir: str | None) -> DesignSpaceDocument | None:
+        """Writes UFOs and the designspace into ``tmpdir``, or returns the designspace in memory"""
+        if self.inMemory:
+            return _inMemoryDesignSpace(self.font, self.variableFonts, self.addAalt, self.glyphNames)
+        if self.ufoDir is not None:
+            os.makedirs(self.ufoDir, exist_ok=True)
+        workers = self.boundedWorkers()
+        threads = workers if self.memoryBudget is not None else None
+        with timing.span('outputUfos', workers=workers):
+            _outputUfos(
+                _getSourceFonts(self.font), tmpdir, self.addAalt, workers, self.ufoCache, self.ufoWriter,
+                self.ufoDir, self.masterDigests, self.glyphNames, threads)
+        with timing.span('makeDesignSpace'):
+            _makeDesignSpace(self.font, tmpdir, 'vf.designspace', self.variableFonts)
+        return None
+
+    def buildNow(self, job: ExportJob, tmpdir: str | None, doc: DesignSpaceDocument | None):
+        try:
+            self.build(self.font, tmpdir, doc)
+        except Exception as e:
+            job.checkCancelled()  # a tool failing as killed
+            if not _exportFailed(e, self.inMemory):
+                raise
+        else:
+            self.recordBuild()
+            _recordBuildTime(self.font, self.profile, time.perf_counter() - self.startTime)
+            _exportFinished()
+
+    def build(self, font: fontforge.font | _FontSnapshot, tmpdir: str | None, doc: DesignSpaceDocument | None):
+        # Stages after reading the masters, which use only metadata of font
+        workers = self.boundedWorkers()
+        if doc is not None:
+            _doExportVFInMemory(
+                font, self.outputs, doc, self.options, self.woff2Options, self.profile, workers,
+                self.gvarCache, self.feaCache)
+        else:
+            _doExportVF(
+                font, tmpdir, self.outputs, tmpdir + '/vf.designspace', self.options, self.backend,
+                self.woff2Options, self.profile, workers, self.gvarCache, self.feaCache)
+        self.finish()
+
+    def finish(self):
+        # Stages after the variable fonts are written
+        if self.binCache is not None:
+            with timing.span('binaryCache.store'):
+                _storeBinaries(self.binCache, self.binKeys, self.outputs)
+        self.makeStaticInstances()
+
+    def makeStaticInstances(self):
+        if self.staticInstances is not None:
+            with timing.span('staticInstances'):
+                _makeStaticInstances(self.outputs, self.staticInstances, self.boundedWorkers())
+
+    def recordBuild(self):
+        if self.structureKey is not None:
+            _recordBuild(self.font, self.structureKey, self.outputs)
 
 
 def exportVariableFont(
     font: fontforge.font,
-    filename: str | PathLike,
-    italicFilename: str | PathLike | None = None,
+    filename: str | PathLike | list[str | PathLike],
+    italicFilename: str | PathLike | list[str | PathLike] | None = None,
     *,
     decomposeNestedRefs: bool = False,
     decomposeTransformedRefs: bool = False,
-    addAalt: bool = False
-):
+    addAalt: bool = False,
+    workers: int | None = 1,
+    ufoCache: str | PathLike | None = None,
+    ufoCacheSize: int = 4 * 1024 ** 3,
+    ufoWriter: str = 'fontforge',
+    ufoDir: str | PathLike | None = None,
+    backend: str = 'subprocess',
+    inMemory: bool = False,
+    woff2Quality: int | None = None,
+    woff2TransformGlyf: bool = True,
+    binaryCache: str | PathLike | None = None,
+    binaryCacheSize: int = 1024 ** 3,
+    glyphCache: str | PathLike | None = None,
+    glyphCacheSize: int = 1024 ** 3,
+    featureCache: str | PathLike | None = None,
+    featureCacheSize: int = 1024 ** 3,
+    staticInstances: str | PathLike | None = None,
+    glyphSubset: Iterable[str | int] | None = None,
+    profile: str = 'release',
+    checkCompatibility: bool = True,
+    traceFile: str | PathLike | None = None,
+    job: ExportJob | None = None,
+    memoryBudget: int | None = None,
+    workspace: str | PathLike | None = None,
+    metadataFastPath: bool = False
+) -> dict | None:
     """Exports variable font
 
     Before this function being called, make sure all masters are open and
@@ -483,10 +1396,11 @@ def exportVariableFont(
 
     :param font: Main font which font-family-wide parameters are set. \
     Fontforge font object.
-    :param filename: Output file name. Must end with '.ttf' or '.woff2'.
-    :param italicFilename: Secondary output file name for italic. Must \
-    end with '.ttf' or '.woff2'. Required if the font family has both \
-    roman and italic styles
+    :param filename: Output file name. Must end with '.ttf', '.woff2' or \
+    '.woff'. A list of them writes every file from one build.
+    :param italicFilename: Secondary output file name(s) for italic, as \
+    ``filename``. Required if the font family has both roman and italic \
+    styles
     :param decomposeNestedRefs: Optional. Nested references are known to \
     cause problems in certain environments; if ``True``, resulting font \
     will decompose such references. Defaults to ``False``.
@@ -494,36 +1408,266 @@ def exportVariableFont(
     be decomposed before ttfautohint can be applied; if ``True``, resulting \
     font will decompose such references. Defaults to ``False``.
     :param addAalt: Adds 'aalt' feature. Defaults to ``False``.
+    :param workers: Optional. Number of worker processes to convert \
+    masters into UFO and to make static instances in parallel. With \
+    ``inMemory`` or ``'inprocess'`` backend, they also compute glyph \
+    variations ('gvar') of large glyph sets in shards, merged into the \
+    same bytes as a serial build. Workers are forked so that they share \
+    the loaded masters; where forking is unavailable, they are processed \
+    one by one. ``None`` means as many as the masters (or the instances, \
+    or the CPUs for glyph variations). Defaults to ``1``.
+    :param ufoCache: Optional. Directory to keep UFOs of masters across \
+    exports. A master whose content (glyphs, font info, lookups, VF \
+    metadata and options) has not changed since a previous export will \
+    reuse a copy of the cached UFO instead of being converted again.
+    :param ufoCacheSize: Optional. Size cap of ``ufoCache`` in bytes. \
+    Least recently used UFOs are removed beyond this size. Defaults to \
+    4 GiB.
+    :param ufoWriter: Optional. ``'fontforge'`` to convert masters with \
+    ``font.generate``, or ``'native'`` to let this plugin write UFOs \
+    from glyph outlines, references and anchors using a thread pool. \
+    Defaults to ``'fontforge'``.
+    :param ufoDir: Optional. Directory to keep UFOs of masters instead \
+    of the temporary directory. With the native writer, only glyphs \
+    changed since the last export are rewritten. Cannot be used together \
+    with ``ufoCache``.
+    :param backend: Optional. ``'subprocess'`` to run 'fontmake' as a \
+    separate process, which keeps FontForge alive even if it crashes, \
+    ``'inprocess'`` to call it in this process, which saves its \
+    startup and import costs, or ``'daemon'`` to send it to a \
+    long-lived worker which keeps the libraries imported between \
+    exports and is restarted if it crashes. Errors are reported as \
+    ``CalledProcessError`` in any case. Defaults to ``'subprocess'``.
+    :param inMemory: Optional. If ``True``, masters are converted into \
+    in-memory UFOs and compiled with 'ufo2ft' directly, and the variable \
+    font is written only once to its final place. No UFO, designspace \
+    or intermediate TTF is written. ``ufoCache``, ``ufoWriter``, \
+    ``ufoDir`` and ``backend`` are ignored, and ``workers`` is used only \
+    for glyph variations and static instances. Defaults to \
+    ``False``.
+    :param woff2Quality: Optional. Brotli quality to compress WOFF2 \
+    from 0 (fastest) to 11 (smallest). Defaults to ``11``, or ``4`` for \
+    ``'dev'`` profile.
+    :param woff2TransformGlyf: Optional. If ``False``, 'glyf' and 'loca' \
+    tables are stored in WOFF2 without the transform, which is faster to \
+    encode but makes the file larger. Defaults to ``True``.
+    :param binaryCache: Optional. Directory to keep finished variable \
+    fonts. If nothing the output depends on (masters, designspace, \
+    options and tool versions) has changed since a previous export, \
+    the cached file is copied instead of building it again. Several \
+    processes may share one directory.
+    :param binaryCacheSize: Optional. Size cap of ``binaryCache`` in \
+    bytes. Defaults to 1 GiB.
+    :param glyphCache: Optional. Directory to keep the glyph variations \
+    ('gvar') of each variable font. With ``inMemory`` or ``'inprocess'`` \
+    backend, only glyphs whose outlines, component offsets or metrics \
+    have changed in any master since the last build are computed again; \
+    the result is the same as a full build.
+    :param glyphCacheSize: Optional. Size cap of ``glyphCache`` in \
+    bytes. Defaults to 1 GiB.
+    :param featureCache: Optional. Directory to keep the OpenType \
+    layout tables ('GSUB', 'GPOS', 'GDEF' and 'BASE') compiled from \
+    the features of each master. With ``inMemory`` or ``'inprocess'`` \
+    backend, a master whose features (including those generated from \
+    kerning and anchors) and glyph order are the same as those of \
+    another master or a previous build reuses the compiled tables.
+    :param featureCacheSize: Optional. Size cap of ``featureCache`` in \
+    bytes. Defaults to 1 GiB.
+    :param glyphSubset: Optional. Glyph names (``str``) and/or code \
+    points (``int``, e.g. ``range(0x4E00, 0x4E80)``) to build a proof \
+    variable font with. Glyphs referenced by them are included as well. \
+    Axes, instances and names are the same as a full build, but the \
+    proof has no OpenType layout: features, kerning and mark positioning \
+    are left out, as their lookups may refer to glyphs not in it. Only \
+    these glyphs are hashed for the caches and checked for \
+    compatibility. Masters are converted with the native UFO writer.
+    :param profile: Optional. ``'release'`` builds with the production \
+    defaults of fontmake. ``'dev'`` skips production glyph names and \
+    IUP optimization of 'gvar', and compresses WOFF2 faster. Its \
+    version string (name ID 5) is marked '(development build)', and the \
+    time saved against the last release build of the font in this \
+    session is kept in ``font.temporary['VF.lastBuildSaving']`` and \
+    logged at info level. Defaults to ``'release'``.
+    :param checkCompatibility: Optional. Compares the glyphs of every \
+    master with those of the default master (of roman or italic) before \
+    converting anything, and fails with a report of all incompatible \
+    glyphs. Defaults to ``True``.
+    :param staticInstances: Optional. Directory to write a static TTF \
+    of every named instance of the variable font(s), named after its \
+    PostScript name. Instances are made from the variable fonts just \
+    written.
+    :param traceFile: Optional. JSON file to write the timings in Chrome \
+    trace event format, which can be viewed as a timeline in \
+    chrome://tracing or Perfetto. Stages in forked workers and the \
+    tools run by ``backend`` are included.
+    :param job: Optional. ``ExportJob`` to follow the progress of the \
+    export, to cancel it, or to run its heavy stages in the background. \
+    A job is used for one export.
+    :param memoryBudget: Optional. Memory in bytes the export may use, \
+    counting FontForge itself, forked workers and the tools run as \
+    subprocesses (but not those in the 'daemon' worker). Stages run by \
+    ``workers`` (and threads of the native UFO writer) use only as many \
+    as fit in what is left of the budget, at least one, taking a worker \
+    to use as much as a master does in FontForge. The memory is also \
+    sampled as the export runs; once over the budget, the export is \
+    cancelled and ``MemoryError`` is raised. The peak is reported as \
+    ``'peakMemory'`` in bytes. Available where ``/proc`` is (Linux).
+    :param workspace: Optional. Directory to make the scratch directory \
+    (UFOs of the masters, designspace and fontmake output) in, e.g. on \
+    a RAM disk such as ``/dev/shm``. Defaults to the environment \
+    variable ``FONTFORGEVF_WORKSPACE`` if set, or a private directory \
+    of the user in the temporary directory of the system. In a workspace given either way, the \
+    scratch directory of each family is kept and reused by the next \
+    export (with the native writer, only changed glyphs are rewritten); \
+    otherwise it is removed in the background after the export.
+    :param metadataFastPath: Optional. If only the VF metadata (axis \
+    names, labels, ordering, instances and their local names) has \
+    changed since the last export of the font in this session, and the \
+    variable fonts it wrote are untouched, their 'name', 'fvar' and \
+    'STAT' tables are built again on them instead of converting the \
+    masters and running 'fontmake'. The stage is reported as \
+    'rebuildMetadata'. Every export with this option hashes the \
+    masters to compare them with the last one. Defaults to ``False``.
+    :return: Timings of the export, as ``{'seconds': total, 'spans': \
+    [...]}``. Each span is ``{'name', 'seconds', 'args', 'children'}`` \
+    for a stage (e.g. 'outputUfo' of each master, 'makeDesignSpace', \
+    'fontmake', 'fixTtf' and 'woff2' of each file), nested by stage. \
+    ``None`` if ``job`` runs in the background; the timings will be in \
+    ``job.report``.
+    :raises ``MemoryError``: the export used more than ``memoryBudget``
     :raises ``ValueError``: ``filename`` or ``italicFilename`` ends with \
-    unexpected extension.
+    unexpected extension or is an empty list, ``ufoWriter`` or \
+    ``backend`` is unknown, both ``ufoCache`` and ``ufoDir`` are given, \
+    ``woff2Quality`` is out of range, no glyph matches ``glyphSubset``, \
+    ``profile`` is unknown, ``memoryBudget`` is not available on this platform, or \
+    masters are not compatible (the message lists the incompatible \
+    glyphs).
+    :raises ``Cancelled``: ``job`` was cancelled
     :raises ``CalledProcessError``: 'fontmake' ended abnormally. For \
     example, it is an error if inconsistent number of points or contours \
-    among masters.
+    among masters. With ``inMemory``, the exception raised by 'ufo2ft' \
+    is propagated instead.
     """
-    utils.checkExtensionTtfOrWoff2(filename)
-    need2files = False
-    if _hasBothRomanAndItalic(font):
-        need2files = True
-        if italicFilename is not None:
-            utils.checkExtensionTtfOrWoff2(italicFilename)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        s = 0
-        for f in _getSourceFonts(font):
-            s += 1
-            _outputUfo(f, tmpdir, 'source' + str(s) + '.ufo', addAalt)
-        if need2files:
-            _makeDesignSpace(font, tmpdir, 'vf.designspace', False)
-            if italicFilename:
-                _makeDesignSpace(font, tmpdir, 'vf2.designspace', True)
+    startTime = time.perf_counter()
+    _checkExportOptions(ufoWriter, backend, ufoCache, ufoDir, profile, memoryBudget)
+    export = _Export(
+        font, startTime, filename=filename, italicFilename=italicFilename,
+        decomposeNestedRefs=decomposeNestedRefs, decomposeTransformedRefs=decomposeTransformedRefs,
+        addAalt=addAalt, workers=workers, ufoCache=ufoCache, ufoCacheSize=ufoCacheSize, ufoWriter=ufoWriter,
+        ufoDir=ufoDir, backend=backend, inMemory=inMemory, woff2Quality=woff2Quality,
+        woff2TransformGlyf=woff2TransformGlyf, binaryCache=binaryCache, binaryCacheSize=binaryCacheSize,
+        glyphCache=glyphCache, glyphCacheSize=glyphCacheSize, featureCache=featureCache,
+        featureCacheSize=featureCacheSize, staticInstances=staticInstances, glyphSubset=glyphSubset,
+        profile=profile, checkCompatibility=checkCompatibility, workspace=workspace,
+        metadataFastPath=metadataFastPath, memoryBudget=memoryBudget)
+    if job is None:
+        job = ExportJob()
+    with timing.trace() as trace, job._running():
+        try:
+            if memoryBudget is not None:
+                job._limitMemory(memoryBudget)
+            with timing.span('exportVariableFont', family=font.familyname, profile=profile):
+                export.run(job, trace, traceFile)
+        except BaseException as e:
+            error = job._error(e)
+            if not export.inBackground:
+                job._finish(error=error)
+            if error is e:
+                raise
+            raise error from e
+        finally:
+            if traceFile is not None and not export.inBackground:
+                trace.writeChromeTrace(traceFile)
+    if export.inBackground:
+        return None
+    job._finish(trace.report())
+    return job.report
+
+
+def _startBuild(
+    job: ExportJob,
+    trace: timing.Trace,
+    build,
+    font: fontforge.font,
+    tmp: Workspace | None,
+    doc: DesignSpaceDocument | None,
+    profile: str,
+    startTime: float,
+    traceFile: str | PathLike | None,
+    outputs: dict[str, list[str | PathLike]],
+    structureKey: str | None
+):
+    """Runs ``build`` in the background, and the result is shown by ``job.poll()``"""
+    snapshot = _FontSnapshot(font)
+    elapsed = None
+
+    def run() -> dict:
+        nonlocal elapsed
+        try:
+            with timing.span('build', family=snapshot.familyname):
+                build(snapshot, tmp.name if tmp is not None else None, doc)
+        except BaseException as e:
+            if (error := job._error(e)) is not e:
+                raise error from e
+            raise
+        finally:
+            if tmp is not None:
+                tmp.cleanup()
+            if traceFile is not None:
+                trace.writeChromeTrace(traceFile)
+        elapsed = time.perf_counter() - startTime
+        return trace.report()
+
+    def onFinished(job: ExportJob):
+        # On the UI thread
+        if job.error is None:
+            if structureKey is not None:
+                _recordBuild(font, structureKey, outputs)
+            _recordBuildTime(font, profile, elapsed)
+            _exportFinished()
+        elif isinstance(job.error, Cancelled):
+            fontforge.logWarning('Export of ' + str(font.familyname) + ' was cancelled')
         else:
-            _makeDesignSpace(font, tmpdir, 'vf.designspace')
-        options = []
-        if decomposeNestedRefs:
-            options.append('-f')
-        if decomposeTransformedRefs:
-            options.append('--filter')
-            options.append('DecomposeTransformedComponentsFilter')
-        _exportVF(font, tmpdir, filename, italicFilename, options, need2files)
+            _exportFailed(job.error, True)
+
+    job._start(run, onFinished)
+
+
+_uiJobs: dict[str, ExportJob] = {}  # running exports by family name
+
+
+def _pollJobs():
+    for family, job in list(_uiJobs.items()):
+        if job.poll():
+            del _uiJobs[family]
+
+
+def _printProgress(event: str, name: str, args: dict):
+    # Called off the UI thread, so only to the terminal
+    import sys
+
+    if event == 'end':
+        sys.stderr.write('fontforgeVF: ' + ' '.join([name] + list(args.values())) + ' done\n')
+
+
+def _startExport(font: fontforge.font, filename: str, italicFilename: str | None = None, **kwargs):
+    """Exports from the UI, with fontmake and later stages in the background
+
+    The result is shown when the plugin is next used (e.g. its menu is
+    opened).
+    """
+    _pollJobs()
+    if font.familyname in _uiJobs:
+        fontforge.logWarning('An export of ' + str(font.familyname) + ' is running; not exported again')
+        return
+    job = ExportJob(progress=_printProgress, background=True)
+    _uiJobs[font.familyname] = job
+    try:
+        exportVariableFont(font, filename, italicFilename, job=job, **kwargs)
+    except BaseException:
+        del _uiJobs[font.familyname]
+        raise
+    _pollJobs()
 
 
 def _exportVariableFont(font: fontforge.font, dialogResult: dict[str, str]):
@@ -541,7 +1685,7 @@ def _exportVariableFont(font: fontforge.font, dialogResult: dict[str, str]):
                 addAalt = True
     if 'file2' in dialogResult:
         secondaryFile = dialogResult['file2']
-    exportVariableFont(
+    _startExport(
         font,
         dialogResult['file'],
         secondaryFile,
@@ -559,14 +1703,14 @@ def _saveMenuDialog(font: fontforge.font) -> dict | None:
                 'default':
                     font.default_base_filename + '.ttf' if font.default_base_filename
                     else '.'.join(font.path.split('.')[:-1]) + '.ttf',
-                'filter': '*.{ttf,woff2}',
+                'filter': '*.{ttf,woff2,woff}',
             },
             {
                 'type': 'savepath', 'question': tr.get('_Italic VF:'), 'tag': 'file2',
                 'default':
                     font.default_base_filename + '-Italic.ttf' if font.default_base_filename
                     else '.'.join(font.path.split('.')[:-1]) + '-Italic.ttf',
-                'filter': '*.{ttf,woff2}',
+                'filter': '*.{ttf,woff2,woff}',
             },
         ]
     else:
@@ -576,7 +1720,7 @@ def _saveMenuDialog(font: fontforge.font) -> dict | None:
                 'default':
                     font.default_base_filename + '.ttf' if font.default_base_filename
                     else '.'.join(font.path.split('.')[:-1]) + '.ttf',
-                'filter': '*.{ttf,woff2}',
+                'filter': '*.{ttf,woff2,woff}',
             },
         ]
     questions += [
@@ -594,9 +1738,19 @@ def _saveMenuDialog(font: fontforge.font) -> dict | None:
 
 
 def saveMenu(u, font: fontforge.font):
-    if result := _saveMenuDialog(font):
+    _pollJobs()
+    if (job := _uiJobs.get(font.familyname)) is not None:
+        ans = fontforge.ask(
+            tr.get("Save variable font"),
+            tr.get("An export of this font family is running.\nDo you want to cancel it?"),
+            [tr.get("_Yes"), tr.get("_No")],  # type: ignore
+        )
+        if ans == 0:
+            job.cancel()
+    elif result := _saveMenuDialog(font):
         _exportVariableFont(font, result)
 
 
 def saveEnable(u, font: fontforge.font):
+    _pollJobs()  # called on the UI thread whenever the menu is shown
     return utils.vfInfoExists(font)
@@ -0,0 +1,328 @@
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TextIO
+import re
+
+import fontforge
+
+from . import timing, utils
+from .cache import DirectoryCache
+
+
+_tokenPattern = re.compile(r'''
+    (?P<comment>\#[^\n]*)
+    | (?P<string>"[^"]*")
+    | (?P<space>\s+)
+    | (?P<word>[^\s#"{};]+)
+    | (?P<symbol>[{};])
+    | (?P<open>")
+''', re.X)
+
+_spoolSize = 16 * 1024 ** 2  # bytes of the feature file kept in memory
+
+_layoutTables = ('GSUB', 'GPOS', 'GDEF', 'BASE')  # built from scratch by feaLib
+# Statements which change other tables from what they were, or read other files
+_uncachedPattern = re.compile(r'\btable\s+(head|hhea|vhea|name|OS/2|STAT)\b|\binclude\s*\(')
+
+_cache: ContextVar[DirectoryCache | None] = ContextVar('featureCache', default=None)
+_serialBuildTables: Callable | None = None
+
+
+def gsubFeatureTags(font: fontforge.font) -> set[str]:
+    """Feature tags of all GSUB lookups of a master, including 'aalt'
+
+    Read once per master, as ``font.getLookupInfo`` is slow for fonts
+    with many lookups.
+    """
+    tags = set()
+    for lookup in font.gsub_lookups:
+        for feature in font.getLookupInfo(lookup)[2]:
+            tags.add(feature[0])
+    return tags
+
+
+def _tokens(text: str) -> Iterator[tuple[str, str]]:
+    """Tokens of ``text``; ``'open'`` for a string not closed in it"""
+    for m in _tokenPattern.finditer(text):
+        if m.lastgroup == 'open':
+            yield 'open', text[m.start():]
+            return
+        yield m.lastgroup, m.group()  # type: ignore
+
+
+class _AaltRewriter:
+    """State of ``fixAalt`` between tokens"""
+
+    def __init__(self, head: TextIO, rest: TextIO):
+        self.out = head  # switched to rest at the first feature block
+        self.rest = rest
+        self.depth = 0
+        self.held: list[tuple[str, str]] = []  # from 'feature' to '{'
+        self.state = 'normal'  # 'aalt' in its block, 'aaltEnd' in '} aalt;', 'aaltSpace' after it
+        self.aaltDepth = 0
+        self.statement: list[tuple[str, str]] = []
+        self.body: list[str] = []
+        self.foundFeature = False
+
+    def canCopy(self, line: str) -> bool:
+        """Whether ``line`` can be copied without tokenizing"""
+        return (
+            self.state == 'normal' and not self.held and self.depth > 0 and
+            '{' not in line and '}' not in line and '"' not in line
+        )
+
+    def feed(self, kind: str, text: str):
+        if self.state == 'aalt':
+            self._feedAalt(kind, text)
+        elif self.state in ('aaltEnd', 'aaltSpace') and kind == 'space':
+            return  # dropped with '} aalt;'
+        elif self.state == 'aaltEnd' and (kind, text) in (('word', 'aalt'), ('symbol', ';')):
+            if text == ';':
+                self.state = 'aaltSpace'
+        elif self.state != 'normal':
+            self.state = 'normal'
+            self.feed(kind, text)
+        elif self.held:
+            self.held.append((kind, text))
+            if kind == 'symbol':
+                self._featureBlock(text)
+        elif self.depth == 0 and kind == 'word' and text == 'feature':
+            self.held = [(kind, text)]
+        else:
+            self.out.write(text)
+            if kind == 'symbol':
+                self.depth += {'{': 1, '}': -1}.get(text, 0)
+
+    def _featureBlock(self, symbol: str):
+        words = [text for kind, text in self.held if kind == 'word']
+        if symbol == '{':
+            if not self.foundFeature:
+                self.foundFeature = True
+                self.out = self.rest
+            if words[1:2] == ['aalt']:
+                self.held = []
+                self.state = 'aalt'
+                self.aaltDepth = 1
+                self.statement = []
+                return
+            self.depth += 1
+        for kind, text in self.held:
+            self.out.write(text)
+        if symbol == '}':
+            self.depth -= 1
+        self.held = []
+
+    def _feedAalt(self, kind: str, text: str):
+        if kind == 'symbol' and text == '}' and self.aaltDepth == 1:
+            self._flushStatement()
+            self.state = 'aaltEnd'
+            return
+        self.statement.append((kind, text))
+        if kind == 'symbol':
+            self.aaltDepth += {'{': 1, '}': -1}.get(text, 0)
+            if text == ';' and self.aaltDepth == 1:
+                words = [t for k, t in self.statement if k == 'word']
+                if words[:1] in (['script'], ['language']):
+                    # Not allowed in 'aalt'; dropped with the line break before it
+                    self.statement = []
+                    return
+            self._flushStatement()
+
+    def _flushStatement(self):
+        self.body += [text for kind, text in self.statement]
+        self.statement = []
+
+    def finish(self):
+        for kind, text in self.held + self.statement:
+            (self.body.append if self.state == 'aalt' else self.out.write)(text)
+        self.held = []
+        self.statement = []
+
+
+def fixAalt(source: TextIO, dest: TextIO, includeTags: Iterable[str] = ()):
+    """Rewrites 'aalt' feature of a feature file in one pass
+
+    FontForge may write 'script' and 'language' statements in 'aalt',
+    which are not allowed there. They are removed, ``feature <tag>;``
+    is added for each of ``includeTags``, and the 'aalt' block is put
+    before the first feature block as required. Comments and strings
+    are not mistaken for statements.
+
+    The text after the first feature block is kept in a temporary file
+    (in memory while small) until the end of ``source``, where the
+    original 'aalt' block may be found. Lines which cannot change the
+    structure are copied without tokenizing.
+
+    :param source: Feature file to read
+    :param dest: Feature file to write
+    :param includeTags: Feature tags to include in 'aalt'
+    """
+    import shutil
+    import tempfile
+
+    with tempfile.SpooledTemporaryFile(_spoolSize, 'w+', encoding='utf-8', newline='') as rest:
+        rewriter = _AaltRewriter(dest, rest)
+        pending = ''
+        for line in source:
+            if pending:
+                line = pending + line
+                pending = ''
+            elif rewriter.canCopy(line):
+                rewriter.out.write(line)
+                continue
+            for kind, text in _tokens(line):
+                if kind == 'open':  # string continued on the next line
+                    pending = text
+                else:
+                    rewriter.feed(kind, text)
+        if pending:
+            rewriter.feed('word', pending)
+        rewriter.finish()
+
+        aaltInclude = ''.join('  feature ' + tag + ';\n' for tag in sorted(set(includeTags) - {'aalt'}))
+        existingAalt = ''.join(rewriter.body).removeprefix('\n').rstrip(' \t')
+        if existingAalt and not existingAalt.endswith('\n'):
+            existingAalt += '\n'
+        if rewriter.foundFeature and (aaltInclude or existingAalt):
+            dest.write('feature aalt {\n' + aaltInclude + existingAalt + '} aalt;\n\n')
+        rest.seek(0)
+        shutil.copyfileobj(rest, dest)
+
+
+def _cacheable(features: str) -> bool:
+    """Whether tables compiled from ``features`` depend only on it and the glyph order"""
+    import os
+    from fontTools.feaLib.builder import LOOKUP_DEBUG_ENV_VAR
+
+    return bool(features) and not os.environ.get(LOOKUP_DEBUG_ENV_VAR) and _uncachedPattern.search(features) is None
+
+
+def _nameRecords(ttFont) -> dict[tuple, object]:
+    if 'name' not in ttFont:
+        return {}
+    return {(n.nameID, n.platformID, n.platEncID, n.langID): n.string for n in ttFont['name'].names}
+
+
+def _featureKey(features: str, ttFont) -> str:
+    """Cache entry of a feature file: its text, the glyph order, the axes \
+    of variable features, and the name IDs taken (from which names of \
+    'featureNames' are numbered)"""
+    import hashlib
+    import sys
+    import fontTools
+
+    userNameIDs = sorted(key for key in _nameRecords(ttFont) if key[0] >= 256)
+    h = hashlib.sha256()
+    h.update(repr((sys.version_info[:2], fontTools.version, ttFont.getGlyphOrder(), userNameIDs)).encode('utf-8'))
+    for tag in ('fvar', 'avar'):
+        h.update(ttFont[tag].compile(ttFont) if tag in ttFont else b'-')
+    h.update(features.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _fetch(cache: DirectoryCache, key: str) -> dict | None:
+    import marshal
+
+    if (data := cache.read(key, '.fea')) is None:
+        return None
+    try:
+        return marshal.loads(data)
+    except (ValueError, EOFError, TypeError):  # broken
+        return None
+
+
+def _store(cache: DirectoryCache, key: str, entry: dict):
+    import marshal
+
+    scratchPath = cache.scratchPath(key, '.fea')
+    with open(scratchPath, 'wb') as f:
+        marshal.dump(entry, f)
+    cache.commit(key, '.fea', scratchPath)
+    cache.evict({key})
+
+
+def _entry(ttFont, namesBefore: dict[tuple, object]) -> dict:
+    """What feaLib has changed in ``ttFont``"""
+    names = [
+        key + (n.toUnicode(),) for n in (ttFont['name'].names if 'name' in ttFont else [])
+        if namesBefore.get(key := (n.nameID, n.platformID, n.platEncID, n.langID)) != n.string
+    ]
+    maxContext = None
+    if 'OS/2' in ttFont and any(tag in ttFont for tag in ('GSUB', 'GPOS')):
+        maxContext = ttFont['OS/2'].usMaxContext
+    return {
+        'tables': {tag: ttFont[tag].compile(ttFont) for tag in _layoutTables if tag in ttFont},
+        'names': names,
+        'maxContext': maxContext,
+    }
+
+
+def _apply(ttFont, entry: dict):
+    from fontTools.ttLib import newTable
+
+    for tag in _layoutTables:
+        if tag in entry['tables']:
+            table = newTable(tag)
+            table.decompile(entry['tables'][tag], ttFont)
+            ttFont[tag] = table
+        elif tag in ttFont:
+            del ttFont[tag]
+    if entry['names']:
+        for nameID, platformID, platEncID, langID, string in entry['names']:
+            ttFont['name'].setName(string, nameID, platformID, platEncID, langID)
+        ttFont['name'].names.sort()
+    if entry['maxContext'] is not None:
+        ttFont['OS/2'].usMaxContext = entry['maxContext']
+
+
+def _buildTables(self):
+    """``FeatureCompiler.buildTables`` reusing tables compiled from the same features"""
+    cache = _cache.get()
+    if cache is None or not _cacheable(self.features):
+        return _serialBuildTables(self)  # type: ignore
+
+    with timing.span('featureCache.fetch'):
+        key = _featureKey(self.features, self.ttFont)
+        if (entry := _fetch(cache, key)) is not None:
+            _apply(self.ttFont, entry)
+    if entry is not None:
+        return
+    namesBefore = _nameRecords(self.ttFont)
+    with timing.span('features'):
+        _serialBuildTables(self)  # type: ignore
+    with timing.span('featureCache.store'):
+        _store(cache, key, _entry(self.ttFont, namesBefore))
+
+
+@contextmanager
+def compiling(cache: DirectoryCache | None = None):
+    """Reuses OpenType layout tables compiled from the same features
+
+    Within the block, the 'GSUB', 'GPOS', 'GDEF' and 'BASE' tables
+    which ufo2ft (in fontmake or called directly in this process)
+    compiles from the feature file of a master, including the features
+    generated from kerning and anchors, are cached by the feature text
+    and the glyph order. A master (of this or a later build) with the
+    same features reuses them instead of compiling them again. So do
+    variable features, which ufo2ft compiles once for a variable font
+    whose masters have the same features, with the same axes.
+
+    Feature files with 'include' statements, or with 'table' blocks of
+    other tables than these, are always compiled. Once the last such
+    block (of any thread) exits, ufo2ft compiles as usual.
+
+    :param cache: Optional. Cache of compiled tables, one entry per \
+    feature file. ``None`` compiles as usual.
+    """
+    global _serialBuildTables
+
+    from ufo2ft.featureCompiler import FeatureCompiler
+
+    with utils._patched(FeatureCompiler, 'buildTables', _buildTables) as original:
+        _serialBuildTables = original
+        token = _cache.set(cache)
+        try:
+            yield
+        finally:
+            _cache.reset(token)
@@ -0,0 +1,202 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+
+from . import timing
+
+
+class Cancelled(Exception):
+    """The export was cancelled by ``ExportJob.cancel()``"""
+
+
+class ExportJob:
+    """Progress and cancellation of an export
+
+    Pass a job to ``exportVariableFont(job=...)``. ``cancel()`` may be
+    called from another thread (or a progress callback): the export
+    stops before its next stage, child processes running the tools or
+    forked workers are killed, temporary files are removed, and
+    ``Cancelled`` is raised.
+
+    With ``background=True``, ``exportVariableFont`` returns as soon as
+    the stages which read FontForge objects (checking and converting
+    the masters) are done, and the rest (fontmake or ufo2ft, WOFF2,
+    static instances) runs in a background thread with a snapshot of
+    the font metadata. The result is then in ``report`` or ``error``
+    after ``wait()``, and ``poll()`` delivers it (notices or errors in
+    the UI) on the thread calling it.
+
+    :param progress: Optional. Called as ``progress(event, stage, args)`` \
+    when a stage starts (``event`` is ``'start'``) and ends (``'end'``), \
+    e.g. ``('end', 'outputUfo', {'master': 'MyFont-Bold'})``. Stages \
+    are those of the timing report of ``exportVariableFont``. It is \
+    called on the thread running the stage, so it must not use \
+    FontForge objects if ``background`` is ``True``.
+    :param background: Optional. Runs the heavy stages in a background \
+    thread. Defaults to ``False``.
+    """
+
+    def __init__(
+        self,
+        progress: Callable[[str, str, dict], None] | None = None,
+        background: bool = False
+    ):
+        self.background = background
+        self.report: dict | None = None
+        self.error: BaseException | None = None
+        self._progress = progress
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._children: set = set()
+        self._onFinished: Callable[['ExportJob'], None] | None = None
+        self._reason: BaseException | None = None  # raised instead of Cancelled
+        self._monitor = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def cancel(self):
+        """Stops the export, killing the child processes it is waiting for"""
+        self._cancelled.set()
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            _kill(child)
+
+    def checkCancelled(self):
+        """:raises ``Cancelled``: the job has been cancelled"""
+        if self.cancelled:
+            raise self._reason or Cancelled('export cancelled')
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits for the export to finish; ``False`` on timeout"""
+        return self._finished.wait(timeout)
+
+    def poll(self) -> bool:
+        """Delivers the result once if the export has finished
+
+        Call this from the thread which started the export (the UI
+        thread in FontForge).
+        """
+        if not self._finished.is_set():
+            return False
+        if (onFinished := self._onFinished) is not None:
+            self._onFinished = None
+            onFinished(self)
+        return True
+
+    def _error(self, e: BaseException) -> BaseException:
+        """``Cancelled`` for an error caused by cancelling, e.g. a killed tool"""
+        if self.cancelled and isinstance(e, Exception) and not isinstance(e, Cancelled):
+            return self._reason or Cancelled('export cancelled')
+        return e
+
+    def _abort(self, error: BaseException):
+        """Cancels the job, which raises ``error`` instead of ``Cancelled``"""
+        self._reason = error
+        self.cancel()
+
+    def _limitMemory(self, budget: int):
+        """Aborts the job with ``MemoryError`` if it uses more than ``budget`` bytes"""
+        from . import memory
+
+        def exceeded(used: int):
+            self._abort(MemoryError(
+                'export used {0} MiB, over the memory budget of {1} MiB'.format(used >> 20, budget >> 20)))
+
+        self._monitor = memory.Monitor(budget, exceeded)
+        self._monitor.start()
+
+    def _observe(self, event: str, name: str, args: dict):
+        if event == 'start':
+            self.checkCancelled()
+        if self._progress is not None:
+            self._progress(event, name, args)
+
+    @contextmanager
+    def _running(self):
+        token = _current.set(self)
+        try:
+            with timing.observe(self._observe):
+                yield
+        finally:
+            _current.reset(token)
+
+    def _finish(self, report: dict | None = None, error: BaseException | None = None):
+        if self._monitor is not None:
+            self._monitor.stop()
+            if report is not None:
+                report['peakMemory'] = self._monitor.peak
+        self.report = report
+        self.error = error
+        self._finished.set()
+
+    def _start(self, func: Callable[[], dict], onFinished: Callable[['ExportJob'], None]):
+        """Runs ``func`` in a thread, with the context of the caller"""
+        import contextvars
+
+        context = contextvars.copy_context()
+        self._onFinished = onFinished
+
+        def run():
+            try:
+                report = context.run(func)
+            except BaseException as e:
+                self._finish(error=e)
+            else:
+                self._finish(report)
+
+        threading.Thread(target=run, name='fontforgeVF export', daemon=True).start()
+
+
+_current: ContextVar[ExportJob | None] = ContextVar('job', default=None)
+
+
+def currentJob() -> ExportJob | None:
+    return _current.get()
+
+
+@contextmanager
+def watch(child):
+    """Kills ``child`` if the current job is cancelled meanwhile
+
+    ``child`` is a ``subprocess.Popen``, a socket connected to the
+    build worker, or a process pool.
+    """
+    job = _current.get()
+    if job is None:
+        yield
+        return
+    with job._lock:
+        job._children.add(child)
+    try:
+        if job.cancelled:  # cancelled before it was added
+            _kill(child)
+        yield
+    finally:
+        with job._lock:
+            job._children.discard(child)
+
+
+def _kill(child):
+    import socket
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        if isinstance(child, socket.socket):
+            # The worker kills the job when the client hangs up
+            child.shutdown(socket.SHUT_RDWR)
+        elif isinstance(child, ProcessPoolExecutor):
+            for process in list((child._processes or {}).values()):
+                process.kill()
+        else:
+            child.kill()
+    except OSError:  # already gone
+        pass
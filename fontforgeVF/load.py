@@ -5,6 +5,8 @@ import fontforge
 from fontforge_plugin_helper import addFontGenerateHook
 from fontTools import ttLib
 
+from . import timing
+from .backend import checkBackend
 from .translation import tr
 from .utils import intOrFloat, checkExtensionTtfOrWoff2, ensureTuple
 
@@ -157,19 +159,20 @@ def _getVFData(ttf: ttLib.TTFont, axisValues: dict[str, int | float]) -> dict:
 def _instantiate(
     inputFilename: str | PathLike,
     axisValues: dict[str, int | float],
-    outputFilename: str | PathLike
+    outputFilename: str | PathLike,
+    backend: str = 'subprocess'
 ) -> ttLib.TTFont:
-    # Separate process because instancer may crash
-    from subprocess import run
+    # Separate process (unless 'inprocess' backend) because instancer may crash
+    from .backend import run
 
     run(
         [
             'fonttools', 'varLib.instancer',
-            '-o', outputFilename,
+            '-o', str(outputFilename),
             '--static',
-            inputFilename,
+            str(inputFilename),
         ] + [str(k) + '=' + str(v) for k, v in axisValues.items()],
-        check=True, text=True)
+        backend)
     return ttLib.TTFont(outputFilename)
 
 
@@ -178,6 +181,7 @@ def _doOpenVariableFont(
     axisValues: dict[str, int | float],
     varfont: ttLib.TTFont,
     tmpdir: str | PathLike,
+    backend: str = 'subprocess'
 ) -> fontforge.font:
     from fontforgeVF.utils import initPersistentDict
     from pathlib import Path
@@ -203,11 +207,13 @@ def _doOpenVariableFont(
         if n:
             stem = str(n)
     instancePath = str(tmpdir) + '/' + stem + '.ttf'
-    with _instantiate(filename, axisValues, instancePath) as partial:
+    with _instantiate(filename, axisValues, instancePath, backend) as partial:
         if i := _searchInstance(varfont, axisValues):
             _loadInstanceNames(varfont, partial, i.postscriptNameID, i.subfamilyNameID)
-        partial.save(instancePath)
-    font = fontforge.open(instancePath)
+        with timing.span('saveInstance'):
+            partial.save(instancePath)
+    with timing.span('fontforge.open'):
+        font = fontforge.open(instancePath)
     initPersistentDict(font)
     assert isinstance(font.persistent, dict)
     font.persistent['VF'] = vfData
@@ -217,14 +223,15 @@ def _doOpenVariableFont(
 def _openVF(
     filename: str | PathLike,
     axisValuesOrInstance: int | str | dict[str, int | float],
-    tmpdir: str | PathLike
+    tmpdir: str | PathLike,
+    backend: str = 'subprocess'
 ) -> fontforge.font:
     with ttLib.TTFont(filename) as ttf:
         if 'fvar' not in ttf:
             return fontforge.open(str(filename))
         elif isinstance(axisValuesOrInstance, dict):
             if [axis for axis in ttf['fvar'].axes if axis.minValue != axis.maxValue]:
-                return _doOpenVariableFont(filename, axisValuesOrInstance, ttf, tmpdir)
+                return _doOpenVariableFont(filename, axisValuesOrInstance, ttf, tmpdir, backend)
             else:
                 return fontforge.open(str(filename))
         elif isinstance(axisValuesOrInstance, int):
@@ -232,7 +239,8 @@ def _openVF(
                 filename,
                 ttf['fvar'].instances[axisValuesOrInstance].coordinates,
                 ttf,
-                tmpdir
+                tmpdir,
+                backend
             )
         elif isinstance(axisValuesOrInstance, str):
             return _doOpenVariableFont(
@@ -242,31 +250,30 @@ def _openVF(
                     if str(ttf['name'].getName(i.subfamilyNameID, 3, 1, 0x409)) == axisValuesOrInstance
                 ][0].coordinates,
                 ttf,
-                tmpdir
+                tmpdir,
+                backend
             )
         else:
             raise TypeError('incompatible type for axisValuesOrInstance')
 
 
 def _woff2Decompress(filename: str | PathLike, tmpdir: str | PathLike) -> str:
-    import shutil
     from pathlib import Path
-    from subprocess import run
-    from sys import stderr
+    from . import woff2
 
-    woffFile = str(Path(tmpdir, Path(filename).name))
-    shutil.copy2(filename, woffFile)
-    result = run(
-        ['woff2_decompress', woffFile],
-        check=True, text=True, capture_output=fontforge.hasUserInterface())
-    if fontforge.hasUserInterface():
-        stderr.write(result.stderr)
-    return str(Path(tmpdir, Path(woffFile).stem)) + '.ttf'
+    ttFile = str(Path(tmpdir, Path(filename).stem)) + '.ttf'
+    with timing.span('woff2Decompress'):
+        woff2.decompress(str(filename), ttFile)
+    return ttFile
 
 
 def openVariableFont(
     filename: str | PathLike,
-    axisValuesOrInstance: int | str | dict[str, int | float]
+    axisValuesOrInstance: int | str | dict[str, int | float],
+    *,
+    backend: str = 'subprocess',
+    traceFile: str | PathLike | None = None,
+    workspace: str | PathLike | None = None
 ) -> fontforge.font:
     """Opens an instance of variable font
 
@@ -279,20 +286,40 @@ def openVariableFont(
     instance list (0 for the first instance). If ``str``, the name of \
     an instance. If ``dict``, axis tags as its keys and axis positions \
     as their values.
+    :param backend: Optional. How to run the instancer: \
+    ``'subprocess'``, ``'inprocess'`` or ``'daemon'``. See \
+    ``exportVariableFont``. Defaults to ``'subprocess'``.
+    :param traceFile: Optional. JSON file to write the timings in Chrome \
+    trace event format. See ``exportVariableFont``. The timings are also \
+    kept in ``font.temporary['VF.timing']`` of the returned font.
+    :param workspace: Optional. Directory to make the scratch directory \
+    in. See ``exportVariableFont``.
     :raises ``IndexError``: When ``axisValuesOrInstance`` is an \
     ``int``, the index of the instance list is out of range.
     :raises ``ValueError``: When ``axisValuesOrInstance`` is a \
-    ``dict``, at least one value of design axes is out of range
+    ``dict``, at least one value of design axes is out of range, or \
+    ``backend`` is unknown
     """
-    import tempfile
+    from pathlib import Path
+    from .workspace import Workspace
 
     filetype = checkExtensionTtfOrWoff2(filename)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        if filetype == 'ttf':
-            font = _openVF(filename, axisValuesOrInstance, tmpdir)
-        else:  # woff2
-            ttFile = _woff2Decompress(filename, tmpdir)
-            font = _openVF(ttFile, axisValuesOrInstance, tmpdir)
+    checkBackend(backend)
+    with timing.trace() as trace:
+        try:
+            with timing.span('openVariableFont', file=Path(filename).name), \
+                    Workspace(workspace) as tmpdir:
+                if filetype == 'ttf':
+                    font = _openVF(filename, axisValuesOrInstance, tmpdir, backend)
+                else:  # woff2
+                    ttFile = _woff2Decompress(filename, tmpdir)
+                    font = _openVF(ttFile, axisValuesOrInstance, tmpdir, backend)
+        finally:
+            if traceFile is not None:
+                trace.writeChromeTrace(traceFile)
+    if not isinstance(font.temporary, dict):
+        font.temporary = dict()
+    font.temporary['VF.timing'] = trace.report()
     return font
 
 
@@ -331,10 +358,10 @@ def _chooseInstanceDialog(filename: str | PathLike, ttf: ttLib.TTFont, tmpdir: s
 
 
 def _selectInstanceDialog(filename: str | PathLike, ttf: ttLib.TTFont, dialogType):
-    import tempfile
+    from .workspace import Workspace
 
     assert 'fvar' in ttf
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with Workspace() as tmpdir:
         filetype = checkExtensionTtfOrWoff2(filename)
         ttFile = filename
         if filetype == 'woff2':
@@ -389,7 +416,7 @@ def _generatePreHook(font: fontforge.font, target: str):
 
 def _generatePostHook(font: fontforge.font, target: str):
     from fontforgeVF.utils import vfInfoExists
-    from fontforgeVF.export import exportVariableFont
+    from fontforgeVF.export import _startExport
 
     assert isinstance(font.temporary, dict)
     changed = font.changed
@@ -397,7 +424,7 @@ def _generatePostHook(font: fontforge.font, target: str):
         if 'generateVF' in font.temporary:
             if target.endswith('.ttf') or target.endswith('.woff2'):
                 if font.temporary['generateVF']:
-                    exportVariableFont(font, target, None)
+                    _startExport(font, target, None)
             try:
                 del font.temporary['generateVF']
             except KeyError:
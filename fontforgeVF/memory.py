@@ -0,0 +1,113 @@
+"""Memory used by this process and the processes it started
+
+Memory is read from ``/proc`` as the proportional set size (PSS), so
+pages shared copy-on-write with forked workers are counted once in
+total rather than once per worker.
+"""
+
+from collections.abc import Callable
+import os
+import threading
+
+
+def isAvailable() -> bool:
+    return os.path.exists('/proc/self/status')
+
+
+def _processMemory(pid: int) -> int:
+    """PSS (or RSS with older kernels) of a process in bytes; 0 if it has gone"""
+    for name, key in (('smaps_rollup', 'Pss:'), ('status', 'VmRSS:')):
+        try:
+            with open('/proc/' + str(pid) + '/' + name, encoding='ascii', errors='replace') as f:
+                for line in f:
+                    if line.startswith(key):
+                        return int(line.split()[1]) * 1024  # kB
+        except FileNotFoundError:
+            continue
+        except OSError:  # gone meanwhile, or not allowed
+            return 0
+    return 0
+
+
+def _descendants(pid: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/' + entry + '/stat', encoding='ascii', errors='replace') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name in parentheses may contain spaces
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    result = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            result.append(child)
+            pending.append(child)
+    return result
+
+
+def usage(pid: int | None = None) -> int:
+    """Memory of a process (this one by default) and its descendants in bytes"""
+    if pid is None:
+        pid = os.getpid()
+    return sum(_processMemory(p) for p in [pid] + _descendants(pid))
+
+
+def boundedWorkers(workers: int | None, budget: int, perWorker: int, used: int | None = None) -> int:
+    """Number of workers, up to ``workers``, that fit in what is left of ``budget``
+
+    :param workers: Number of workers asked for; ``None`` for the number \
+    of CPUs
+    :param budget: Bytes
+    :param perWorker: Bytes a worker is expected to use
+    :param used: Optional. Bytes already used; ``usage()`` by default
+    :return: At least 1, as work is done even if the budget is tight
+    """
+    if used is None:
+        used = usage()
+    fitting = (budget - used) // max(perWorker, 1)
+    return max(1, min(workers or os.cpu_count() or 1, fitting))
+
+
+class Monitor:
+    """Samples ``usage()`` in a thread, calling ``onExceeded`` once over ``budget``
+
+    :param budget: Bytes
+    :param onExceeded: Called as ``onExceeded(used)`` on the thread of \
+    the monitor
+    :param interval: Seconds between samples
+    """
+
+    def __init__(self, budget: int, onExceeded: Callable[[int], None], interval: float = 0.25):
+        self.budget = budget
+        self.peak = 0
+        self.exceeded = False
+        self._onExceeded = onExceeded
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fontforgeVF memory', daemon=True)
+
+    def start(self):
+        self._sample()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _sample(self):
+        used = usage()
+        self.peak = max(self.peak, used)
+        if used > self.budget and not self.exceeded:
+            self.exceeded = True
+            self._onExceeded(used)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self._sample()
@@ -0,0 +1,162 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import PathLike
+import itertools
+import json
+import os
+import threading
+import time
+
+_ids = itertools.count(1)  # with the PID, unique across forked workers
+
+
+class Trace:
+    """Timing spans recorded while the trace is active
+
+    Each span is a ``dict`` with 'id', 'parent', 'name', 'start' and
+    'end' (seconds of ``time.perf_counter()``), 'pid', 'tid' and 'args',
+    so that spans recorded in forked workers can be sent back.
+    """
+
+    def __init__(self):
+        self.spans: list[dict] = []
+
+    def report(self) -> dict:
+        """Returns spans as a tree of names, durations and arguments"""
+        nodes = {}
+        roots = []
+        for s in sorted(self.spans, key=lambda s: s['start']):
+            nodes[s['id']] = {
+                'name': s['name'],
+                'seconds': s['end'] - s['start'],
+                'args': s['args'],
+                'children': [],
+            }
+        for s in sorted(self.spans, key=lambda s: s['start']):
+            parent = nodes.get(s['parent'])
+            (parent['children'] if parent else roots).append(nodes[s['id']])
+        return {
+            'seconds': sum(node['seconds'] for node in roots),
+            'spans': roots,
+        }
+
+    def writeChromeTrace(self, filename: str | PathLike):
+        """Writes spans in Chrome trace event format
+
+        The file can be viewed in chrome://tracing or Perfetto.
+        """
+        origin = min((s['start'] for s in self.spans), default=0)
+        events = [
+            {
+                'name': s['name'],
+                'ph': 'X',
+                'ts': (s['start'] - origin) * 1e6,
+                'dur': (s['end'] - s['start']) * 1e6,
+                'pid': s['pid'],
+                'tid': s['tid'],
+                'args': s['args'],
+            }
+            for s in self.spans
+        ]
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+_trace: ContextVar[Trace | None] = ContextVar('trace', default=None)
+_parent: ContextVar[str | None] = ContextVar('parent', default=None)
+_observer: ContextVar[Callable[[str, str, dict], None] | None] = ContextVar('observer', default=None)
+
+
+@contextmanager
+def trace():
+    """Records spans in this context into a new ``Trace``"""
+    traceToken = _trace.set(Trace())
+    parentToken = _parent.set(None)
+    try:
+        yield _trace.get()
+    finally:
+        _parent.reset(parentToken)
+        _trace.reset(traceToken)
+
+
+@contextmanager
+def observe(callback: Callable[[str, str, dict], None]):
+    """Calls ``callback(event, name, args)`` for spans in this context
+
+    ``event`` is ``'start'`` before the block of a span runs, where an
+    exception raised by ``callback`` keeps the block from running, and
+    ``'end'`` after it. Spans of forked workers are only notified of
+    their end, when they are sent back.
+    """
+    token = _observer.set(callback)
+    try:
+        yield
+    finally:
+        _observer.reset(token)
+
+
+@contextmanager
+def span(name: str, **args):
+    """Times the block as a span of the active trace, if any"""
+    t = _trace.get()
+    observer = _observer.get()
+    args = {k: str(v) for k, v in args.items()}
+    if observer is not None:
+        observer('start', name, args)
+    if t is None:
+        yield
+        if observer is not None:
+            observer('end', name, args)
+        return
+    s = {
+        'id': str(os.getpid()) + ':' + str(next(_ids)),
+        'parent': _parent.get(),
+        'name': name,
+        'start': time.perf_counter(),
+        'end': None,
+        'pid': os.getpid(),
+        'tid': threading.get_native_id(),
+        'args': args,
+    }
+    token = _parent.set(s['id'])
+    try:
+        yield
+    finally:
+        _parent.reset(token)
+        s['end'] = time.perf_counter()
+        t.spans.append(s)
+    if observer is not None:
+        observer('end', name, args)
+
+
+def parentId() -> str | None:
+    """ID of the current span, to be passed to ``inWorker()``"""
+    return _parent.get()
+
+
+def inWorker(parent: str | None, func, *args):
+    """Calls ``func`` in a forked worker, recording spans under ``parent``
+
+    Submit this to the executor with ``parentId()`` of the submitting
+    context, and get the result with ``workerResult()``.
+    """
+    token = _observer.set(None)  # callbacks belong to the parent process
+    try:
+        with trace() as t:
+            _parent.set(parent)
+            result = func(*args)
+    finally:
+        _observer.reset(token)
+    return result, t.spans
+
+
+def workerResult(future):
+    """Result of ``inWorker()``, adding its spans to the active trace"""
+    result, spans = future.result()
+    if (t := _trace.get()) is not None:
+        t.spans += spans
+    if (observer := _observer.get()) is not None:
+        for s in sorted(spans, key=lambda s: s['end']):
+            observer('end', s['name'], s['args'])
+    return result
@@ -41,6 +41,10 @@ translation_de = {
     # export.py
     'Failed to export': 'Export fehlgeschlagen',
     "'{0}' failed with return code {1}": "„{0}“ ist mit dem Rückgabecode {1} fehlgeschlagen.",
+    'Masters are not compatible. See the warnings for details.':
+        'Die Master sind nicht kompatibel. Details finden Sie in den Warnungen.',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        'Ein Export dieser Schriftfamilie läuft.\nMöchten Sie ihn abbrechen?',
     'Finished': 'Fertig',
     'Finished to output variable fonts': 'Fertiggestellt für die Ausgabe variabler Schriftarten',
     '_Roman VF:': '_Antiqua-VS:',
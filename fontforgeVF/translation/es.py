@@ -41,6 +41,10 @@ translation_es = {
     # export.py
     'Failed to export': 'No se pudo exportar',
     "'{0}' failed with return code {1}": "'{0}' falló con el código de retorno {1}",
+    'Masters are not compatible. See the warnings for details.':
+        'Los másteres no son compatibles. Consulte las advertencias para más detalles.',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        'Se está exportando esta familia tipográfica.\n¿Desea cancelar la exportación?',
     'Finished': 'Finalizado',
     'Finished to output variable fonts': 'Finalizado para generar fuentes variables',
     '_Roman VF:': 'FV _Romana:',
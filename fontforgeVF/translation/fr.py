@@ -41,6 +41,10 @@ translation_fr = {
     # export.py
     'Failed to export': 'Échec de l\'exportation',
     "'{0}' failed with return code {1}": "«{0}» a échoué avec le code de retour {1}",
+    'Masters are not compatible. See the warnings for details.':
+        'Les masters ne sont pas compatibles. Consultez les avertissements pour plus de détails.',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        "Un export de cette famille de fontes est en cours.\nVoulez-vous l'annuler ?",
     'Finished': 'Fini',
     'Finished to output variable fonts': 'Finalisé pour générer de la fonte variable',
     '_Roman VF:': 'FV _Romaine:',
@@ -41,6 +41,10 @@ translation_it = {
     # export.py
     'Failed to export': 'Esportazione non riuscita',
     "'{0}' failed with return code {1}": "'{0}' non è riuscito con codice di ritorno {1}",
+    'Masters are not compatible. See the warnings for details.':
+        'I master non sono compatibili. Vedere gli avvisi per i dettagli.',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        "È in corso un'esportazione di questa famiglia di font.\nVuoi annullarla?",
     'Finished': 'Completato',
     'Finished to output variable fonts': 'Completato per generare il font variabile',
     '_Roman VF:': 'FV _Romano:',
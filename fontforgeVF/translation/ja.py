@@ -41,6 +41,10 @@ translation_ja = {
     # export.py
     'Failed to export': 'エクスポートに失敗しました',
     "'{0}' failed with return code {1}": "'{0}' がリターンコード {1} で失敗しました",
+    'Masters are not compatible. See the warnings for details.':
+        'マスターに互換性がありません。詳細は警告を参照してください。',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        'このフォントファミリーのエクスポートを実行中です。\nキャンセルしますか?',
     'Finished': '完了',
     'Finished to output variable fonts': '可変フォントの出力が完了しました',
     '_Roman VF:': '正立体のVF (_R):',
@@ -41,6 +41,10 @@ translation_ko = {
     # export.py
     'Failed to export': '내보내기 실패',
     "'{0}' failed with return code {1}": "'{0}'이(가) 반환 코드 {1}(으)로 실패했습니다.",
+    'Masters are not compatible. See the warnings for details.':
+        '마스터가 호환되지 않습니다. 자세한 내용은 경고를 참조하십시오.',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        '이 글꼴 패밀리를 내보내는 중입니다.\n취소하시겠습니까?',
     'Finished': '완료',
     'Finished to output variable fonts': '가변 폰트 출력이 완료했습니다.',
     '_Roman VF:': '로만채 VF (_R):',
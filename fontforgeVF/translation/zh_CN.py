@@ -41,6 +41,10 @@ translation_zh_CN = {
     # export.py
     'Failed to export': '导出失败了',
     "'{0}' failed with return code {1}": "'{0}' 失败了，返回码为 {1}",
+    'Masters are not compatible. See the warnings for details.':
+        '母版不兼容。详情请参阅警告。',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        '正在导出此字体家族。\n要取消吗?',
     'Finished': '完成了',
     'Finished to output variable fonts': '完成输出可变字体了',
     '_Roman VF:': '罗马体VF (_R):',
@@ -41,6 +41,10 @@ translation_zh_TW = {
     # export.py
     'Failed to export': '匯出失敗了',
     "'{0}' failed with return code {1}": "'{0}' 失敗了，回傳代碼為 {1}",
+    'Masters are not compatible. See the warnings for details.':
+        '母版不相容。詳情請參閱警告。',
+    'An export of this font family is running.\nDo you want to cancel it?':
+        '正在匯出此字型家族。\n要取消嗎?',
     'Finished': '完成了',
     'Finished to output variable fonts': '完成輸出可變字型了',
     '_Roman VF:': '羅馬體VF (_R):',
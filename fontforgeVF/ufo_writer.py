@@ -0,0 +1,388 @@
+from os import PathLike
+from types import SimpleNamespace
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import fontforge
+
+_manifestDir = 'data/com.github.MihailJP.fontforgeVF'
+_manifestFile = _manifestDir + '/glyphs.json'
+
+_openTypeCategories = {
+    'baseglyph': 'base',
+    'baseligature': 'ligature',
+    'mark': 'mark',
+    'component': 'component',
+}
+
+_gaspFlags = {  # font.gasp to bits of rangeGaspBehavior
+    'gridfit': 0,
+    'antialias': 1,
+    'symmetric-smoothing': 2,
+    'gridfit+smoothing': 3,
+}
+
+_nameRecords = {  # sfnt_names to fontinfo.plist
+    'Copyright': 'copyright',
+    'Trademark': 'trademark',
+    'Manufacturer': 'openTypeNameManufacturer',
+    'Designer': 'openTypeNameDesigner',
+    'Descriptor': 'openTypeNameDescription',
+    'Vendor URL': 'openTypeNameManufacturerURL',
+    'Designer URL': 'openTypeNameDesignerURL',
+    'License': 'openTypeNameLicense',
+    'License URL': 'openTypeNameLicenseURL',
+    'UniqueID': 'openTypeNameUniqueID',
+    'Version': 'openTypeNameVersion',
+    'Preferred Family': 'openTypeNamePreferredFamilyName',
+    'Preferred Styles': 'openTypeNamePreferredSubfamilyName',
+    'Compatible Full': 'openTypeNameCompatibleFullName',
+    'Sample Text': 'openTypeNameSampleText',
+    'WWS Family': 'openTypeNameWWSFamilyName',
+    'WWS Subfamily': 'openTypeNameWWSSubfamilyName',
+}
+
+
+def _contourRecord(contour: fontforge.contour) -> tuple:
+    points = []
+    offCurves = 0
+    for p in contour:
+        if p.on_curve:
+            if offCurves == 0:
+                segmentType = 'line'
+            else:
+                segmentType = 'qcurve' if contour.is_quadratic else 'curve'
+            points.append((p.x, p.y, segmentType))
+            offCurves = 0
+        else:
+            points.append((p.x, p.y, None))
+            offCurves += 1
+    if not points:
+        return ()
+    if not contour.closed:
+        x, y, segmentType = points[0]
+        points[0] = (x, y, 'move')
+    elif offCurves and points[0][2] == 'line':
+        # Off-curve points at the end lead to the first point
+        x, y, segmentType = points[0]
+        points[0] = (x, y, 'qcurve' if contour.is_quadratic else 'curve')
+    return tuple(points)
+
+
+def _anchorRecord(anchor: tuple) -> dict:
+    name, anchorType, x, y = anchor[:4]
+    if anchorType == 'mark':
+        name = '_' + name
+    elif anchorType == 'ligature':
+        name = name + '_' + str(anchor[4] + 1)
+    elif anchorType in ('entry', 'exit'):
+        name = anchorType + '.' + name
+    return {'name': name, 'x': x, 'y': y}
+
+
+def _glyphRecord(glyph: fontforge.glyph, vertical: bool) -> dict:
+    """Reads what the UFO needs from a glyph into plain Python data
+
+    FontForge objects must be accessed from the main thread only, while
+    records can be serialized by worker threads.
+    """
+    unicodes = [glyph.unicode] if glyph.unicode >= 0 else []
+    for alt in glyph.altuni or ():
+        if alt[0] not in unicodes and alt[1] == -1:  # skip variation sequences
+            unicodes.append(alt[0])
+    record = {
+        'name': glyph.glyphname,
+        'width': glyph.width,
+        'height': glyph.vwidth if vertical else None,
+        'unicodes': unicodes,
+        'contours': tuple(c for c in (_contourRecord(c) for c in glyph.foreground) if c),
+        'components': tuple((ref[0], tuple(ref[1])) for ref in glyph.references),
+        'anchors': [_anchorRecord(a) for a in glyph.anchorPoints],
+        'category': _openTypeCategories.get(glyph.glyphclass),
+    }
+    record['digest'] = hashlib.sha256(repr(sorted(record.items())).encode('utf-8')).hexdigest()
+    return record
+
+
+def _drawPoints(record: dict, pointPen):
+    for contour in record['contours']:
+        pointPen.beginPath()
+        for x, y, segmentType in contour:
+            pointPen.addPoint((x, y), segmentType=segmentType)
+        pointPen.endPath()
+    for baseGlyph, transformation in record['components']:
+        pointPen.addComponent(baseGlyph, transformation)
+
+
+def _glyphObject(record: dict) -> SimpleNamespace:
+    glyph = SimpleNamespace(width=record['width'], unicodes=record['unicodes'], anchors=record['anchors'])
+    if record['height'] is not None:
+        glyph.height = record['height']
+    return glyph
+
+
+def _versionNumbers(version: str) -> tuple[int, int]:
+    import re
+
+    if m := re.match(r'\s*(\d+)(?:\.(\d+))?', version or ''):
+        return int(m[1]), int(m[2] or 0)
+    return 0, 0
+
+
+def _offset(value: int, base: int, isOffset: bool) -> int:
+    return value + base if isOffset else value
+
+
+def _yBounds(font: fontforge.font, glyphNames: set[str] | None = None) -> tuple[int, int]:
+    """Lowest and highest points of the glyphs, which offset hhea and Win metrics are added to"""
+    if not (font.hhea_ascent_add or font.hhea_descent_add or font.os2_winascent_add or font.os2_windescent_add):
+        return 0, 0
+    yMin = yMax = 0.0
+    for glyph in font.glyphs():
+        if glyphNames is not None and glyph.glyphname not in glyphNames:
+            continue
+        xMin, glyphYMin, xMax, glyphYMax = glyph.boundingBox()
+        yMin = min(yMin, glyphYMin)
+        yMax = max(yMax, glyphYMax)
+    return round(yMin), round(yMax)
+
+
+def _fontInfo(font: fontforge.font, glyphNames: set[str] | None = None) -> SimpleNamespace:
+    from .export import _getFontFamilyName, _getFontSubFamilyName, _isFixedPitch
+
+    info = SimpleNamespace()
+    info.familyName = font.familyname
+    info.styleName = _getFontSubFamilyName(font)
+    info.styleMapFamilyName = _getFontFamilyName(font)
+    styleMapStyleName = str(_getFontSubFamilyName(font)).lower()
+    if styleMapStyleName in ('regular', 'italic', 'bold', 'bold italic'):
+        info.styleMapStyleName = styleMapStyleName
+    info.versionMajor, info.versionMinor = _versionNumbers(font.version)
+    info.copyright = font.copyright or None
+    info.unitsPerEm = font.em
+    info.ascender = font.ascent
+    info.descender = -font.descent
+    if font.capHeight > 0:
+        info.capHeight = font.capHeight
+    if font.xHeight > 0:
+        info.xHeight = font.xHeight
+    info.italicAngle = font.italicangle
+    for lang, strid, string in font.sfnt_names:
+        if lang == 'English (US)' and strid in _nameRecords:
+            setattr(info, _nameRecords[strid], string)
+    # As in FontForge, offset typo metrics are relative to ascent and descent, and the others to the bounds
+    yMin, yMax = _yBounds(font, glyphNames)
+    info.openTypeHheaAscender = _offset(font.hhea_ascent, yMax, font.hhea_ascent_add)
+    info.openTypeHheaDescender = _offset(font.hhea_descent, yMin, font.hhea_descent_add)
+    info.openTypeHheaLineGap = font.hhea_linegap
+    info.openTypeOS2WeightClass = font.os2_weight
+    info.openTypeOS2WidthClass = font.os2_width
+    info.openTypeOS2VendorID = font.os2_vendor.strip() or None
+    info.openTypeOS2Panose = list(font.os2_panose)
+    info.openTypeOS2Type = [i for i in range(16) if font.os2_fstype & (1 << i)]
+    info.openTypeOS2Selection = _os2Selection(font)
+    if font.os2_family_class:
+        info.openTypeOS2FamilyClass = [font.os2_family_class >> 8, font.os2_family_class & 0xff]
+    info.openTypeOS2UnicodeRanges = _bitList(font.os2_unicoderanges)
+    info.openTypeOS2CodePageRanges = _bitList(font.os2_codepages)
+    info.openTypeOS2TypoAscender = _offset(font.os2_typoascent, font.ascent, font.os2_typoascent_add)
+    info.openTypeOS2TypoDescender = _offset(font.os2_typodescent, -font.descent, font.os2_typodescent_add)
+    info.openTypeOS2TypoLineGap = font.os2_typolinegap
+    info.openTypeOS2WinAscent = _offset(font.os2_winascent, yMax, font.os2_winascent_add)
+    info.openTypeOS2WinDescent = _offset(font.os2_windescent, -yMin, font.os2_windescent_add)
+    info.openTypeOS2StrikeoutSize = font.os2_strikeysize
+    info.openTypeOS2StrikeoutPosition = font.os2_strikeypos
+    info.openTypeOS2SubscriptXSize = font.os2_subxsize
+    info.openTypeOS2SubscriptYSize = font.os2_subysize
+    info.openTypeOS2SubscriptXOffset = font.os2_subxoff
+    info.openTypeOS2SubscriptYOffset = font.os2_subyoff
+    info.openTypeOS2SuperscriptXSize = font.os2_supxsize
+    info.openTypeOS2SuperscriptYSize = font.os2_supysize
+    info.openTypeOS2SuperscriptXOffset = font.os2_supxoff
+    info.openTypeOS2SuperscriptYOffset = font.os2_supyoff
+    info.postscriptFontName = font.fontname
+    info.postscriptFullName = font.fullname
+    info.postscriptWeightName = font.weight
+    info.postscriptUnderlinePosition = font.upos
+    info.postscriptUnderlineThickness = font.uwidth
+    info.postscriptIsFixedPitch = _isFixedPitch(font)
+    info.openTypeGaspRangeRecords = [
+        {'rangeMaxPPEM': ppem, 'rangeGaspBehavior': sorted(_gaspFlags[flag] for flag in flags)}
+        for ppem, flags in font.gasp
+    ] or None
+    if font.creationtime:
+        info.openTypeHeadCreated = time.strftime('%Y/%m/%d %H:%M:%S', time.gmtime(font.creationtime))
+    return info
+
+
+def _bitList(words: tuple[int, ...]) -> list[int] | None:
+    """Numbers of the bits set in 32-bit ``words`` as in OS/2 ranges; ``None`` if unset
+
+    Unset ranges are left to the compiler, which works them out from
+    the characters, as FontForge does.
+    """
+    return [i for i in range(len(words) * 32) if words[i // 32] & (1 << (i % 32))] or None
+
+
+def _os2Selection(font: fontforge.font) -> list[int] | None:
+    """Bits of fsSelection which are not derived from the style in fontinfo.plist"""
+    bits = []
+    if font.os2_use_typo_metrics:
+        bits.append(7)
+    if font.os2_weight_width_slope_only:
+        bits.append(8)
+    if font.os2_stylemap & (1 << 9):  # oblique
+        bits.append(9)
+    return bits or None
+
+
+def _readFeatures(font: fontforge.font, rewrite=None) -> str:
+    """Feature file FontForge writes, passed through ``rewrite(source, dest)`` if given"""
+    import io
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        feaPath = os.path.join(tmpdir, 'features.fea')
+        font.generateFeatureFile(feaPath)
+        with open(feaPath, encoding='utf-8', newline='') as f:
+            if rewrite is None:
+                return f.read()
+            dest = io.StringIO(newline='')
+            rewrite(f, dest)
+            return dest.getvalue()
+
+
+def _readManifest(ufoPath: str) -> dict:
+    try:
+        with open(os.path.join(ufoPath, _manifestFile), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _writeGlif(path: str, record: dict):
+    from fontTools.ufoLib.glifLib import writeGlyphToString
+
+    data = writeGlyphToString(
+        record['name'], _glyphObject(record), lambda pen: _drawPoints(record, pen), validate=False
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(data)
+
+
+def _lib(records: list[dict]) -> dict:
+    return {
+        'public.glyphOrder': [record['name'] for record in records],
+        'public.openTypeCategories': {
+            record['name']: record['category'] for record in records if record['category']
+        },
+    }
+
+
+def _glyphRecords(font: fontforge.font, glyphNames: set[str] | None) -> list[dict]:
+    vertical = font.hasvmetrics
+    return [
+        _glyphRecord(glyph, vertical) for glyph in font.glyphs()
+        if glyphNames is None or glyph.glyphname in glyphNames
+    ]
+
+
+def ufoFont(font: fontforge.font, features: str, glyphNames: set[str] | None = None):
+    """Converts a master into an in-memory UFO (``ufoLib2.Font``)
+
+    Nothing is written to disk except the feature file FontForge
+    generates, which is read back at once and deleted.
+
+    :param font: Fontforge font object
+    :param features: Content of features.fea
+    :param glyphNames: Optional. Glyphs to convert. All glyphs if ``None``.
+    """
+    import ufoLib2
+
+    records = _glyphRecords(font, glyphNames)
+    ufo = ufoLib2.Font()
+    for record in records:
+        glyph = ufo.newGlyph(record['name'])
+        glyph.width = record['width']
+        if record['height'] is not None:
+            glyph.height = record['height']
+        glyph.unicodes = record['unicodes']
+        for anchor in record['anchors']:
+            glyph.appendAnchor(anchor)
+        _drawPoints(record, glyph.getPointPen())
+    for attr, value in vars(_fontInfo(font, glyphNames)).items():
+        if value is not None:
+            setattr(ufo.info, attr, value)
+    ufo.features.text = features
+    ufo.lib.update(_lib(records))
+    return ufo
+
+
+def writeUfo(
+    font: fontforge.font,
+    ufoPath: str | PathLike,
+    features: str,
+    workers: int | None = None,
+    glyphNames: set[str] | None = None
+):
+    """Writes a master into UFO without ``font.generate``
+
+    If ``ufoPath`` has been written by this function before, only the
+    glyphs changed since then are rewritten.
+
+    :param font: Fontforge font object
+    :param ufoPath: Output path ending with '.ufo'
+    :param features: Content of features.fea
+    :param workers: Optional. Number of threads to write .glif files.
+    :param glyphNames: Optional. Glyphs to write. All glyphs if ``None``.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from fontTools.ufoLib import UFOWriter
+    from fontTools.ufoLib.filenames import userNameToFileName
+
+    ufoPath = str(ufoPath)
+    manifest = _readManifest(ufoPath)
+    if manifest:
+        # An interrupted write must not be taken as up to date
+        os.remove(os.path.join(ufoPath, _manifestFile))
+    elif os.path.exists(ufoPath):
+        shutil.rmtree(ufoPath)  # not written by this function; start over
+
+    records = _glyphRecords(font, glyphNames)
+
+    with UFOWriter(ufoPath, formatVersion=3, validate=False) as writer:
+        glyphSet = writer.getGlyphSet()
+        glyphsDir = os.path.join(ufoPath, 'glyphs')
+        contents = {}
+        existing = set(fileName.lower() for fileName, digest in manifest.values())
+        pending = []
+        for record in records:
+            if record['name'] in manifest:
+                fileName, digest = manifest[record['name']]
+            else:
+                fileName = userNameToFileName(record['name'], existing, suffix='.glif')
+                existing.add(fileName.lower())
+                digest = None
+            contents[record['name']] = fileName
+            if digest != record['digest']:
+                pending.append((os.path.join(glyphsDir, fileName), record))
+        for name in set(manifest) - set(contents):
+            os.remove(os.path.join(glyphsDir, manifest[name][0]))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_writeGlif, path, record) for path, record in pending]:
+                future.result()
+
+        glyphSet.contents = contents
+        glyphSet.writeContents()
+        writer.writeInfo(_fontInfo(font, glyphNames))
+        writer.writeFeatures(features)
+        writer.writeLib(_lib(records))
+        writer.writeLayerContents()
+
+    os.makedirs(os.path.join(ufoPath, _manifestDir), exist_ok=True)
+    with open(os.path.join(ufoPath, _manifestFile), 'w', encoding='utf-8') as f:
+        json.dump({record['name']: [contents[record['name']], record['digest']] for record in records}, f)
@@ -1,5 +1,8 @@
+from collections.abc import Callable
+from contextlib import contextmanager
 from os import PathLike
 import re
+import threading
 
 import fontforge
 
@@ -33,6 +36,78 @@ def intOrFloat(val: str | int | float):
         return f
 
 
+def _forkExecutor(workers: int | None, initializer: Callable | None = None, initargs: tuple = ()):
+    """Process pool whose children are forked from this process
+
+    Forked children share the fonts loaded in FontForge copy-on-write,
+    so ``fontforge.font`` objects need not be pickled. Neither need
+    ``initargs``, which each child hands to ``initializer`` when it
+    starts; this is how a job gives its own state to its workers
+    without a module global which concurrent jobs would overwrite.
+    Returns ``None`` where ``fork`` is unavailable (e.g. Windows);
+    callers then fall back to serial processing.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+        initializer=initializer, initargs=initargs,
+    )
+
+
+_patchLock = threading.Lock()
+_patches: dict[tuple[int, str], list] = {}  # (id(owner), name) -> [original, users]
+
+
+@contextmanager
+def _patched(owner, name: str, replacement: Callable):
+    """Replaces attribute ``name`` of ``owner`` with ``replacement`` within the block
+
+    Blocks may overlap (e.g. builds in several threads): the first one
+    to enter installs the replacement and the last one to exit restores
+    the original. Yields the original.
+    """
+    key = (id(owner), name)
+    with _patchLock:
+        if key not in _patches:
+            _patches[key] = [getattr(owner, name), 0]
+            setattr(owner, name, replacement)
+        patch = _patches[key]
+        patch[1] += 1
+    try:
+        yield patch[0]
+    finally:
+        with _patchLock:
+            patch[1] -= 1
+            if not patch[1]:
+                setattr(owner, name, patch[0])
+                del _patches[key]
+
+
+@contextmanager
+def _atomicOutput(path: str | PathLike):
+    """Yields a scratch path next to ``path`` and moves it onto ``path``
+
+    The file is moved only when the block succeeds, so ``path`` is
+    either the previous file (e.g. the static font FontForge has just
+    generated) or the complete new one, never a half-written one.
+    """
+    import os
+    import uuid
+
+    directory, name = os.path.split(os.path.abspath(path))
+    scratchPath = os.path.join(directory, '.' + name + '.' + uuid.uuid4().hex + '.tmp')
+    try:
+        yield scratchPath
+        os.replace(scratchPath, path)
+    finally:
+        if os.path.exists(scratchPath):  # failed
+            os.remove(scratchPath)
+
+
 def ensureList(obj) -> list:
     if obj is None:
         return []
@@ -371,3 +446,15 @@ def checkExtensionTtfOrWoff2(filename: str | PathLike) -> str:
         return 'woff2'
     else:
         raise ValueError("'" + str(filename) + "' has unexpected extension")
+
+
+def checkExtension(filename: str | PathLike) -> str:
+    """Checks the suffix (extension) of given output file
+
+    :param filename: Path to font file
+    :return: 'ttf', 'woff2' or 'woff'
+    :raises ``ValueError``: if ``filename`` is none of them
+    """
+    if str(filename).endswith('.woff'):
+        return 'woff'
+    return checkExtensionTtfOrWoff2(filename)
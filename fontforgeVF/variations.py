@@ -0,0 +1,233 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import os
+
+from . import timing, utils
+from .cache import DirectoryCache
+from .job import watch
+
+
+_minShardSize = 256  # glyphs; smaller shards are not worth a worker
+_shardsPerWorker = 4  # for load balancing, as glyphs differ in size
+
+_settings: ContextVar[tuple[int | None, DirectoryCache | None]] = ContextVar('gvarSettings', default=(1, None))
+_serialAddGvar: Callable | None = None
+_shardState: tuple | None = None  # set in each forked worker by _initShard
+
+
+class _ShardFont(dict):
+    """Part of a variable font which ``varLib._add_gvar`` uses"""
+
+    def __init__(self, glyf, glyphOrder: list[str]):
+        super().__init__(glyf=glyf)
+        self._glyphOrder = glyphOrder
+
+    def getGlyphOrder(self) -> list[str]:
+        return self._glyphOrder
+
+
+class _LogRecords(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        record.msg = record.getMessage()  # arguments may not pickle
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def _shards(glyphOrder: list[str], workers: int) -> list[list[str]]:
+    count = min(workers * _shardsPerWorker, len(glyphOrder) // _minShardSize)
+    size = -(-len(glyphOrder) // max(count, 1))
+    return [glyphOrder[i:i + size] for i in range(0, len(glyphOrder), size)]
+
+
+def _initShard(*state):
+    global _shardState
+
+    _shardState = state
+
+
+def _gvarShard(glyphOrder: list[str]) -> tuple[dict, list[logging.LogRecord]]:
+    # Runs in a forked child, which sees the masters of the parent
+    from fontTools.varLib import log
+
+    glyf, masterModel, masterTtfs, args, kwargs = _shardState  # type: ignore
+    font = _ShardFont(glyf, glyphOrder)
+    records = _LogRecords()
+    records.setLevel(logging.WARNING)  # not 'Generating gvar' of every shard
+    log.addHandler(records)
+    try:
+        with timing.span('gvarShard', glyphs=len(glyphOrder)):
+            _serialAddGvar(font, masterModel, masterTtfs, *args, **kwargs)  # type: ignore
+    finally:
+        log.removeHandler(records)
+    return font['gvar'].variations, records.records
+
+
+def _computeGvar(glyf, glyphOrder: list[str], masterModel, masterTtfs, args, kwargs, workers: int) -> dict:
+    """Variations of glyphs in ``glyphOrder``, in shards if worth it"""
+    from fontTools.varLib import log
+
+    if not glyphOrder:
+        return {}
+    shards = _shards(glyphOrder, workers)
+    executor = None
+    if workers > 1 and len(shards) > 1:
+        executor = utils._forkExecutor(
+            min(workers, len(shards)), _initShard, (glyf, masterModel, masterTtfs, args, kwargs),
+        )
+    if executor is None:
+        font = _ShardFont(glyf, glyphOrder)
+        _serialAddGvar(font, masterModel, masterTtfs, *args, **kwargs)  # type: ignore
+        return font['gvar'].variations
+
+    log.info('Generating gvar in %d shards', len(shards))
+    with executor, watch(executor):
+        futures = [
+            executor.submit(timing.inWorker, timing.parentId(), _gvarShard, shard)
+            for shard in shards
+        ]
+        results = [timing.workerResult(future) for future in futures]
+    variations = {}
+    for shardVariations, records in results:
+        variations.update(shardVariations)
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+    return variations
+
+
+def _entryKey(font, masterModel, args, kwargs) -> str:
+    """Cache entry of a variable font: its name and the variation setup"""
+    import hashlib
+    import sys
+    import fontTools
+
+    setup = (
+        sys.version_info[:2], fontTools.version, font['name'].getDebugName(6), font['name'].getDebugName(1),
+        masterModel.locations, masterModel.axisOrder, args, sorted(kwargs.items()),
+    )
+    return hashlib.sha256(repr(setup).encode('utf-8')).hexdigest()
+
+
+def _glyphKeys(glyphOrder: list[str], masterTtfs) -> dict[str, str]:
+    """Digests of the outlines (or component offsets) and metrics of each glyph in all masters"""
+    import hashlib
+
+    masters = [
+        (m['glyf'], m['hmtx'].metrics, getattr(m.get('vmtx'), 'metrics', None))
+        for m in masterTtfs
+    ]
+    keys = {}
+    for glyph in glyphOrder:
+        h = hashlib.sha256(glyph.encode('utf-8'))
+        for glyf, hMetrics, vMetrics in masters:
+            if (data := glyf._getCoordinatesAndControls(glyph, hMetrics, vMetrics)) is None:
+                h.update(b'-')
+                continue
+            coords, controls = data
+            h.update(repr((len(coords), controls.numberOfContours, controls.endPts, controls.components)).encode())
+            h.update(coords.array.tobytes())  # with phantom points from the metrics
+            if controls.flags is not None:
+                h.update(bytes(controls.flags))
+        keys[glyph] = h.hexdigest()
+    return keys
+
+
+def _fetch(cache: DirectoryCache, entryKey: str) -> dict[str, list]:
+    import marshal
+    from fontTools.ttLib.tables.TupleVariation import TupleVariation
+
+    if (data := cache.read(entryKey, '.gvar')) is None:
+        return {}
+    try:
+        entry = marshal.loads(data)
+    except (ValueError, EOFError, TypeError):  # broken
+        return {}
+    return {
+        key: [TupleVariation(dict(axes), list(coordinates)) for axes, coordinates in variations]
+        for key, variations in entry.items()
+    }
+
+
+def _store(cache: DirectoryCache, entryKey: str, variations: dict[str, list]):
+    # marshal is fast, and loads plain data only; the Python version is in the key
+    import marshal
+
+    scratchPath = cache.scratchPath(entryKey, '.gvar')
+    with open(scratchPath, 'wb') as f:
+        marshal.dump({
+            key: [(tuple(v.axes.items()), tuple(v.coordinates)) for v in glyphVariations]
+            for key, glyphVariations in variations.items()
+        }, f)
+    cache.commit(entryKey, '.gvar', scratchPath, replace=True)
+    cache.evict({entryKey})
+
+
+def _addGvar(font, masterModel, masterTtfs, *args, **kwargs):
+    """``varLib._add_gvar`` reusing cached glyphs and computing the rest in shards"""
+    from fontTools.ttLib import newTable
+
+    workers, cache = _settings.get()
+    workers = workers or os.cpu_count() or 1
+    if cache is None and workers == 1:
+        return _serialAddGvar(font, masterModel, masterTtfs, *args, **kwargs)  # type: ignore
+
+    glyphOrder = font.getGlyphOrder()
+    keys: dict[str, str] = {}
+    cached: dict[str, list] = {}
+    if cache is not None:
+        with timing.span('glyphCache.fetch'):
+            entryKey = _entryKey(font, masterModel, args, kwargs)
+            keys = _glyphKeys(glyphOrder, masterTtfs)
+            cached = _fetch(cache, entryKey)
+    dirty = [glyph for glyph in glyphOrder if keys.get(glyph) not in cached]
+    with timing.span('gvar', glyphs=len(dirty), cached=len(glyphOrder) - len(dirty)):
+        computed = _computeGvar(font['glyf'], dirty, masterModel, masterTtfs, args, kwargs, workers)
+    gvar = font['gvar'] = newTable('gvar')
+    for glyph in glyphOrder:  # in glyph order, as serially
+        if glyph in computed:
+            gvar.variations[glyph] = computed[glyph]
+        elif keys.get(glyph) in cached:
+            gvar.variations[glyph] = cached[keys[glyph]]
+    if cache is not None and (dirty or len(cached) != len(gvar.variations)):
+        with timing.span('glyphCache.store'):
+            _store(cache, entryKey, {keys[glyph]: gvar.variations[glyph] for glyph in gvar.variations})
+
+
+@contextmanager
+def compiling(workers: int | None = 1, cache: DirectoryCache | None = None):
+    """Speeds up glyph variations of variable fonts built in this process
+
+    Within the block, 'gvar' of a variable font built by fontTools (in
+    fontmake or ufo2ft called in this process) is computed in shards of
+    the glyph set by forked workers, and merged into the same table as
+    a serial build. Fonts with few glyphs are built serially. Once the
+last such block (of any thread) exits, fontTools builds as usual.
+
+    With ``cache``, the variations of each glyph are cached by its
+    outlines (or component offsets) and metrics in every master, and
+    only glyphs changed since the last build are computed. A composite
+    glyph does not depend on the outlines of its components in 'gvar',
+    so it is not computed again when they change.
+
+    :param workers: Optional. Number of worker processes; ``None`` \
+    means as many as the CPUs, ``1`` builds serially. Defaults to ``1``.
+    :param cache: Optional. Cache of glyph variations, one entry per \
+    variable font
+    """
+    global _serialAddGvar
+
+    import fontTools.varLib
+
+    with utils._patched(fontTools.varLib, '_add_gvar', _addGvar) as original:
+        _serialAddGvar = original
+        token = _settings.set((workers, cache))
+        try:
+            yield
+        finally:
+            _settings.reset(token)
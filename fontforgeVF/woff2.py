@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+from os import PathLike
+from typing import BinaryIO
+import threading
+
+
+_defaultQuality = 11  # of fontTools, which does not take another one
+_brotliLock = threading.Lock()
+
+
+class _BrotliQuality:
+    """Stands for the ``brotli`` module used by ``fontTools.ttLib.woff2``
+
+    fontTools always compresses with the default quality, so
+    ``compress()`` is wrapped to pass another one.
+    """
+
+    def __init__(self, brotli, quality: int):
+        self._brotli = brotli
+        self._quality = quality
+
+    def __getattr__(self, name):
+        return getattr(self._brotli, name)
+
+    def compress(self, data, **kwargs):
+        kwargs.setdefault('quality', self._quality)
+        return self._brotli.compress(data, **kwargs)
+
+
+@contextmanager
+def _brotliQuality(quality: int):
+    from fontTools.ttLib import woff2
+
+    if quality == _defaultQuality:
+        yield
+        return
+    with _brotliLock:  # the module is shared by all threads
+        brotli = woff2.brotli
+        woff2.brotli = _BrotliQuality(brotli, quality)
+        try:
+            yield
+        finally:
+            woff2.brotli = brotli
+
+
+def compress(
+    inputFile: str | PathLike | BinaryIO,
+    outputFile: str | PathLike | BinaryIO,
+    quality: int = _defaultQuality,
+    transformGlyf: bool = True
+):
+    """Compresses a TrueType font into WOFF2
+
+    :param inputFile: TrueType font to read. Path or file object.
+    :param outputFile: WOFF2 file to write. Path or file object. A path \
+    is replaced only when the file is completely written.
+    :param quality: Optional. Brotli quality from 0 (fastest) to 11 \
+    (smallest). Defaults to ``11``.
+    :param transformGlyf: Optional. If ``False``, 'glyf' and 'loca' \
+    tables are stored as they are, which is faster to encode but makes \
+    the file larger. Defaults to ``True``.
+    :raises ``ValueError``: ``quality`` is out of range
+
+    fontTools takes no quality, so another one than ``11`` is passed by
+    replacing the Brotli module of ``fontTools.ttLib.woff2`` during the
+    call. Such calls in this process are made one at a time;
+    ``compressAll`` makes them in forked processes instead.
+    """
+    from contextlib import nullcontext
+    from fontTools.ttLib import woff2
+    from .utils import _atomicOutput
+
+    if not 0 <= quality <= 11:
+        raise ValueError('Brotli quality must be between 0 and 11')
+    # A path is replaced only when completely written
+    isPath = isinstance(outputFile, (str, PathLike))
+    with _brotliQuality(quality), (_atomicOutput(outputFile) if isPath else nullcontext(outputFile)) as output:
+        woff2.compress(
+            inputFile, output,
+            transform_tables=woff2.woff2TransformedTableTags if transformGlyf else ())
+
+
+def decompress(inputFile: str | PathLike | BinaryIO, outputFile: str | PathLike | BinaryIO):
+    """Decompresses a WOFF2 font into TrueType
+
+    :param inputFile: WOFF2 file to read. Path or file object.
+    :param outputFile: TrueType font to write. Path or file object.
+    """
+    from fontTools.ttLib import woff2
+
+    woff2.decompress(inputFile, outputFile)
+
+
+def _compressTimed(inputFile, outputFile, quality: int, transformGlyf: bool):
+    from os.path import basename
+    from . import timing
+
+    with timing.span('woff2', file=basename(str(outputFile))):
+        compress(inputFile, outputFile, quality, transformGlyf)
+
+
+def compressAll(
+    jobs: list[tuple],
+    quality: int = _defaultQuality,
+    transformGlyf: bool = True
+):
+    """Compresses several fonts into WOFF2 concurrently
+
+    Each font is compressed in a forked process since the table
+    transforms in fontTools and Brotli are CPU-bound and hold the GIL.
+    So is a single font with another quality than ``11``, so that the
+    Brotli module of fontTools is never replaced in this process. Where
+    ``fork`` is unavailable they are compressed one by one.
+
+    :param jobs: List of ``(inputFile, outputFile)``. ``inputFile`` is a \
+    path or a picklable file object (e.g. ``io.BytesIO``); ``outputFile`` \
+    must be a path.
+    :param quality: Optional. Brotli quality. Defaults to ``11``.
+    :param transformGlyf: Optional. Transforms 'glyf' and 'loca' tables. \
+    Defaults to ``True``.
+    """
+    from . import timing
+    from .job import watch
+    from .utils import _forkExecutor
+
+    executor = None
+    if len(jobs) > 1 or (jobs and quality != _defaultQuality):
+        executor = _forkExecutor(len(jobs))
+    if executor is None:
+        for inputFile, outputFile in jobs:
+            _compressTimed(inputFile, outputFile, quality, transformGlyf)
+        return
+    with executor, watch(executor):
+        futures = [
+            executor.submit(
+                timing.inWorker, timing.parentId(),
+                _compressTimed, inputFile, outputFile, quality, transformGlyf)
+            for inputFile, outputFile in jobs
+        ]
+        for future in futures:
+            timing.workerResult(future)
@@ -0,0 +1,175 @@
+"""Scratch directories of exports and opens
+
+Scratch directories are made under a workspace root: the ``workspace``
+argument, the ``FONTFORGEVF_WORKSPACE`` environment variable, or a
+private directory of the user in the temporary directory of the system.
+A root on a RAM disk (e.g. ``/dev/shm``) keeps the intermediate UFOs
+off the disk.
+
+A scratch directory is removed by renaming it to a hidden name starting
+with ``.fontforgeVF-`` and ending with ``.trash``, which is instant, and
+deleting it in a background thread, as a UFO tree may have hundreds of
+thousands of files. What is left in the root (e.g. by a crash) is
+deleted the next time it is used.
+"""
+
+from os import PathLike
+import atexit
+import os
+import threading
+
+_envVar = 'FONTFORGEVF_WORKSPACE'
+_trashPrefix = '.fontforgeVF-'
+
+_removals: set[threading.Thread] = set()
+_removalsLock = threading.Lock()
+
+
+def configuredRoot(root: str | PathLike | None = None) -> str | None:
+    """Workspace root given as ``root`` or by the environment, or ``None``"""
+    if root is not None:
+        return os.path.expanduser(str(root))
+    if path := os.environ.get(_envVar):
+        return os.path.expanduser(path)
+    return None
+
+
+def workspaceRoot(root: str | PathLike | None = None) -> str:
+    """Directory to make scratch directories in"""
+    import tempfile
+
+    if configured := configuredRoot(root):
+        return configured
+    # Not shared with other users, nor with other programs emptying their trash
+    name = 'fontforgeVF-' + str(os.getuid()) if hasattr(os, 'getuid') else 'fontforgeVF'
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def _rmtree(paths: list[str]):
+    import shutil
+
+    try:
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+    finally:
+        with _removalsLock:
+            _removals.discard(threading.current_thread())
+
+
+def _removeInBackground(paths: list[str]):
+    if not paths:
+        return
+    thread = threading.Thread(target=_rmtree, args=(paths,), name='fontforgeVF cleanup', daemon=True)
+    with _removalsLock:
+        _removals.add(thread)
+    thread.start()
+
+
+def remove(path: str | PathLike):
+    """Removes a directory without waiting for it
+
+    The path is free to be used again as soon as this returns.
+    """
+    import shutil
+    import uuid
+
+    path = str(path).rstrip('/' + os.sep)
+    target = os.path.join(
+        os.path.dirname(path), _trashPrefix + os.path.basename(path) + '.' + uuid.uuid4().hex + '.trash')
+    try:
+        os.rename(path, target)
+    except FileNotFoundError:
+        return
+    except OSError:  # cannot be renamed (e.g. in use on Windows)
+        shutil.rmtree(path)
+        return
+    _removeInBackground([target])
+
+
+def _emptyTrash(root: str):
+    import glob
+
+    with _removalsLock:
+        if _removals:
+            return  # they may be deleting these
+    _removeInBackground(glob.glob(os.path.join(glob.escape(root), _trashPrefix + '*.trash')))
+
+
+def waitForRemovals(timeout: float | None = None) -> bool:
+    """Waits for directories being removed in the background; ``False`` on timeout"""
+    import time
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _removalsLock:
+            threads = list(_removals)
+        if not threads:
+            return True
+        for thread in threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                return False
+
+
+def _tryLock(path: str):
+    """Open lock file held exclusively, or ``None`` if another one holds it"""
+    try:
+        import fcntl
+    except ImportError:  # Windows: not reused
+        return None
+    f = open(path, 'a')
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class Workspace:
+    """Scratch directory, used like ``tempfile.TemporaryDirectory``
+
+    :param root: Optional. Workspace root; see ``workspaceRoot``.
+    :param name: Optional. Keeps the directory under this name, so that \
+    the next use with the same name reuses what is written in it. While \
+    another process or thread uses it, a new directory is made instead. \
+    Ignored unless the root is configured, so that kept directories do \
+    not pile up in the temporary directory of the system.
+    """
+
+    def __init__(self, root: str | PathLike | None = None, name: str | None = None):
+        import tempfile
+
+        self.root = workspaceRoot(root)
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        _emptyTrash(self.root)
+        self._lock = None
+        if name is not None and configuredRoot(root) is not None:
+            self._lock = _tryLock(os.path.join(self.root, name + '.lock'))
+        if self._lock is not None:
+            self.name = os.path.join(self.root, name)  # type: ignore
+            os.makedirs(self.name, exist_ok=True)
+        else:
+            self.name = tempfile.mkdtemp(prefix='fontforgeVF-', dir=self.root)
+
+    @property
+    def kept(self) -> bool:
+        return self._lock is not None
+
+    def cleanup(self):
+        """Releases a kept directory, or removes it in the background"""
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+        elif self.name is not None:
+            remove(self.name)
+        self.name = None  # type: ignore
+
+    def __enter__(self) -> str:
+        return self.name
+
+    def __exit__(self, *args):
+        self.cleanup()
+
+
+atexit.register(waitForRemovals)  # not to leave half-deleted trees behind
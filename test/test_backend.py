@@ -0,0 +1,81 @@
+import pytest
+
+
+@pytest.mark.parametrize(('backend', 'valid'), [
+    ('subprocess', True),
+    ('inprocess', True),
+    ('daemon', True),
+    ('spam', False),
+])
+def test_checkBackend(backend, valid):
+    from fontforgeVF.backend import checkBackend
+    if valid:
+        assert checkBackend(backend) == backend
+    else:
+        with pytest.raises(ValueError):
+            checkBackend(backend)
+
+
+def test_runInProcessError():
+    from subprocess import CalledProcessError
+    from fontforgeVF.backend import run
+    with pytest.raises(CalledProcessError) as e:
+        run(['fonttools', 'varLib.instancer', '/nonexistent/spam.ttf'], 'inprocess', capture=True)
+    assert e.value.returncode != 0
+    assert e.value.cmd[0] == 'fonttools'
+    assert 'spam.ttf' in e.value.stderr
+
+
+def test_socketPath(tmp_path, monkeypatch):
+    import os
+    from fontforgeVF import daemon
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    path = daemon.socketPath()
+    assert os.path.dirname(path) == str(tmp_path / 'fontforgeVF')
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+    os.chmod(os.path.dirname(path), 0o755)  # as made by another user to listen on
+    with pytest.raises(ConnectionError):
+        daemon.socketPath()
+
+
+def test_runInDaemonError(tmp_path, monkeypatch):
+    from subprocess import CalledProcessError
+    from fontforgeVF import daemon
+    from fontforgeVF.backend import run
+    if not daemon.isAvailable():
+        pytest.skip('daemon is unavailable')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    with pytest.raises(CalledProcessError) as e:
+        run(['fonttools', 'varLib.instancer', '/nonexistent/spam.ttf'], 'daemon', capture=True)
+    assert e.value.returncode != 0
+    assert 'spam.ttf' in e.value.stderr
+    # The worker would otherwise wait to be idle for a long time
+    import os
+    import signal
+    import socket
+    import struct
+    if hasattr(socket, 'SO_PEERCRED'):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(daemon.socketPath())
+            pid = struct.unpack('3i', conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))[0]
+        os.kill(pid, signal.SIGTERM)
+
+
+def test_runInDaemonUnavailable(monkeypatch):
+    import fontforge
+    from subprocess import CompletedProcess
+    from fontforgeVF import backend, daemon
+    if not daemon.isAvailable():
+        pytest.skip('daemon is unavailable')
+    warnings = []
+    monkeypatch.setattr(fontforge, 'logWarning', warnings.append, raising=False)
+
+    def connect(path):
+        raise ConnectionError('cannot start the build worker')
+
+    monkeypatch.setattr(daemon, 'socketPath', lambda: '/nonexistent/worker.sock')
+    monkeypatch.setattr(daemon, '_connect', connect)
+    monkeypatch.setattr(backend, '_runSubprocess', lambda cmd, capture: CompletedProcess(cmd, 0, '', 'spam'))
+    result = backend.run(['fontmake', '--version'], 'daemon', capture=True)
+    assert (result.args, result.stderr) == (['fontmake', '--version'], 'spam')
+    assert len(warnings) == 1 and 'cannot start the build worker' in warnings[0]
@@ -0,0 +1,92 @@
+import os
+import time
+
+
+def _store(cache, key, content):
+    scratchPath = cache.scratchPath(key, '.bin')
+    with open(scratchPath, 'w') as f:
+        f.write(content)
+    return cache.commit(key, '.bin', scratchPath)
+
+
+def test_lookup(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 1000)
+    assert cache.lookup('spam', '.bin') is None
+    path = _store(cache, 'spam', 'ham')
+    assert cache.lookup('spam', '.bin') == path
+    with open(path) as f:
+        assert f.read() == 'ham'
+
+
+def test_commitTwice(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 1000)
+    _store(cache, 'spam', 'ham')
+    path = _store(cache, 'spam', 'eggs')
+    with open(path) as f:
+        assert f.read() == 'ham'
+    assert [name for name in os.listdir(tmp_path) if '.tmp' in name] == []
+
+
+def test_evict(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 10)
+    for i, key in enumerate(['spam', 'ham', 'eggs']):
+        _store(cache, key, '12345')
+        os.utime(cache.path(key, '.bin') + '.size', (time.time() + i, time.time() + i))
+    cache.evict()
+    assert cache.lookup('spam', '.bin') is None
+    assert cache.lookup('ham', '.bin') is not None
+    assert cache.lookup('eggs', '.bin') is not None
+
+
+def test_evictKeep(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 0)
+    _store(cache, 'spam', '12345')
+    _store(cache, 'ham', '12345')
+    cache.evict({'spam'})
+    assert cache.lookup('spam', '.bin') is not None
+    assert cache.lookup('ham', '.bin') is None
+
+
+def test_fetchStore(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path / 'cache', 1000)
+    src = tmp_path / 'spam.ttf'
+    src.write_text('ham')
+    dest = tmp_path / 'eggs.ttf'
+    assert not cache.fetch('spam', '.ttf', dest)
+    assert not dest.exists()
+    cache.store('spam', '.ttf', src)
+    assert cache.fetch('spam', '.ttf', dest)
+    assert dest.read_text() == 'ham'
+    assert [name for name in os.listdir(tmp_path / 'cache') if '.tmp' in name] == []
+
+
+def test_read(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 1000)
+    assert cache.read('spam', '.bin') is None
+    _store(cache, 'spam', 'ham')
+    assert cache.read('spam', '.bin') == b'ham'
+
+
+def test_fetchStoreDirectory(tmp_path):
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path / 'cache', 1000)
+    src = tmp_path / 'spam.ufo'
+    (src / 'glyphs').mkdir(parents=True)
+    (src / 'glyphs' / 'A_.glif').write_text('ham')
+    dest = tmp_path / 'eggs.ufo'
+    (dest / 'glyphs').mkdir(parents=True)
+    (dest / 'glyphs' / 'B_.glif').write_text('left behind')
+    assert not cache.fetch('spam', '.ufo', dest)
+    cache.store('spam', '.ufo', src)
+    assert cache.fetch('spam', '.ufo', dest)
+    assert os.listdir(dest / 'glyphs') == ['A_.glif']
+    cache.maxSize = 0
+    cache.evict()  # the copy outlives the entry
+    assert cache.lookup('spam', '.ufo') is None
+    assert (dest / 'glyphs' / 'A_.glif').read_text() == 'ham'
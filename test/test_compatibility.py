@@ -0,0 +1,72 @@
+import fontforge
+import pytest
+
+
+def _font(points, anchor='top', extraGlyph=None):
+    font = fontforge.font()
+    font.fontname = 'Test-' + str(len(points))
+    pen = font.createChar(0x41, 'A').glyphPen()
+    pen.moveTo(points[0])
+    for p in points[1:]:
+        pen.lineTo(p)
+    pen.closePath()
+    pen = None
+    font.addLookup('mark', 'gpos_mark2base', (), (('mark', (('DFLT', ('dflt',)),)),))
+    font.addLookupSubtable('mark', 'mark-1')
+    font.addAnchorClass('mark-1', anchor)
+    font['A'].addAnchorPoint(anchor, 'base', 0, 0)
+    font.createChar(0x42, 'B').addReference('A')
+    if extraGlyph:
+        font.createChar(-1, extraGlyph)
+    return font
+
+
+@pytest.mark.parametrize(('points', 'anchor', 'extraGlyph', 'errors', 'warnings'), [
+    ([(0, 0), (0, 10), (10, 10), (10, 0)], 'top', None, 0, 0),
+    ([(0, 0), (0, 10), (10, 0)], 'top', None, 2, 0),  # number and types of points
+    ([(0, 0), (0, 10), (10, 10), (10, 0)], 'bottom', None, 1, 0),
+    ([(0, 0), (0, 10), (10, 10), (10, 0)], 'top', 'spam', 0, 1),
+])
+def test_checkCompatibility(points, anchor, extraGlyph, errors, warnings):
+    from fontforgeVF.compatibility import checkCompatibility
+    default = _font([(0, 0), (0, 20), (20, 20), (20, 0)])
+    master = _font(points, anchor, extraGlyph)
+    try:
+        result = checkCompatibility(default, [default, master])
+        assert len(result[0]) == errors
+        assert len(result[1]) == warnings
+        assert all(line.startswith("'A'") for line in result[0])
+    finally:
+        default.close()
+        master.close()
+
+
+@pytest.mark.parametrize(('defaultEmpty', 'masterEmpty', 'errors'), [
+    (False, True, 0),  # sparse master
+    (True, True, 0),
+    (True, False, 3),  # contours, points and point types
+])
+def test_emptyGlyph(defaultEmpty, masterEmpty, errors):
+    from fontforgeVF.compatibility import checkCompatibility
+    default = _font([(0, 0), (0, 20), (20, 20), (20, 0)])
+    master = _font([(0, 0), (0, 20), (20, 20), (20, 0)])
+    try:
+        for font, empty in ((default, defaultEmpty), (master, masterEmpty)):
+            if empty:
+                font['A'].foreground = fontforge.layer()
+        assert len(checkCompatibility(default, [default, master])[0]) == errors
+    finally:
+        default.close()
+        master.close()
+
+
+def test_glyphNames():
+    from fontforgeVF.compatibility import checkCompatibility
+    default = _font([(0, 0), (0, 20), (20, 20), (20, 0)])
+    master = _font([(0, 0), (0, 10), (10, 0)], extraGlyph='spam')
+    try:
+        assert checkCompatibility(default, [default, master], {'B'}) == ([], [])
+        assert len(checkCompatibility(default, [default, master], {'A', 'spam'})[0]) == 2
+    finally:
+        default.close()
+        master.close()
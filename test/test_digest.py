@@ -0,0 +1,18 @@
+import fontforge
+import pytest
+
+
+@pytest.mark.parametrize(('name', 'value'), [
+    ('os2_use_typo_metrics', True),
+    ('os2_unicoderanges', (3, 0, 0, 0)),
+    ('gasp', ((8, ('antialias',)), (65535, ('gridfit', 'antialias')))),
+    ('creationtime', 1700000000),
+    ('xHeight', 500),
+])
+def test_fontDigest(name, value):
+    from fontforgeVF.digest import fontDigest
+    font = fontforge.font()
+    font.createChar(0x41, 'A')
+    before = fontDigest(font)
+    setattr(font, name, value)
+    assert fontDigest(font) != before
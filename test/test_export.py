@@ -183,3 +183,334 @@ def test_hasBothRomanAndItalic(italic1, italic2, expected):
     finally:
         font1.close()
         font2.close()
+
+
+@pytest.mark.parametrize('workers', [1, 2, None])
+def test_runUfoJobs(tmp_path, monkeypatch, workers):
+    import os
+    from types import SimpleNamespace
+    from fontforgeVF import export, timing
+
+    def outputUfo(font, outputDir, outputFile, aalt, writer, glyphNames, threads):
+        with open(os.path.join(outputDir, outputFile), 'w') as f:
+            f.write(font.fontname + ' ' + str(os.getpid()))
+
+    monkeypatch.setattr(export, '_outputUfo', outputUfo)  # seen by forked workers
+    fonts = [SimpleNamespace(fontname=name) for name in ('Test-Regular', 'Test-Bold', 'Test-Black')]
+    jobs = [(i, str(tmp_path), 'source' + str(i + 1) + '.ufo') for i in range(len(fonts))]
+    with timing.trace() as trace:
+        export._runUfoJobs(fonts, jobs, False, workers, 'native')
+    written = [(tmp_path / outputFile).read_text().split() for i, outputDir, outputFile in jobs]
+    assert [name for name, pid in written] == [f.fontname for f in fonts]
+    assert all(pid == str(os.getpid()) for name, pid in written) == (workers == 1)
+    assert len([s for s in trace.spans if s['name'] == 'outputUfo']) == len(fonts)
+    assert export._poolSourceFonts == []  # only the workers have them
+
+
+@pytest.mark.parametrize(('italicFilename', 'expected'), [
+    ('Test-Italic.ttf', {'roman': 0, 'italic': 1}),
+    (None, {'roman': 0}),
+])
+def test_makeDesignSpaceItalic(tmp_path, italicFilename, expected):
+    import os
+    from fontTools.designspaceLib import DesignSpaceDocument, DiscreteAxisDescriptor
+    from fontTools.designspaceLib.split import splitVariableFonts
+    from fontforgeVF.export import _exportOutputs, _makeDesignSpace, _setUfoPath
+    try:
+        font1, font2 = _axisMinMaxTestFonts()
+        font2.italicangle = -10
+        _setUfoPath(font1, str(tmp_path / 'roman.ufo'))
+        _setUfoPath(font2, str(tmp_path / 'italic.ufo'))
+        variableFonts, outputs = _exportOutputs(font1, 'Test.ttf', italicFilename)
+        assert variableFonts == expected
+        assert outputs == {'roman': ['Test.ttf'], 'italic': [italicFilename]} if italicFilename else {'roman': ['Test.ttf']}
+        _makeDesignSpace(font1, tmp_path, 'vf.designspace', variableFonts)
+        doc = DesignSpaceDocument.fromfile(tmp_path / 'vf.designspace')
+        italic = [a for a in doc.axes if a.tag == 'ital'][0]
+        assert isinstance(italic, DiscreteAxisDescriptor)
+        assert italic.values == [0, 1]
+        assert {
+            vf.name: {s.name: getattr(s, 'userValue', None) for s in vf.axisSubsets}
+            for vf in doc.getVariableFonts()
+        } == {name: {italic.name: value, 'Weight': None} for name, value in expected.items()}
+        assert {
+            name: [os.path.basename(s.filename) for s in subDoc.sources]
+            for name, subDoc in splitVariableFonts(doc)
+        } == {name: [name + '.ufo'] for name in expected}
+    finally:
+        font1.close()
+        font2.close()
+
+
+def test_fixTtf(tmp_path):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    from fontTools.ttLib import TTFont
+    from fontforgeVF.export import _fixTtf
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef'])
+    fb.setupCharacterMap({})
+    fb.setupGlyf({'.notdef': TTGlyphPen(None).glyph()})
+    fb.setupHorizontalMetrics({'.notdef': (500, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'TestFamily', 'styleName': 'Regular'})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.setupFvar([('wght', 100, 400, 900, 'Weight')], [])
+    fb.setupStat([{'tag': 'wght', 'name': 'Weight', 'values': [{'value': 400, 'name': 'Regular'}]}])
+    fb.save(str(tmp_path / 'test.ttf'))
+    original = TTFont(tmp_path / 'test.ttf')
+    font = fontforge.font()
+    try:
+        font.familyname = "TestFamily"
+        font.appendSFNTName(0x407, 'Family', 'Testfamilie')
+        _fixTtf(font, tmp_path / 'test.ttf')
+    finally:
+        font.close()
+    with TTFont(tmp_path / 'test.ttf') as ttf:
+        assert str(ttf['name'].getName(1, 3, 1, 0x407)) == 'Testfamilie'
+        for tag in original.keys():
+            if tag not in ('GlyphOrder', 'head', 'name'):
+                assert ttf.reader[tag] == original.reader[tag]
+    original.close()
+
+
+def _statMaster(weight):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef', 'A'])
+    fb.setupCharacterMap({0x41: 'A'})
+    glyphs = {'.notdef': TTGlyphPen(None).glyph()}
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 700))
+    pen.lineTo((weight // 4, 700))
+    pen.lineTo((weight // 4, 0))
+    pen.closePath()
+    glyphs['A'] = pen.glyph()
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({'.notdef': (500, 0), 'A': (600, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'TestFamily', 'styleName': 'Regular'})
+    fb.setupOS2()
+    fb.setupPost()
+    return fb.font
+
+
+def _statDesignSpace(axisName, labels, instances):
+    from fontTools.designspaceLib import AxisLabelDescriptor, DesignSpaceDocument, RangeAxisSubsetDescriptor
+    doc = DesignSpaceDocument()
+    doc.addAxisDescriptor(
+        name='Weight', tag='wght', minimum=400, default=400, maximum=700,
+        labelNames={'en': axisName},
+        axisLabels=[AxisLabelDescriptor(name=name, userValue=value) for value, name in labels.items()])
+    for weight in (400, 700):
+        doc.addSourceDescriptor(font=_statMaster(weight), familyName='TestFamily', location={'Weight': weight})
+    for name, weight in instances.items():
+        doc.addInstanceDescriptor(styleName=name, familyName='TestFamily', designLocation={'Weight': weight})
+    doc.addVariableFontDescriptor(
+        name='vf', filename='vf.ttf', axisSubsets=[RangeAxisSubsetDescriptor(name='Weight')])
+    return doc
+
+
+@pytest.mark.parametrize(('axisName', 'labels', 'instances'), [
+    ('Heaviness', {400: 'Regular', 700: 'Heavy'}, {'Regular': 400, 'Heavy': 700}),
+    ('Weight', {}, {'Regular': 400}),
+    ('Weight', {400: 'Regular', 550: 'Medium', 700: 'Bold'}, {}),
+])
+def test_rebuildVariationTables(axisName, labels, instances):
+    from fontTools import varLib
+    from fontforgeVF.export import _rebuildVariationTables
+    ttf = varLib.build_many(
+        _statDesignSpace('Weight', {400: 'Regular', 700: 'Bold'}, {'Regular': 400, 'Bold': 700}))['vf']
+    doc = _statDesignSpace(axisName, labels, instances)
+    expected = varLib.build_many(doc)['vf']
+    assert _rebuildVariationTables(ttf, doc, 'vf')
+    for tag in ('name', 'fvar', 'STAT'):
+        assert ttf[tag].compile(ttf) == expected[tag].compile(expected)
+
+
+@pytest.mark.parametrize('missing', ['_add_fvar', 'load_designspace'])
+def test_rebuildVariationTablesChanged(monkeypatch, missing):
+    from fontTools import varLib
+    from fontforgeVF.export import _rebuildVariationTables
+    doc = _statDesignSpace('Weight', {400: 'Regular', 700: 'Bold'}, {'Regular': 400, 'Bold': 700})
+    ttf = varLib.build_many(doc)['vf']
+    monkeypatch.delattr(varLib, missing)  # as if fontTools has changed
+    assert not _rebuildVariationTables(ttf, doc, 'vf')
+
+
+@pytest.mark.parametrize(('options', 'expected'), [
+    ([], {}),
+    (['-f'], {'flattenComponents': True}),
+    (['--no-production-names', '--no-optimize-gvar'], {'useProductionNames': False, 'optimizeGvar': False}),
+    (['--filter', 'DecomposeTransformedComponentsFilter'], {'filters': ['DecomposeTransformedComponentsFilter']}),
+    (['--spam'], None),
+])
+def test_ufo2ftOptions(options, expected):
+    from fontforgeVF.export import _ufo2ftOptions
+    if expected is None:
+        with pytest.raises(ValueError):
+            _ufo2ftOptions(options)
+        return
+    kwargs = _ufo2ftOptions(options)
+    if 'filters' in kwargs:
+        kwargs['filters'] = [type(f).__name__ for f in kwargs['filters']]
+    assert kwargs == expected
+
+
+def _ufoDesignSpace():
+    from fontTools.designspaceLib import DesignSpaceDocument, RangeAxisSubsetDescriptor
+    from ufoLib2 import Font
+    doc = DesignSpaceDocument()
+    doc.addAxisDescriptor(name='Weight', tag='wght', minimum=400, default=400, maximum=700)
+    for weight in (400, 700):
+        ufo = Font()
+        ufo.info.familyName = 'TestFamily'
+        ufo.info.styleName = 'Regular' if weight == 400 else 'Bold'
+        ufo.info.unitsPerEm = 1000
+        for name in ('.notdef', 'A'):
+            glyph = ufo.newGlyph(name)
+            glyph.width = 600
+            pen = glyph.getPen()
+            pen.moveTo((0, 0))
+            pen.lineTo((0, 700))
+            pen.lineTo((weight // 4, 700))
+            pen.lineTo((weight // 4, 0))
+            pen.closePath()
+        ufo['A'].unicode = 0x41
+        doc.addSourceDescriptor(font=ufo, familyName='TestFamily', location={'Weight': weight})
+    doc.addVariableFontDescriptor(
+        name='vf', filename='vf.ttf', axisSubsets=[RangeAxisSubsetDescriptor(name='Weight')])
+    return doc
+
+
+def test_doExportVFInMemory(tmp_path):
+    from types import SimpleNamespace
+    from fontTools.ttLib import TTFont
+    from fontforgeVF.export import _doExportVFInMemory
+    font = SimpleNamespace(sfnt_names=(), persistent=None)  # metadata only, as in a background build
+    outputs = {'vf': [tmp_path / 'vf.ttf', tmp_path / 'vf.woff2']}
+    doc = _ufoDesignSpace()
+    _doExportVFInMemory(font, outputs, doc)
+    assert [source.font for source in doc.sources] == [None, None]  # released
+    with TTFont(tmp_path / 'vf.ttf') as ttf:
+        assert [a.axisTag for a in ttf['fvar'].axes] == ['wght']
+        assert ttf['gvar'].variations['A']
+    with TTFont(tmp_path / 'vf.woff2') as ttf:
+        assert ttf.flavor == 'woff2'
+        assert ttf.getGlyphOrder() == ['.notdef', 'A']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_makeStaticInstances(tmp_path, workers):
+    import os
+    from fontTools import varLib
+    from fontTools.ttLib import TTFont
+    from fontforgeVF.export import _makeStaticInstances
+    vf = varLib.build_many(_statDesignSpace('Weight', {}, {'Regular': 400, 'Bold': 700}))['vf']
+    vf.save(tmp_path / 'vf.ttf')
+    paths = _makeStaticInstances({'vf': [tmp_path / 'vf.ttf'], 'italic': []}, tmp_path / 'static', workers)
+    assert [os.path.basename(path) for path in paths] == ['TestFamily-Regular.ttf', 'TestFamily-Bold.ttf']
+    for path, weight in zip(paths, (400, 700)):
+        with TTFont(path) as ttf:
+            assert 'fvar' not in ttf
+            assert ttf['glyf']['A'].xMax == weight // 4
+
+
+@pytest.mark.parametrize(('filename', 'expected'), [
+    (None, []),
+    ('spam.ttf', ['spam.ttf']),
+    (('spam.ttf', 'spam.woff2'), ['spam.ttf', 'spam.woff2']),
+    ([], None),
+    ((), None),
+    (['spam.otf'], None),
+])
+def test_targets(filename, expected):
+    from fontforgeVF.export import _targets
+    if expected is None:
+        with pytest.raises(ValueError):
+            _targets(filename)
+    else:
+        assert _targets(filename) == expected
+
+
+@pytest.mark.parametrize(('profile', 'decompose', 'expected'), [
+    ('release', False, []),
+    ('release', True, ['-f', '--filter', 'DecomposeTransformedComponentsFilter']),
+    ('dev', False, ['--no-production-names', '--no-optimize-gvar']),
+])
+def test_fontmakeOptions(profile, decompose, expected):
+    from fontforgeVF.export import _fontmakeOptions
+    assert _fontmakeOptions(decompose, decompose, profile) == expected
+
+
+@pytest.mark.parametrize(('profile', 'quality', 'expected'), [
+    ('release', None, 11),
+    ('dev', None, 4),
+    ('dev', 9, 9),
+    ('release', 12, None),
+])
+def test_woff2Options(profile, quality, expected):
+    from fontforgeVF.export import _woff2Options
+    if expected is None:
+        with pytest.raises(ValueError):
+            _woff2Options(quality, True, profile)
+        return
+    assert _woff2Options(quality, True, profile) == {'quality': expected, 'transformGlyf': True}
+
+
+def test_markDevBuild():
+    from fontTools.fontBuilder import FontBuilder
+    from fontforgeVF.export import _markDevBuild
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupNameTable({'familyName': 'TestFamily', 'styleName': 'Regular', 'version': 'Version 1.000'})
+    _markDevBuild(fb.font)
+    assert fb.font['name'].getDebugName(5) == 'Version 1.000 (development build)'
+
+
+@pytest.mark.parametrize(('profiles', 'saved', 'message'), [
+    (['dev'], None, 'no release build to compare with'),
+    (['release', 'dev'], 2.0, 'against the last release build'),
+    (['release'], None, None),
+])
+def test_recordBuildTime(caplog, profiles, saved, message):
+    import logging
+    from types import SimpleNamespace
+    from fontforgeVF.export import _recordBuildTime
+    font = SimpleNamespace(temporary=None)
+    with caplog.at_level(logging.INFO, logger='fontforgeVF.export'):
+        for profile, elapsed in zip(profiles, (3.0, 1.0)):
+            result = _recordBuildTime(font, profile, elapsed)
+    assert result == (elapsed, saved)
+    assert (font.temporary['VF.lastBuildTime'], font.temporary['VF.lastBuildSaving']) == result
+    messages = [record.getMessage() for record in caplog.records]
+    if message is None:
+        assert messages == []
+    else:
+        assert len(messages) == 1 and message in messages[0]
+        assert caplog.records[0].levelno == logging.INFO
+
+
+@pytest.mark.parametrize(('subset', 'expected'), [
+    (['B'], {'.notdef', 'A', 'B'}),
+    ([0x43], {'.notdef', 'A', 'B', 'C'}),
+    (range(0x41, 0x42), {'.notdef', 'A'}),
+    (['spam'], None),
+])
+def test_glyphSubset(subset, expected):
+    from fontforgeVF.export import _glyphSubset
+    try:
+        font = fontforge.font()
+        font.createChar(0x41, 'A')
+        font.createChar(0x42, 'B').addReference('A')
+        font.createChar(0x43, 'C').addReference('B')
+        font.createChar(0x44, 'D')
+        if expected is None:
+            with pytest.raises(ValueError):
+                _glyphSubset([font], subset)
+        else:
+            assert _glyphSubset([font], subset) == expected
+    finally:
+        font.close()
@@ -0,0 +1,161 @@
+import pytest
+
+
+def _fixAalt(text, includeTags=()):
+    import io
+    from fontforgeVF.features import fixAalt
+    dest = io.StringIO()
+    fixAalt(io.StringIO(text), dest, includeTags)
+    return dest.getvalue()
+
+
+def test_moveAalt():
+    text = (
+        'languagesystem DFLT dflt;\n'
+        '\n'
+        'feature liga {\n'
+        '  script latn;\n'
+        '  sub f i by f_i;\n'
+        '} liga;\n'
+        '\n'
+        'feature aalt {\n'
+        '  script latn;\n'
+        '     language dflt ;\n'
+        '  sub a from [a.alt];\n'
+        '} aalt;\n'
+    )
+    assert _fixAalt(text) == (
+        'languagesystem DFLT dflt;\n'
+        '\n'
+        'feature aalt {\n'
+        '  sub a from [a.alt];\n'
+        '} aalt;\n'
+        '\n'
+        'feature liga {\n'
+        '  script latn;\n'
+        '  sub f i by f_i;\n'
+        '} liga;\n'
+        '\n'
+    )
+
+
+@pytest.mark.parametrize('includeTags, expected', [
+    ((), ''),
+    (('smcp', 'aalt', 'liga'), 'feature aalt {\n  feature liga;\n  feature smcp;\n} aalt;\n\n'),
+])
+def test_includeTags(includeTags, expected):
+    text = 'feature liga {\n  sub f i by f_i;\n} liga;\n'
+    assert _fixAalt(text, includeTags) == expected + text
+
+
+def test_commentsAndStrings():
+    text = (
+        '# feature aalt { script latn; } aalt;\n'
+        'feature ss01 {\n'
+        '  featureNames { name "feature aalt {\n'
+        '    } aalt;"; };\n'
+        '  sub a by a.ss01; # }\n'
+        '} ss01;\n'
+    )
+    assert _fixAalt(text) == text
+    assert _fixAalt(text, ['ss01']) == (
+        '# feature aalt { script latn; } aalt;\n'
+        'feature aalt {\n  feature ss01;\n} aalt;\n\n' + text.split('\n', 1)[1]
+    )
+
+
+def test_noFeatureBlock():
+    text = '@upper = [A B C];\nlookup spam {\n  sub a by b;\n} spam;\n'
+    assert _fixAalt(text, ['liga']) == text
+
+
+def test_largeFile(monkeypatch):
+    from fontforgeVF import features
+    monkeypatch.setattr(features, '_spoolSize', 1024)
+    block = ''.join('feature s{0:03} {{\n  sub a by a.s{0:03};\n}} s{0:03};\n'.format(i) for i in range(200))
+    text = block + 'feature aalt {\n  sub a from [a.alt];\n} aalt;\n'
+    assert _fixAalt(text) == 'feature aalt {\n  sub a from [a.alt];\n} aalt;\n\n' + block
+
+
+_features = (
+    'languagesystem DFLT dflt;\n'
+    'feature liga {\n'
+    '  sub f i by f_i;\n'
+    '} liga;\n'
+    'feature ss01 {\n'
+    '  featureNames { name "Alternate"; };\n'
+    '  sub a by a.alt;\n'
+    '} ss01;\n'
+    'feature kern {\n'
+    '  pos f i -%d;\n'
+    '} kern;\n'
+)
+
+
+def _compileVariable(cache, kerning):
+    import io
+    import ufo2ft
+    from fontTools.designspaceLib import DesignSpaceDocument
+    from ufoLib2 import Font
+    from fontforgeVF.features import compiling
+    doc = DesignSpaceDocument()
+    doc.addAxisDescriptor(name='Weight', tag='wght', minimum=400, default=400, maximum=700)
+    for weight, kern in zip((400, 700), kerning):
+        ufo = Font()
+        ufo.info.familyName = 'Spam'
+        ufo.info.styleName = str(weight)
+        ufo.info.unitsPerEm = 1000
+        for name in ('.notdef', 'a', 'a.alt', 'f', 'i', 'f_i'):
+            glyph = ufo.newGlyph(name)
+            glyph.width = 500
+            pen = glyph.getPen()
+            pen.moveTo((0, 0))
+            pen.lineTo((0, 500))
+            pen.lineTo((weight // 10, 500))
+            pen.closePath()
+        ufo['a'].unicode = 0x61
+        ufo.features.text = _features % kern
+        doc.addSourceDescriptor(font=ufo, location={'Weight': weight})
+    with compiling(cache):
+        vf = ufo2ft.compileVariableTTF(doc)
+    vf.recalcTimestamp = False
+    vf['head'].created = vf['head'].modified = 0
+    data = io.BytesIO()
+    vf.save(data)
+    return data.getvalue()
+
+
+@pytest.mark.parametrize(('kerning', 'compiled'), [
+    ((20, 40), 2),
+    ((20, 20), 1),  # shared by the masters
+])
+def test_compiling(tmp_path, monkeypatch, kerning, compiled):
+    from ufo2ft.featureCompiler import FeatureCompiler
+    from fontforgeVF.cache import DirectoryCache
+    expected = _compileVariable(None, kerning)
+    calls = []
+    serial = FeatureCompiler.buildTables
+
+    def counting(compiler):
+        calls.append(compiler)
+        return serial(compiler)
+
+    monkeypatch.setattr(FeatureCompiler, 'buildTables', counting)
+    cache = DirectoryCache(tmp_path, 1024 ** 3)
+    assert _compileVariable(cache, kerning) == expected
+    assert len(calls) == compiled
+    assert _compileVariable(cache, kerning) == expected
+    assert len(calls) == compiled
+    assert FeatureCompiler.buildTables is counting
+
+
+@pytest.mark.parametrize(('text', 'expected'), [
+    (_features % 20, True),
+    ('', False),
+    ('include(spam.fea);\n', False),
+    ('table OS/2 {\n  FSType 0;\n} OS/2;\n', False),
+    ('table GDEF {\n  GlyphClassDef [a], , , ;\n} GDEF;\n', True),
+])
+def test_cacheable(text, expected):
+    from fontforgeVF.features import _cacheable
+    assert _cacheable(text) == expected
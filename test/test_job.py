@@ -0,0 +1,69 @@
+import pytest
+
+
+def test_progress():
+    from fontforgeVF import timing
+    from fontforgeVF.job import ExportJob
+    events = []
+    job = ExportJob(progress=lambda event, name, args: events.append((event, name, args)))
+    with timing.trace(), job._running():
+        with timing.span('spam', master='Regular'):
+            with timing.span('ham'):
+                pass
+    assert events == [
+        ('start', 'spam', {'master': 'Regular'}),
+        ('start', 'ham', {}),
+        ('end', 'ham', {}),
+        ('end', 'spam', {'master': 'Regular'}),
+    ]
+
+
+def test_cancelBeforeStage():
+    from fontforgeVF import timing
+    from fontforgeVF.job import Cancelled, ExportJob
+    job = ExportJob()
+    ran = []
+    with timing.trace(), job._running():
+        with timing.span('spam'):
+            job.cancel()
+            with pytest.raises(Cancelled):
+                with timing.span('ham'):
+                    ran.append('ham')
+    assert not ran
+    assert isinstance(job._error(ValueError()), Cancelled)
+
+
+def test_cancelKillsProcess():
+    import subprocess
+    import sys
+    import threading
+    import time
+    from fontforgeVF.job import ExportJob, watch
+    job = ExportJob()
+    start = time.monotonic()
+    with job._running():
+        with subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']) as process:
+            with watch(process):
+                threading.Timer(0.2, job.cancel).start()
+                process.wait()
+    assert process.returncode != 0
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_background(fail):
+    from fontforgeVF.job import ExportJob
+    job = ExportJob(background=True)
+    delivered = []
+
+    def func():
+        if fail:
+            raise ValueError('spam')
+        return {'seconds': 0, 'spans': []}
+
+    job._start(func, lambda job: delivered.append(job.error))
+    assert job.wait(10)
+    assert job.poll() and job.poll()
+    assert len(delivered) == 1
+    assert isinstance(job.error, ValueError) == fail
+    assert (job.report is None) == fail
@@ -0,0 +1,49 @@
+import pytest
+
+
+def test_usage():
+    import subprocess
+    import sys
+    from fontforgeVF import memory
+    if not memory.isAvailable():
+        pytest.skip('/proc is unavailable')
+    before = memory.usage()
+    code = 'import sys, time; x = bytearray(64 << 20); x[::4096] = b"x" * len(x[::4096]); print(); time.sleep(30)'
+    with subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE) as process:
+        process.stdout.readline()  # allocated
+        try:
+            assert memory.usage() - before > 60 << 20
+            assert memory.usage(process.pid) > 60 << 20
+        finally:
+            process.kill()
+
+
+def test_limitMemory():
+    from fontforgeVF import memory, timing
+    from fontforgeVF.job import ExportJob
+    if not memory.isAvailable():
+        pytest.skip('/proc is unavailable')
+    job = ExportJob()
+    with timing.trace(), job._running():
+        job._limitMemory(1)  # exceeded at once
+        with pytest.raises(MemoryError):
+            with timing.span('spam'):
+                pass
+    assert isinstance(job._error(ValueError()), MemoryError)
+    job._finish({'seconds': 0, 'spans': []})
+    assert job.report['peakMemory'] > 1
+
+
+@pytest.mark.parametrize('workers, budget, perWorker, used, expected', [
+    (4, 1000, 100, 200, 4),
+    (4, 1000, 300, 200, 2),
+    (4, 1000, 300, 900, 1),  # one even if the budget is tight
+    (4, 1000, 300, 2000, 1),
+    (None, 1000, 0, 0, None),  # as many as CPUs
+])
+def test_boundedWorkers(workers, budget, perWorker, used, expected):
+    import os
+    from fontforgeVF import memory
+    if expected is None:
+        expected = os.cpu_count() or 1
+    assert memory.boundedWorkers(workers, budget, perWorker, used) == expected
@@ -0,0 +1,59 @@
+import pytest
+
+
+def test_spanWithoutTrace():
+    from fontforgeVF import timing
+    with timing.span('spam'):
+        pass
+    assert timing.parentId() is None
+
+
+def test_report():
+    from fontforgeVF import timing
+    with timing.trace() as trace:
+        with timing.span('spam', master='Regular'):
+            with timing.span('ham'):
+                pass
+            with timing.span('eggs'):
+                pass
+    report = trace.report()
+    assert [s['name'] for s in report['spans']] == ['spam']
+    spam = report['spans'][0]
+    assert spam['args'] == {'master': 'Regular'}
+    assert [s['name'] for s in spam['children']] == ['ham', 'eggs']
+    assert report['seconds'] == spam['seconds'] >= sum(s['seconds'] for s in spam['children'])
+
+
+def _work(x):
+    from fontforgeVF import timing
+    with timing.span('work'):
+        return x * 2
+
+
+def test_inWorker():
+    from fontforgeVF import timing
+    from fontforgeVF.utils import _forkExecutor
+    executor = _forkExecutor(2)
+    if executor is None:
+        pytest.skip('fork is unavailable')
+    with timing.trace() as trace:
+        with timing.span('spam'):
+            with executor:
+                futures = [executor.submit(timing.inWorker, timing.parentId(), _work, x) for x in (1, 2)]
+                assert [timing.workerResult(future) for future in futures] == [2, 4]
+    spam = trace.report()['spans'][0]
+    assert [s['name'] for s in spam['children']] == ['work', 'work']
+
+
+def test_writeChromeTrace(tmp_path):
+    import json
+    from fontforgeVF import timing
+    with timing.trace() as trace:
+        with timing.span('spam'):
+            with timing.span('ham'):
+                pass
+    trace.writeChromeTrace(tmp_path / 'trace.json')
+    with open(tmp_path / 'trace.json', encoding='utf-8') as f:
+        events = json.load(f)['traceEvents']
+    assert {e['name'] for e in events} == {'spam', 'ham'}
+    assert all(e['ph'] == 'X' and e['ts'] >= 0 and e['dur'] >= 0 for e in events)
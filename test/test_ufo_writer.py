@@ -0,0 +1,89 @@
+import fontforge
+import pytest
+
+
+@pytest.mark.parametrize(('anchor', 'expected'), [
+    (('top', 'base', 10, 20), {'name': 'top', 'x': 10, 'y': 20}),
+    (('top', 'basemark', 10, 20), {'name': 'top', 'x': 10, 'y': 20}),
+    (('top', 'mark', 10, 20), {'name': '_top', 'x': 10, 'y': 20}),
+    (('top', 'ligature', 10, 20, 1), {'name': 'top_2', 'x': 10, 'y': 20}),
+    (('cursive', 'entry', 10, 20), {'name': 'entry.cursive', 'x': 10, 'y': 20}),
+])
+def test_anchorRecord(anchor, expected):
+    from fontforgeVF.ufo_writer import _anchorRecord
+    assert _anchorRecord(anchor) == expected
+
+
+@pytest.mark.parametrize(('version', 'expected'), [
+    ('1.000', (1, 0)),
+    ('2.5', (2, 5)),
+    ('3', (3, 0)),
+    ('Version 1.0', (0, 0)),
+    ('', (0, 0)),
+])
+def test_versionNumbers(version, expected):
+    from fontforgeVF.ufo_writer import _versionNumbers
+    assert _versionNumbers(version) == expected
+
+
+@pytest.mark.parametrize(('points', 'closed', 'expected'), [
+    (
+        [(0, 0, True), (0, 100, True), (100, 100, True)], True,
+        ((0, 0, 'line'), (0, 100, 'line'), (100, 100, 'line')),
+    ),
+    (
+        [(0, 0, True), (0, 100, True), (100, 100, True)], False,
+        ((0, 0, 'move'), (0, 100, 'line'), (100, 100, 'line')),
+    ),
+    (
+        [(0, 0, True), (0, 50, False), (50, 100, False), (100, 100, True), (100, 50, False), (50, 0, False)], True,
+        ((0, 0, 'curve'), (0, 50, None), (50, 100, None), (100, 100, 'curve'), (100, 50, None), (50, 0, None)),
+    ),
+])
+def test_contourRecord(points, closed, expected):
+    from fontforgeVF.ufo_writer import _contourRecord
+    contour = fontforge.contour()
+    for x, y, onCurve in points:
+        contour += fontforge.point(x, y, onCurve)
+    contour.closed = closed
+    assert _contourRecord(contour) == expected
+
+
+@pytest.mark.parametrize('key', [
+    'openTypeOS2Selection',
+    'openTypeOS2FamilyClass',
+    'openTypeOS2UnicodeRanges',
+    'openTypeOS2CodePageRanges',
+    'openTypeGaspRangeRecords',
+    'openTypeHeadCreated',
+    'openTypeHheaAscender',
+    'openTypeHheaDescender',
+    'openTypeOS2TypoAscender',
+    'openTypeOS2TypoDescender',
+    'openTypeOS2WinAscent',
+    'openTypeOS2WinDescent',
+])
+def test_fontInfo(tmp_path, key):
+    import plistlib
+    from fontforgeVF.ufo_writer import writeUfo
+    font = fontforge.font()
+    font.familyname = 'Test'
+    font.fontname = 'Test-Regular'
+    pen = font.createChar(0x41, 'A').glyphPen()  # beyond the ascent and descent
+    pen.moveTo((0, -300))
+    pen.lineTo((0, 900))
+    pen.lineTo((500, 900))
+    pen.closePath()
+    pen = None
+    font.os2_use_typo_metrics = True
+    font.os2_family_class = 0x0802
+    font.os2_unicoderanges = (3, 0, 0, 0)
+    font.os2_codepages = (1, 0)
+    font.gasp = ((8, ('antialias',)), (65535, ('gridfit', 'antialias', 'symmetric-smoothing')))
+    font.creationtime = 1700000000
+    font.generate(str(tmp_path / 'fontforge.ufo'))
+    writeUfo(font, tmp_path / 'native.ufo', '')
+    with open(tmp_path / 'fontforge.ufo' / 'fontinfo.plist', 'rb') as f:
+        expected = plistlib.load(f)
+    with open(tmp_path / 'native.ufo' / 'fontinfo.plist', 'rb') as f:
+        assert plistlib.load(f).get(key) == expected.get(key)
@@ -173,3 +173,49 @@ def test_setOrDeleteVFValue(persistent, key, val, expectedPersistent):
         assert font.persistent == expectedPersistent
     finally:
         font.close()
+
+
+@pytest.mark.parametrize(('filename', 'expected'), [
+    ('spam.ttf', 'ttf'),
+    ('spam.woff2', 'woff2'),
+    ('spam.woff', 'woff'),
+    ('spam.otf', None),
+    ('spam.woff.zip', None),
+])
+def test_checkExtension(filename, expected):
+    from fontforgeVF.utils import checkExtension
+    if expected:
+        assert checkExtension(filename) == expected
+    else:
+        with pytest.raises(ValueError):
+            checkExtension(filename)
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_atomicOutput(tmp_path, fail):
+    from fontforgeVF.utils import _atomicOutput
+    target = tmp_path / 'spam.ttf'
+    target.write_bytes(b'static')
+    try:
+        with _atomicOutput(target) as tmpFile:
+            with open(tmpFile, 'wb') as f:
+                f.write(b'variable')
+            assert target.read_bytes() == b'static'
+            if fail:
+                raise RuntimeError
+    except RuntimeError:
+        pass
+    assert target.read_bytes() == (b'static' if fail else b'variable')
+    assert [p.name for p in tmp_path.iterdir()] == ['spam.ttf']
+
+
+def test_patched():
+    import types
+    from fontforgeVF.utils import _patched
+    owner = types.SimpleNamespace(spam='original')
+    with _patched(owner, 'spam', 'ham') as original:
+        assert (original, owner.spam) == ('original', 'ham')
+        with _patched(owner, 'spam', 'eggs') as inner:
+            assert (inner, owner.spam) == ('original', 'ham')
+        assert owner.spam == 'ham'
+    assert owner.spam == 'original'
@@ -0,0 +1,90 @@
+import pytest
+
+
+def _masters(count, shift):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    names = ['.notdef'] + ['g{0:04}'.format(i) for i in range(count)]
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(names)
+    glyphs = {}
+    for i, name in enumerate(names):
+        pen = TTGlyphPen(None)
+        pen.moveTo((i % 7, 0))
+        pen.lineTo((i % 7, 500 + shift * (i % 3)))
+        pen.qCurveTo((40 + shift, 600), (80, 500))
+        pen.lineTo((80, 0))
+        pen.closePath()
+        glyphs[name] = pen.glyph()
+    fb.setupCharacterMap({0x4E00 + i: name for i, name in enumerate(names[1:])})
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({name: (600 + shift, 0) for name in names})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'Spam', 'styleName': 'Regular'})
+    fb.setupOS2()
+    fb.setupPost()
+    return fb.font
+
+
+def _build(workers, cache=None, shift=30):
+    import io
+    from fontTools import varLib
+    from fontTools.designspaceLib import DesignSpaceDocument
+    from fontforgeVF import variations
+
+    doc = DesignSpaceDocument()
+    doc.addAxisDescriptor(name='Weight', tag='wght', minimum=400, default=400, maximum=700)
+    doc.addSourceDescriptor(font=_masters(1000, 0), location={'Weight': 400})
+    doc.addSourceDescriptor(font=_masters(1000, shift), location={'Weight': 700})
+    with variations.compiling(workers, cache):
+        vf = varLib.build(doc)[0]
+    vf.recalcTimestamp = False
+    vf['head'].created = vf['head'].modified = 0  # masters are made at different times
+    data = io.BytesIO()
+    vf.save(data)
+    return data.getvalue()
+
+
+def test_sharded(monkeypatch):
+    from fontforgeVF import utils, variations
+    if utils._forkExecutor(1) is None:
+        pytest.skip('fork is unavailable')
+    monkeypatch.setattr(variations, '_minShardSize', 100)
+    assert _build(3) == _build(1)
+
+
+@pytest.mark.parametrize(('count', 'workers', 'expected'), [
+    (1000, 1, [250] * 4),
+    (1000, 2, [125] * 8),
+    (1000, 100, [100] * 10),
+    (50, 4, [50]),
+])
+def test_shards(monkeypatch, count, workers, expected):
+    from fontforgeVF import variations
+    monkeypatch.setattr(variations, '_minShardSize', 100)
+    glyphOrder = [str(i) for i in range(count)]
+    shards = variations._shards(glyphOrder, workers)
+    assert [len(shard) for shard in shards] == expected
+    assert sum(shards, []) == glyphOrder
+
+
+def test_glyphCache(tmp_path):
+    from fontforgeVF import timing
+    from fontforgeVF.cache import DirectoryCache
+    cache = DirectoryCache(tmp_path, 1024 ** 3)
+    assert _build(1, cache) == _build(1)
+    with timing.trace() as trace:
+        assert _build(1, cache) == _build(1)
+    gvar = [span for span in trace.spans if span['name'] == 'gvar']
+    assert [span['args'] for span in gvar] == [{'glyphs': '0', 'cached': '1001'}]
+    assert _build(1, cache, 31) == _build(1, shift=31)
+
+
+def test_compilingRestores():
+    from fontTools import varLib
+    from fontforgeVF import variations
+    serial = varLib._add_gvar
+    with variations.compiling(2):
+        assert varLib._add_gvar is variations._addGvar
+    assert varLib._add_gvar is serial
@@ -0,0 +1,88 @@
+import pytest
+
+
+def _ttf(path):
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((500, 500))
+    pen.lineTo((500, 0))
+    pen.closePath()
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef', 'A'])
+    fb.setupCharacterMap({0x41: 'A'})
+    fb.setupGlyf({'.notdef': TTGlyphPen(None).glyph(), 'A': pen.glyph()})
+    fb.setupHorizontalMetrics({'.notdef': (500, 0), 'A': (600, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'Spam', 'styleName': 'Regular'})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.save(str(path))
+
+
+@pytest.mark.parametrize(('quality', 'transformGlyf'), [
+    (11, True),
+    (0, True),
+    (5, False),
+])
+def test_compress(tmp_path, quality, transformGlyf):
+    from fontTools.ttLib import TTFont
+    from fontforgeVF.woff2 import compress, decompress
+    _ttf(tmp_path / 'spam.ttf')
+    compress(tmp_path / 'spam.ttf', tmp_path / 'spam.woff2', quality, transformGlyf)
+    with TTFont(tmp_path / 'spam.woff2') as woff:
+        assert woff.flavor == 'woff2'
+        assert ('glyf' in woff.flavorData.transformedTables) == transformGlyf
+    decompress(tmp_path / 'spam.woff2', tmp_path / 'ham.ttf')
+    with TTFont(tmp_path / 'ham.ttf') as ttf:
+        assert ttf.flavor is None
+        assert ttf['glyf']['A'].numberOfContours == 1
+
+
+def test_compressQuality(tmp_path):
+    from fontTools.ttLib import woff2
+    from fontforgeVF.woff2 import compress
+    _ttf(tmp_path / 'spam.ttf')
+    brotli = woff2.brotli
+    with pytest.raises(ValueError):
+        compress(tmp_path / 'spam.ttf', tmp_path / 'spam.woff2', 12)
+    compress(tmp_path / 'spam.ttf', tmp_path / 'spam.woff2', 0)
+    assert woff2.brotli is brotli
+
+
+def test_compressAll(tmp_path):
+    import io
+    from fontTools.ttLib import TTFont
+    from fontforgeVF.woff2 import compressAll
+    _ttf(tmp_path / 'spam.ttf')
+    jobs = [
+        (str(tmp_path / 'spam.ttf'), str(tmp_path / 'spam.woff2')),
+        (io.BytesIO((tmp_path / 'spam.ttf').read_bytes()), str(tmp_path / 'ham.woff2')),
+    ]
+    compressAll(jobs)
+    for name in ('spam.woff2', 'ham.woff2'):
+        with TTFont(tmp_path / name) as woff:
+            assert woff.flavor == 'woff2'
+
+
+def test_compressAllQuality(tmp_path, monkeypatch):
+    from fontTools.ttLib import TTFont
+    from fontforgeVF import utils, woff2
+    if utils._forkExecutor(1) is None:
+        pytest.skip('fork is unavailable')
+    _ttf(tmp_path / 'spam.ttf')
+    calls = []
+    brotliQuality = woff2._brotliQuality
+
+    def recording(quality):
+        calls.append(quality)  # in the process compressing
+        return brotliQuality(quality)
+
+    monkeypatch.setattr(woff2, '_brotliQuality', recording)
+    woff2.compressAll([(str(tmp_path / 'spam.ttf'), str(tmp_path / 'spam.woff2'))], quality=0)
+    assert calls == []
+    with TTFont(tmp_path / 'spam.woff2') as woff:
+        assert woff.flavor == 'woff2'
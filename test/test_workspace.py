@@ -0,0 +1,46 @@
+import pytest
+
+
+def test_remove(tmp_path):
+    from fontforgeVF import workspace
+    tree = tmp_path / 'spam'
+    (tree / 'ham').mkdir(parents=True)
+    (tree / 'ham' / 'eggs.glif').write_text('')
+    workspace.remove(tree)
+    assert not tree.exists()
+    tree.mkdir()  # usable at once
+    assert workspace.waitForRemovals(10)
+    assert [p.name for p in tmp_path.iterdir()] == ['spam']
+
+
+@pytest.mark.parametrize('configured', [False, True])
+def test_workspace(monkeypatch, tmp_path, configured):
+    import os
+    import tempfile
+    from fontforgeVF import workspace
+    monkeypatch.delenv(workspace._envVar, raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path / 'tmp'))
+    os.makedirs(tempfile.tempdir)
+    root = tmp_path / 'root' if configured else None
+    with workspace.Workspace(root, 'spam') as path:
+        open(os.path.join(path, 'ham'), 'w').close()
+        with workspace.Workspace(root, 'spam') as other:  # in use
+            assert other != path
+    with workspace.Workspace(root, 'spam') as again:
+        assert os.path.exists(os.path.join(again, 'ham')) == configured
+    assert workspace.waitForRemovals(10)
+    if configured:
+        assert sorted(os.listdir(root)) == ['spam', 'spam.lock']
+        assert os.listdir(tempfile.tempdir) == []
+    else:
+        assert os.listdir(tempfile.tempdir) == [os.path.basename(workspace.workspaceRoot())]
+        assert os.listdir(workspace.workspaceRoot()) == []
+
+
+def test_emptyTrash(tmp_path):
+    from fontforgeVF import workspace
+    (tmp_path / '.fontforgeVF-spam.0123.trash' / 'ham').mkdir(parents=True)
+    (tmp_path / '.spam.trash').mkdir()  # of another program
+    workspace.Workspace(tmp_path).cleanup()
+    assert workspace.waitForRemovals(10)
+    assert [p.name for p in tmp_path.iterdir()] == ['.spam.trash']